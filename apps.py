@@ -1,8 +1,9 @@
 import shlex
 from config import (load_apps, save_apps, load_games, save_games,
-                    load_networks, save_networks)
+                    load_networks, save_networks, _user_file)
 from ui import run_menu, curses_input, curses_confirm, curses_message
 from launcher import launch_subprocess
+from watcher import ChangeFlag, get_watcher
 
 # ─── Generic add/delete ───────────────────────────────────────────────────────
 def add_entry(stdscr, data, save_fn, kind="App"):
@@ -34,35 +35,33 @@ def delete_entry(stdscr, data, save_fn, kind="App"):
         curses_message(stdscr, "Cancelled.", 0.8)
 
 # ─── Apps menu ────────────────────────────────────────────────────────────────
+def _launch_menu(stdscr, title, subtitle, load_fn, filename):
+    """Menu of launchable entries that follows edits to its JSON file."""
+    path = _user_file(filename)
+    get_watcher().watch(path.parent)
+    changes = ChangeFlag([path])
+    refresh = changes.refresher(lambda: list(load_fn().keys()) + ["---", "Back"])
+    try:
+        while True:
+            choices = list(load_fn().keys()) + ["---", "Back"]
+            result  = run_menu(stdscr, title, choices, subtitle=subtitle, refresh=refresh)
+            entries = load_fn()
+            if result == "Back":
+                break
+            elif result in entries:
+                launch_subprocess(stdscr, entries[result])
+    finally:
+        changes.close()
+
 def apps_menu(stdscr):
-    while True:
-        apps = load_apps()
-        choices = list(apps.keys()) + ["---", "Back"]
-        result = run_menu(stdscr, "Applications Menu", choices, subtitle="Select App")
-        if result == "Back":
-            break
-        elif result in apps:
-            launch_subprocess(stdscr, apps[result])
+    _launch_menu(stdscr, "Applications Menu", "Select App", load_apps, "apps.json")
 
 def games_menu(stdscr):
-    while True:
-        games = load_games()
-        choices = list(games.keys()) + ["---", "Back"]
-        result = run_menu(stdscr, "Games Menu", choices, subtitle="Select Game")
-        if result == "Back":
-            break
-        elif result in games:
-            launch_subprocess(stdscr, games[result])
+    _launch_menu(stdscr, "Games Menu", "Select Game", load_games, "games.json")
 
 def network_menu(stdscr):
-    while True:
-        networks = load_networks()
-        choices = list(networks.keys()) + ["---", "Back"]
-        result = run_menu(stdscr, "Network Menu", choices, subtitle="Select Network Program")
-        if result == "Back":
-            break
-        elif result in networks:
-            launch_subprocess(stdscr, networks[result])
+    _launch_menu(stdscr, "Network Menu", "Select Network Program", load_networks,
+                 "networks.json")
 
 # ─── Edit menus ───────────────────────────────────────────────────────────────
 def edit_apps_menu(stdscr):
@@ -0,0 +1,213 @@
+"""
+Authentication audit log.
+
+Events are JSON lines ({"ts": ..., "event": ..., "user": ..., ...}) handed
+to a background writer through a queue, so callers never wait on disk.
+The writer appends in batches to logs/audit.jsonl. Once that file passes
+MAX_BYTES it is gzip-compressed into a numbered segment next to a small
+.idx.json sidecar holding the segment's time range and per-user counts,
+which lets `query()` skip whole segments without decompressing them.
+
+Every desktop window runs its own writer. Appends hold a shared flock on
+logs/.rotate.lock and rotation an exclusive one, so no append can land in
+a file that is being rotated away. A rotation cut short by a crash leaves
+a .rotating-N file, which the next writer compresses into its segment.
+"""
+import atexit
+import contextlib
+import fcntl
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from config import base_dir
+
+AUDIT_DIR      = base_dir / "logs"
+ACTIVE_NAME    = "audit.jsonl"
+MAX_BYTES      = 1 << 20    # rotate the active file past 1 MiB
+FLUSH_INTERVAL = 0.5        # seconds between batched writes
+MAX_BATCH      = 512
+
+class AuditLog:
+    def __init__(self, directory: Path = AUDIT_DIR, max_bytes: int = MAX_BYTES,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.dir            = Path(directory)
+        self.max_bytes      = max_bytes
+        self.flush_interval = flush_interval
+        self._queue         = queue.Queue()
+        self._thread        = None
+        self._start_lock    = threading.Lock()
+
+    @property
+    def active(self) -> Path:
+        return self.dir / ACTIVE_NAME
+
+    # ─── Writing ─────────────────────────────────────────────────────────────
+    def record(self, event: str, user: str | None = None, **fields):
+        """Queue one event. Never blocks on disk."""
+        entry = {"ts": round(time.time(), 3), "event": event, "user": user}
+        entry.update(fields)
+        self._queue.put(entry)
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name="audit-writer")
+                self._thread.start()
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far is on disk."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        try:
+            with self._locked(fcntl.LOCK_EX):
+                self._finish_rotations()
+        except OSError:
+            pass
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break            # flush requested: write what we have now
+                batch.append(item)
+                if len(batch) >= MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError:
+                    pass             # auditing must never take the UI down
+            for w in waiters:
+                w.set()
+
+    def _write(self, batch: list):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch)
+        with self._locked(fcntl.LOCK_SH):
+            fd = os.open(self.active, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, data.encode("utf-8"))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+        if size >= self.max_bytes:
+            self._rotate()
+
+    # ─── Rotation ────────────────────────────────────────────────────────────
+    def _segments(self) -> list[Path]:
+        return sorted(self.dir.glob("audit-*.jsonl.gz"))
+
+    @contextlib.contextmanager
+    def _locked(self, mode):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.dir / ".rotate.lock", "w") as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def _rotate(self):
+        with self._locked(fcntl.LOCK_EX):
+            self._finish_rotations()
+            try:
+                if self.active.stat().st_size < self.max_bytes:
+                    return
+            except FileNotFoundError:
+                return
+            segs = self._segments()
+            seq  = int(segs[-1].name.split("-")[1].split(".")[0]) + 1 if segs else 1
+            work = self.dir / f".rotating-{seq:06d}"
+            os.replace(self.active, work)
+            self._compress(work)
+
+    def _finish_rotations(self):
+        """Compress .rotating-N files left by a crash; call with the lock held."""
+        for work in sorted(self.dir.glob(".rotating-*")):
+            if work.name.split("-")[1].isdigit():
+                self._compress(work)
+
+    def _compress(self, work: Path):
+        seg = self.dir / f"audit-{work.name.split('-')[1]}.jsonl.gz"
+        start = end = None
+        users, count = {}, 0
+        with open(work, "rb") as src, gzip.open(seg, "wb") as dst:
+            for line in src:
+                dst.write(line)
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                ts = e.get("ts", 0)
+                start = ts if start is None else min(start, ts)
+                end   = ts if end   is None else max(end, ts)
+                u = e.get("user") or ""
+                users[u] = users.get(u, 0) + 1
+                count += 1
+        _index_path(seg).write_text(json.dumps(
+            {"start": start, "end": end, "count": count, "users": users}))
+        work.unlink()
+
+    # ─── Querying ────────────────────────────────────────────────────────────
+    def query(self, user: str | None = None, since: float | None = None,
+              until: float | None = None, event: str | None = None):
+        """Yield events oldest-first, filtered by user, time range and type."""
+        self.flush()
+        for seg in self._segments():
+            try:
+                idx = json.loads(_index_path(seg).read_text())
+            except (OSError, ValueError):
+                idx = None
+            if idx:
+                if since is not None and idx["end"] is not None and idx["end"] < since:
+                    continue
+                if until is not None and idx["start"] is not None and idx["start"] > until:
+                    continue
+                if user is not None and user not in idx["users"]:
+                    continue
+            with gzip.open(seg, "rb") as f:
+                yield from _filter(f, user, since, until, event)
+        if self.active.exists():
+            with open(self.active, "rb") as f:
+                yield from _filter(f, user, since, until, event)
+
+def _index_path(seg: Path) -> Path:
+    return seg.with_name(seg.name.replace(".jsonl.gz", ".idx.json"))
+
+def _filter(lines, user, since, until, event):
+    for line in lines:
+        try:
+            e = json.loads(line)
+        except ValueError:
+            continue
+        ts = e.get("ts", 0)
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts > until:
+            continue
+        if user is not None and e.get("user") != user:
+            continue
+        if event is not None and e.get("event") != event:
+            continue
+        yield e
+
+log = AuditLog()
+atexit.register(log.flush)
+
+def record(event: str, user: str | None = None, **fields):
+    log.record(event, user, **fields)
@@ -1,18 +1,18 @@
 import os
 import sys
-import json
 import curses
 import hashlib
 import secrets
 import tempfile
 from pathlib import Path
 from config import (COLOR_NORMAL, COLOR_SELECTED, COLOR_TITLE,
-                    COLOR_DIM, COLOR_STATUS, init_colors, base_dir)
+                    COLOR_DIM, COLOR_STATUS, init_colors)
 from status import draw_header, draw_separator, draw_menu_title, draw_status
 from ui import run_menu, curses_message, curses_confirm, _halfdelay
 from config import set_show_status
+from userstore import store
+from audit import record as audit
 
-USERS_FILE         = base_dir / "users.json"
 SESSION_TOKEN_FILE = Path(tempfile.gettempdir()) / "robcos.session"
 
 def write_session(username: str):
@@ -32,21 +32,19 @@ def clear_session():
             pass
 
 def load_users():
-    if USERS_FILE.exists():
-        return json.loads(USERS_FILE.read_text())
-    return {}
+    return store.load_all()
 
-def save_users(users):
-    USERS_FILE.write_text(json.dumps(users, indent=4))
+def get_user(username: str) -> dict:
+    return store.get(username) or {}
 
 def is_admin(username: str) -> bool:
-    return load_users().get(username, {}).get("role", "user") == "admin"
+    return get_user(username).get("role", "user") == "admin"
 
 def get_role(username: str) -> str:
-    return load_users().get(username, {}).get("role", "user")
+    return get_user(username).get("role", "user")
 
 def get_auth_mode(username: str) -> str:
-    u = load_users().get(username, {})
+    u = get_user(username)
     if u.get("no_password"):
         return "none"
     return u.get("auth_mode", "password")
@@ -240,8 +238,8 @@ def _first_time_setup(stdscr):
     if confirm != password:
         _show_error(stdscr, "Passwords do not match.")
         return
-    users = {username: make_user(password, role="admin", auth_mode="password")}
-    save_users(users)
+    store.put(username, make_user(password, role="admin", auth_mode="password"))
+    audit("user_added", username, by=None, role="admin", auth_mode="password")
     _show_success(stdscr, f"Admin account '{username}' created.")
 
 # ─── Login screen ─────────────────────────────────────────────────────────────
@@ -257,10 +255,10 @@ def login_screen(stdscr):
                 return existing
             time.sleep(0.5)
 
-    users = load_users()
+    users = store.names()
     if not users:
         _first_time_setup(stdscr)
-        users = load_users()
+        users = store.names()
         if not users:
             return None
 
@@ -268,7 +266,7 @@ def login_screen(stdscr):
 
     while True:
         attempts = 0
-        username = run_menu(stdscr, "LOGIN", list(users.keys()) + ["---", "Exit"], subtitle="Users")
+        username = run_menu(stdscr, "LOGIN", users + ["---", "Exit"], subtitle="Users")
         if username == "__SESSION_READY__":
             existing = read_session()
             if existing:
@@ -281,13 +279,14 @@ def login_screen(stdscr):
             set_show_status(True)
             return "__EXIT__"
 
-        users = load_users()
-        if username not in users:
+        record = store.get(username)
+        if record is None:
             continue
 
         mode = get_auth_mode(username)
 
         if mode == "none":
+            audit("login", username, method="none")
             write_session(username)
             _show_success(stdscr, f"Welcome, {username}.")
             set_show_status(True)
@@ -296,17 +295,21 @@ def login_screen(stdscr):
         if mode == "hacking":
             import traceback as _tb
             try:
-                from hacking import run_hacking_minigame
+                from hacking import user_difficulty
                 from config import init_colors
-                success = run_hacking_minigame(stdscr, username)
+                from replay import maybe_record
+                success = maybe_record(stdscr, "hacking", username=username,
+                                       difficulty=user_difficulty(username))
                 init_colors()
                 stdscr.clear()
                 if success:
+                    audit("login", username, method="hacking")
                     set_show_status(True)
                     write_session(username)
                     _show_success(stdscr, f"Welcome, {username}.")
                     return username
                 else:
+                    audit("login_failed", username, method="hacking")
                     _terminal_locked(stdscr, delay=2)
                     break
             except Exception as _e:
@@ -333,7 +336,8 @@ def login_screen(stdscr):
             if password is None:
                 break
 
-            if verify(password, users[username]):
+            if verify(password, record):
+                audit("login", username, method="password")
                 write_session(username)
                 _show_success(stdscr, f"Welcome, {username}.")
                 set_show_status(True)
@@ -341,9 +345,11 @@ def login_screen(stdscr):
 
             attempts += 1
             remaining = MAX_ATTEMPTS - attempts
+            audit("login_failed", username, method="password", attempt=attempts)
             if remaining > 0:
                 _show_error(stdscr, f"Wrong password. {remaining} attempt(s) left.")
             else:
+                audit("lockout", username, attempts=attempts)
                 _terminal_locked(stdscr)
 
 # ─── User management menu ─────────────────────────────────────────────────────
@@ -351,7 +357,7 @@ def user_management_menu(stdscr, current_user):
     while True:
         result = run_menu(stdscr, "User Management",
                           ["Add User", "Change Login Method", "Change Role",
-                           "Delete User", "---", "Back"])
+                           "Hacking Difficulty", "Delete User", "---", "Back"])
         if result == "Back":
             return
 
@@ -359,8 +365,7 @@ def user_management_menu(stdscr, current_user):
             username = _prompt_field(stdscr, "ADD USER", "New username:", row=7)
             if not username:
                 continue
-            users = load_users()
-            if username in users:
+            if store.exists(username):
                 curses_message(stdscr, f"User '{username}' already exists.")
                 continue
             role_choice = run_menu(stdscr, "Select Role", ["user", "admin"])
@@ -371,14 +376,14 @@ def user_management_menu(stdscr, current_user):
             if auth_choice in (None, "Back"):
                 continue
             if auth_choice == "No Password":
-                users[username] = make_user("", role=role_choice,
-                                            no_password=True, auth_mode="none")
-                save_users(users)
+                store.put(username, make_user("", role=role_choice,
+                                              no_password=True, auth_mode="none"))
+                audit("user_added", username, by=current_user, role=role_choice, auth_mode="none")
                 curses_message(stdscr, f"User '{username}' ({role_choice}, no password) added.")
                 continue
             if auth_choice == "Hacking Minigame":
-                users[username] = make_user("", role=role_choice, auth_mode="hacking")
-                save_users(users)
+                store.put(username, make_user("", role=role_choice, auth_mode="hacking"))
+                audit("user_added", username, by=current_user, role=role_choice, auth_mode="hacking")
                 curses_message(stdscr, f"User '{username}' ({role_choice}, hacking) added.")
                 continue
             _draw_login(stdscr, "ADD USER")
@@ -402,14 +407,13 @@ def user_management_menu(stdscr, current_user):
             if confirm != password:
                 curses_message(stdscr, "Passwords do not match.")
                 continue
-            users[username] = make_user(password, role=role_choice, auth_mode="password")
-            save_users(users)
+            store.put(username, make_user(password, role=role_choice, auth_mode="password"))
+            audit("user_added", username, by=current_user, role=role_choice, auth_mode="password")
             curses_message(stdscr, f"User '{username}' ({role_choice}, password) added.")
 
         elif result == "Change Login Method":
-            users    = load_users()
             target   = run_menu(stdscr, "Change Login Method",
-                                list(users.keys()) + ["---", "Back"])
+                                store.names() + ["---", "Back"])
             if target in ("Back", None):
                 continue
             cur_mode = get_auth_mode(target)
@@ -419,15 +423,13 @@ def user_management_menu(stdscr, current_user):
                 continue
 
             if action == "No Password":
-                users[target]["auth_mode"]   = "none"
-                users[target]["no_password"] = True
-                save_users(users)
+                store.update(target, auth_mode="none", no_password=True)
+                audit("auth_mode_changed", target, by=current_user, auth_mode="none")
                 curses_message(stdscr, f"'{target}' set to no password.")
 
             elif action == "Hacking Minigame":
-                users[target]["auth_mode"]   = "hacking"
-                users[target]["no_password"] = False
-                save_users(users)
+                store.update(target, auth_mode="hacking", no_password=False)
+                audit("auth_mode_changed", target, by=current_user, auth_mode="hacking")
                 curses_message(stdscr, f"'{target}' set to hacking minigame.")
 
             elif action == "Password":
@@ -441,7 +443,7 @@ def user_management_menu(stdscr, current_user):
                     stdscr.noutrefresh()
                     curses.doupdate()
                     old_pw = _read_password(stdscr, 10, 24)
-                    if not old_pw or not verify(old_pw, users[target]):
+                    if not old_pw or not verify(old_pw, get_user(target)):
                         curses_message(stdscr, "Incorrect current password.")
                         continue
                 _draw_login(stdscr, "SET PASSWORD", username=target)
@@ -467,15 +469,13 @@ def user_management_menu(stdscr, current_user):
                 if confirm_pw != new_pw:
                     curses_message(stdscr, "Passwords do not match.")
                     continue
-                users[target]["auth_mode"]   = "password"
-                users[target]["no_password"] = False
-                users[target]["hash"]        = _hash(new_pw, users[target]["salt"])
-                save_users(users)
+                store.update(target, auth_mode="password", no_password=False,
+                             hash=_hash(new_pw, get_user(target)["salt"]))
+                audit("password_changed", target, by=current_user)
                 curses_message(stdscr, f"'{target}' password updated.")
 
         elif result == "Change Role":
-            users  = load_users()
-            others = [u for u in users if u != current_user]
+            others = [u for u in store.names() if u != current_user]
             if not others:
                 curses_message(stdscr, "No other users to change role for.")
                 continue
@@ -485,12 +485,25 @@ def user_management_menu(stdscr, current_user):
             current_role = get_role(target)
             new_role     = "user" if current_role == "admin" else "admin"
             if curses_confirm(stdscr, f"Change '{target}' from {current_role} to {new_role}?"):
-                users[target]["role"] = new_role
-                save_users(users)
+                store.update(target, role=new_role)
+                audit("role_changed", target, by=current_user, role=new_role)
                 curses_message(stdscr, f"'{target}' is now {new_role}.")
 
+        elif result == "Hacking Difficulty":
+            from hacking import DIFFICULTIES, user_difficulty
+            target = run_menu(stdscr, "Hacking Difficulty", store.names() + ["---", "Back"])
+            if target in ("Back", None):
+                continue
+            tier = run_menu(stdscr, f"{target}  [currently: {user_difficulty(target)}]",
+                            list(DIFFICULTIES) + ["---", "Back"])
+            if tier in ("Back", None):
+                continue
+            store.update(target, hacking_difficulty=tier)
+            audit("difficulty_changed", target, by=current_user, difficulty=tier)
+            curses_message(stdscr, f"'{target}' hacking difficulty set to {tier}.")
+
         elif result == "Delete User":
-            users = load_users()
+            users = store.names()
             if len(users) <= 1:
                 curses_message(stdscr, "Cannot delete the last user.")
                 continue
@@ -499,11 +512,19 @@ def user_management_menu(stdscr, current_user):
             if target in ("Back", None):
                 continue
             if curses_confirm(stdscr, f"Delete user '{target}'?"):
-                del users[target]
-                save_users(users)
+                import backup
+                try:
+                    curses_message(stdscr, f"Backing up '{target}'...", 0)
+                    snap = backup.Repository().create(label=f"before-delete-{target}")["name"]
+                    audit("backup_created", target, by=current_user, snapshot=snap)
+                except OSError as e:
+                    if not curses_confirm(stdscr, f"Backup failed ({e.strerror or e}). Delete anyway?"):
+                        continue
+                store.delete(target)
                 import shutil
                 from config import USERS_DIR
                 user_dir = USERS_DIR / target
                 if user_dir.exists():
                     shutil.rmtree(user_dir)
+                audit("user_deleted", target, by=current_user)
                 curses_message(stdscr, f"User '{target}' deleted.")
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+Incremental, content-addressed backups of user data.
+
+    python main.py backup [create [LABEL] | list | restore-user NAME [SNAPSHOT]
+                           | restore-entry NAME DATE [N] [SNAPSHOT]] [--repo DIR]
+
+The repository (backups/ by default) holds
+
+    chunks/ab/ab12...    one file per distinct 1 MiB chunk, named by its
+                         BLAKE2b digest; a one-byte codec tag ("z" zlib,
+                         "x" lzma) followed by the compressed bytes
+    snapshots/<name>.json  manifest: relative path -> mtime, size, mode and
+                         the list of chunk digests
+
+A new snapshot starts from the previous manifest and only reads files whose
+(mtime, size) changed; chunks already in the repository are not written
+again, so identical files and unchanged parts of appended journals are
+stored once. Compression and chunk writes run on a thread pool.
+
+Restoring a user or a single journal entry reads just the chunks of the
+files involved.
+"""
+import hashlib
+import json
+import lzma
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from config import base_dir, BACKUP_DIR
+
+SOURCES     = ("users", "users.json", "about.json", "journal_entries")
+CHUNK_BYTES = 1 << 20
+WORKERS     = max(1, min(4, os.cpu_count() or 1))
+CODEC       = "zlib"
+
+_CODECS = {
+    "zlib": (b"z", lambda b: zlib.compress(b, 6)),
+    "lzma": (b"x", lzma.compress),
+}
+_DECODE = {b"z": zlib.decompress, b"x": lzma.decompress}
+
+class BackupError(Exception):
+    """Missing snapshot, file or chunk, or a chunk that fails its digest."""
+
+# ─── Repository ───────────────────────────────────────────────────────────────
+class Repository:
+    def __init__(self, path: Path = BACKUP_DIR, codec: str = CODEC, workers: int = WORKERS):
+        self.path    = Path(path)
+        self.codec   = codec
+        self.workers = workers
+        self._dirs   = set()              # chunk fan-out dirs known to exist
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.path / "chunks" / digest[:2] / digest
+
+    def _put_chunk(self, data: bytes) -> tuple[str, int]:
+        """(digest, bytes written); 0 written when the chunk was already stored."""
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        path   = self._chunk_path(digest)
+        if path.exists():
+            return digest, 0
+        tag, compress = _CODECS[self.codec]
+        blob = tag + compress(data)
+        if digest[:2] not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(digest[:2])
+        tmp = path.with_name(f"{digest}.{os.getpid()}.{id(data)}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        return digest, len(blob)
+
+    def read_chunk(self, digest: str) -> bytes:
+        try:
+            blob = self._chunk_path(digest).read_bytes()
+            data = _DECODE[blob[:1]](blob[1:])
+        except (OSError, KeyError, zlib.error, lzma.LZMAError) as e:
+            raise BackupError(f"chunk {digest[:12]}: {e}") from None
+        if hashlib.blake2b(data, digest_size=20).hexdigest() != digest:
+            raise BackupError(f"chunk {digest[:12]} is corrupt")
+        return data
+
+    # ─── Snapshots ───────────────────────────────────────────────────────────
+    def snapshots(self) -> list[str]:
+        """Snapshot names, oldest first."""
+        try:
+            return sorted(p.stem for p in (self.path / "snapshots").glob("*.json"))
+        except OSError:
+            return []
+
+    def manifest(self, name: str | None = None) -> dict:
+        """A snapshot's manifest; the latest one when name is None."""
+        names = self.snapshots()
+        name  = name or (names[-1] if names else None)
+        if name is None:
+            raise BackupError("no snapshots yet")
+        try:
+            return json.loads((self.path / "snapshots" / f"{name}.json").read_text())
+        except (OSError, ValueError):
+            raise BackupError(f"snapshot {name} not found") from None
+
+    def create(self, root: Path = base_dir, sources=SOURCES, label: str = "") -> dict:
+        """Write a new snapshot of sources under root; returns its statistics."""
+        root = Path(root)
+        try:
+            prev = self.manifest()["files"]
+        except BackupError:
+            prev = {}
+        t0 = time.perf_counter()
+        stats = {"files": 0, "changed": 0, "read": 0, "written": 0}
+        files, todo = {}, []
+        for rel, st in _walk(root, sources):
+            stats["files"] += 1
+            old = prev.get(rel)
+            if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+                files[rel] = old
+            else:
+                todo.append((rel, st))
+        stats["changed"] = len(todo)
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="backup") as pool:
+            pending = set()
+            chunks  = {}                  # rel -> list of futures
+            for rel, st in todo:
+                futures = chunks[rel] = []
+                try:
+                    with open(root / rel, "rb") as f:
+                        while True:
+                            data = f.read(CHUNK_BYTES)
+                            if not data and futures:
+                                break
+                            stats["read"] += len(data)
+                            if len(pending) >= self.workers * 4:
+                                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            fut = pool.submit(self._put_chunk, data)
+                            futures.append(fut)
+                            pending.add(fut)
+                            if len(data) < CHUNK_BYTES:
+                                break
+                except OSError:
+                    del chunks[rel]
+                    continue
+                files[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                              "mode": st.st_mode & 0o777, "chunks": futures}
+            for rel, futures in chunks.items():
+                results = [fut.result() for fut in futures]
+                stats["written"] += sum(n for _, n in results)
+                files[rel]["chunks"] = [d for d, _ in results]
+
+        name = time.strftime("%Y%m%d-%H%M%S") + (f"-{_slug(label)}" if label else "")
+        base, n = name, 1
+        while (self.path / "snapshots" / f"{name}.json").exists():
+            n += 1
+            name = f"{base}.{n}"
+        manifest = {"time": time.time(), "label": label, "files": files}
+        folder = self.path / "snapshots"
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = folder / f"{name}.json.tmp"
+        tmp.write_text(json.dumps(manifest, separators=(",", ":")))
+        os.replace(tmp, folder / f"{name}.json")
+        stats["name"]    = name
+        stats["seconds"] = time.perf_counter() - t0
+        return stats
+
+    # ─── Reading back ────────────────────────────────────────────────────────
+    def read_file(self, manifest: dict, rel: str) -> bytes:
+        entry = manifest["files"].get(rel)
+        if entry is None:
+            raise BackupError(f"{rel} is not in this snapshot")
+        return b"".join(self.read_chunk(d) for d in entry["chunks"])
+
+    def restore_file(self, manifest: dict, rel: str, root: Path = base_dir):
+        entry = manifest["files"][rel]
+        dest  = Path(root) / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".restore.tmp")
+        tmp.write_bytes(self.read_file(manifest, rel))
+        os.chmod(tmp, entry["mode"])
+        os.utime(tmp, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        os.replace(tmp, dest)
+
+def _slug(label: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in label)[:40]
+
+def _walk(root: Path, sources):
+    """(posix relative path, stat) for every regular file under sources."""
+    for source in sources:
+        top = root / source
+        if top.is_file():
+            yield source, top.stat()
+            continue
+        for dirpath, dirnames, names in os.walk(top):
+            dirnames.sort()
+            for name in sorted(names):
+                if name.endswith(".tmp"):
+                    continue
+                path = Path(dirpath) / name
+                try:
+                    st = path.lstat()
+                except OSError:
+                    continue
+                if path.is_file() and not path.is_symlink():
+                    yield path.relative_to(root).as_posix(), st
+
+# ─── Restore helpers ──────────────────────────────────────────────────────────
+def users_in(manifest: dict) -> list[str]:
+    names = set()
+    for rel in manifest["files"]:
+        parts = rel.split("/")
+        if parts[0] in ("users", "journal_entries") and len(parts) > 2:
+            names.add(parts[1])
+    return sorted(names)
+
+def restore_user(repo: Repository, user: str, snapshot: str | None = None,
+                 root: Path = base_dir) -> int:
+    """Put back one user's account, settings and journal; returns files restored."""
+    from userstore import UserStore
+    manifest = repo.manifest(snapshot)
+    prefixes = (f"users/{user}/", f"journal_entries/{user}/")
+    rels = [r for r in manifest["files"] if r.startswith(prefixes)]
+    record = None
+    account = f"users/{user}/account.json"
+    if account in manifest["files"]:
+        record = json.loads(repo.read_file(manifest, account))
+    elif "users.json" in manifest["files"]:
+        record = json.loads(repo.read_file(manifest, "users.json")).get(user)
+    if record is None and not rels:
+        raise BackupError(f"user {user} is not in this snapshot")
+    for rel in rels:
+        if rel != account:
+            repo.restore_file(manifest, rel, root)
+    if record is not None:
+        root = Path(root)
+        UserStore(root / "users", root / "users.json").put(user, record)
+    return len(rels)
+
+def journal_days(manifest: dict, user: str) -> list[str]:
+    prefix = f"journal_entries/{user}/"
+    return sorted((r[len(prefix):-4] for r in manifest["files"]
+                   if r.startswith(prefix) and r.endswith(".txt") and "/" not in r[len(prefix):]),
+                  reverse=True)
+
+def journal_entries(repo: Repository, manifest: dict, user: str, day: str) -> list[tuple]:
+    """(time, text) for each entry of one day file in the snapshot."""
+    from journalstore import parse
+    data = repo.read_file(manifest, f"journal_entries/{user}/{day}.txt")
+    out = []
+    for (offset, length, skip, _, when, _), _ in parse(data):
+        text = data[offset + skip:offset + length].decode("utf-8", "ignore").rstrip("\n")
+        out.append((when, text))
+    return out
+
+def restore_entry(repo: Repository, user: str, day: str, n: int = 0,
+                  snapshot: str | None = None, store=None) -> bool:
+    """Append entry n of a day back into the user's journal; False if it is already there."""
+    import journalstore
+    store = store or journalstore.store_for(user)
+    when, text = journal_entries(repo, repo.manifest(snapshot), user, day)[n]
+    store.refresh()
+    for i in store.date_range(day, day):
+        if store.read(i) == text:
+            return False
+    store.append(text, day, when or None)
+    return True
+
+# ─── Menu ─────────────────────────────────────────────────────────────────────
+def _describe(stats: dict) -> str:
+    return (f"Snapshot {stats['name']}: {stats['files']} files, {stats['changed']} changed, "
+            f"{stats['written'] / 1048576:.1f} MB new in {stats['seconds']:.1f}s.")
+
+class _Choices:
+    """Fixed list for run_lazy_menu, which scrolls where run_menu does not."""
+    def __init__(self, choices, status=""):
+        self.choices, self.status = list(choices), status
+
+    def snapshot(self):
+        return self.choices, self.status
+
+def backup_menu(stdscr, current_user=None):
+    from ui import run_menu, run_lazy_menu, curses_message, curses_confirm
+    from audit import record as audit
+    repo = Repository()
+
+    def pick(title, choices, status=""):
+        sel = run_lazy_menu(stdscr, title, _Choices(choices, status))
+        return sel if sel in choices else None
+
+    def pick_snapshot():
+        names = list(reversed(repo.snapshots()))
+        if not names:
+            curses_message(stdscr, "No snapshots yet.")
+            return None
+        return pick("Select Snapshot", names, f"{len(names)} snapshots")
+
+    while True:
+        result = run_menu(stdscr, "Backup",
+                          ["Create Snapshot", "Restore User", "Restore Journal Entry",
+                           "---", "Back"], subtitle=f"Repository: {repo.path}")
+        if result in ("Back", None, "__SESSION_READY__"):
+            return
+        try:
+            if result == "Create Snapshot":
+                curses_message(stdscr, "Backing up...", 0)
+                stats = repo.create()
+                audit("backup_created", current_user, snapshot=stats["name"])
+                curses_message(stdscr, _describe(stats), 3)
+                continue
+            name = pick_snapshot()
+            if name is None:
+                continue
+            manifest = repo.manifest(name)
+            user = pick("Select User", users_in(manifest))
+            if user is None:
+                continue
+            if result == "Restore User":
+                if curses_confirm(stdscr, f"Restore '{user}' from {name}? Current files are replaced."):
+                    count = restore_user(repo, user, name)
+                    audit("backup_restored", user, by=current_user, snapshot=name)
+                    curses_message(stdscr, f"Restored {count} files for '{user}'.")
+                continue
+            day = pick("Select Day", journal_days(manifest, user))
+            if day is None:
+                continue
+            entries = journal_entries(repo, manifest, user, day)
+            labels  = [f"{i + 1}. {when or day}  {text.strip()[:50]}"
+                       for i, (when, text) in enumerate(entries)]
+            sel = pick(f"Entries - {day}", labels)
+            if sel is not None:
+                import journalstore
+                restored = restore_entry(repo, user, day, labels.index(sel), name,
+                                         journalstore.store_for(user))
+                curses_message(stdscr, "Entry restored." if restored
+                               else "Entry is already in the journal.")
+        except (BackupError, OSError) as e:
+            curses_message(stdscr, f"Error: {e}")
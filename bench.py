@@ -0,0 +1,696 @@
+"""
+Micro-benchmarks for RobcOS subsystems.
+
+    python bench.py                  list benchmarks
+    python bench.py <name> [args]    run one benchmark
+    python bench.py all              run every benchmark with defaults
+
+Benchmarks never touch the real users/, journal or document folders; each
+builds its fixtures under a temporary directory.
+"""
+import datetime
+import random
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS = {}
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__.removeprefix("bench_")] = fn
+    return fn
+
+def _per_call(fn, repeat):
+    """Average wall time of fn() in microseconds."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+# ─── Account storage ──────────────────────────────────────────────────────────
+@benchmark
+def bench_userstore(*sizes):
+    """Per-user lookup and update cost, legacy vs sharded, as accounts grow."""
+    from userstore import UserStore
+    sizes = [int(s) for s in sizes] or [10, 100, 1_000, 10_000, 100_000]
+    record = {"salt": "00" * 32, "hash": "00" * 32, "role": "user",
+              "no_password": False, "auth_mode": "password"}
+    print(f"{'users':>8}  {'layout':<8} {'get us':>10} {'update us':>10} {'list ms':>9}")
+    for n in sizes:
+        names = [f"user{i:06d}" for i in range(n)]
+        for layout in ("legacy", "sharded"):
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp   = Path(tmp)
+                store = UserStore(tmp / "users", tmp / "users.json")
+                store._save_legacy({u: dict(record) for u in names})
+                if layout == "sharded":
+                    store.migrate()
+                # The legacy layout rewrites the whole file per call; keep
+                # its repeat count low so large sizes finish in reasonable time.
+                repeat = 200 if layout == "sharded" else max(3, min(200, 20_000 // n))
+                picks  = [random.choice(names) for _ in range(repeat)]
+                it     = iter(picks)
+                get_us = _per_call(lambda: store.get(next(it)), repeat)
+                it     = iter(picks)
+                upd_us = _per_call(lambda: store.update(next(it), role="admin"), repeat)
+                store._index = None
+                list_ms = _per_call(store.names, 1) / 1000
+            print(f"{n:>8}  {layout:<8} {get_us:>10.1f} {upd_us:>10.1f} {list_ms:>9.2f}")
+
+# ─── Hacking minigame ─────────────────────────────────────────────────────────
+@benchmark
+def bench_hacking_gen(boards="2000"):
+    """Puzzle generation rate per tier; checks board invariants as it goes."""
+    from hacking import DIFFICULTIES, Layout, generate_puzzle, check_puzzle
+    boards  = int(boards)
+    layouts = dict(DIFFICULTIES)
+    layouts["10x Advanced"] = Layout(4, 40, 24, 60, 7)    # 3840 cells vs 384
+    print(f"{'tier':<14} {'cells':>6} {'words':>5} {'boards/s':>10} {'violations':>10}")
+    for name, layout in layouts.items():
+        bad = 0
+        t0  = time.perf_counter()
+        for seed in range(boards):
+            _, chars, words, brackets, _ = generate_puzzle(seed, layout=layout)
+            bad += bool(check_puzzle(layout, chars, words, brackets))
+        rate = boards / (time.perf_counter() - t0)
+        same = generate_puzzle(7, layout=layout)[:4] == generate_puzzle(7, layout=layout)[:4]
+        print(f"{name:<14} {layout.total:>6} {layout.num_words:>5} {rate:>10.0f} {bad:>10}"
+              + ("" if same else "  NOT REPRODUCIBLE"))
+
+@benchmark
+def bench_hacking_solver(boards="2000", words="10"):
+    """Likeness matrix + hint-driven solve rate, and board quality mix."""
+    import hacksolver
+    from hacking import WORD_BANK, MAX_TRIES
+    boards, n = int(boards), int(words)
+    rng  = random.Random(0)
+    sets = [rng.sample(WORD_BANK, n) for _ in range(boards)]
+    print(f"matrix backend: {'numpy' if hacksolver._np is not None else 'pure python'}")
+
+    t0 = time.perf_counter()
+    total_guesses = 0
+    for i, ws in enumerate(sets):
+        total_guesses += hacksolver.simulate(ws, i % n)
+    dt = time.perf_counter() - t0
+    print(f"solved {boards} boards of {n} words: {boards / dt:,.0f} boards/s, "
+          f"{total_guesses / boards:.2f} guesses avg")
+
+    t0 = time.perf_counter()
+    mix = {}
+    for ws in sets:
+        r = hacksolver.rate_board(ws, MAX_TRIES)
+        mix[r] = mix.get(r, 0) + 1
+    dt = time.perf_counter() - t0
+    print(f"rated {boards} boards: {boards / dt:,.0f} boards/s  {mix}")
+
+@benchmark
+def bench_wordlist(words="100000"):
+    """Dictionary index build/load time and related-word selection latency."""
+    import wordlist
+    n   = int(words)
+    rng = random.Random(0)
+    # Pronounceable-ish fake words so positional letters cluster like English.
+    cons, vows = "BCDFGHLMNPRSTVW", "AEIOU"
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "words.txt"
+        with open(src, "w") as f:
+            for _ in range(n):
+                length = rng.randint(4, 8)
+                f.write("".join(rng.choice(cons if i % 2 == 0 else vows)
+                                for i in range(length)) + "\n")
+        cache = Path(tmp) / "words.bin"
+        t0 = time.perf_counter()
+        wordlist.load_index([src], cache)
+        build_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        index = wordlist.load_index([src], cache)
+        load_ms = (time.perf_counter() - t0) * 1000
+        print(f"{n:,} words -> {', '.join(f'{l}:{index.count(l)}' for l in index.lengths())}")
+        print(f"build {build_ms:.0f} ms, cached load {load_ms:.1f} ms, "
+              f"cache {cache.stat().st_size / 1024:.0f} KiB")
+        pick_us = _per_call(lambda: index.pick(5, 10, rng), 5000)
+        print(f"pick 10 related 5-letter words: {pick_us:.1f} us")
+
+# ─── Documents ────────────────────────────────────────────────────────────────
+@benchmark
+def bench_fulltext(library=None, docs="2000"):
+    """Full-text index build, size and query latency (synthetic or a real folder)."""
+    import fulltext
+    rng   = random.Random(0)
+    vocab = ["".join(rng.choice("etaoinshrdlucmfwyp") for _ in range(rng.randint(3, 9)))
+             for _ in range(20_000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if not library:
+            library = tmp / "library"
+            library.mkdir()
+            for i in range(int(docs)):
+                words = rng.choices(vocab, weights=[1 / (r + 1) for r in range(len(vocab))],
+                                    k=rng.randint(500, 5000))
+                (library / f"doc{i:05d}.txt").write_text(" ".join(words))
+        library = Path(library)
+        src_bytes = sum(p.stat().st_size for p in fulltext._walk([library]))
+        indexer = fulltext.Indexer(fulltext.SearchIndex(tmp / "bench.idx"))
+        t0 = time.perf_counter()
+        indexer._run([library])
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        indexer._run([library])
+        rescan_s = time.perf_counter() - t0
+        stats = indexer.index.stats()
+        indexer.index.save()
+        on_disk = (tmp / "bench.idx").stat().st_size
+        print(f"{stats['docs']} docs, {src_bytes / 1048576:.1f} MB text -> "
+              f"{on_disk / 1048576:.1f} MB index ({on_disk / max(1, src_bytes):.0%}), "
+              f"{stats['terms']} terms")
+        print(f"build {build_s:.1f} s ({src_bytes / 1048576 / build_s:.1f} MB/s), "
+              f"unchanged rescan {rescan_s * 1000:.0f} ms")
+        terms = list(indexer.index.postings)
+        for label, pick in (("rare", lambda: rng.choice(terms[-2000:])),
+                            ("common", lambda: rng.choice(terms[:50])),
+                            ("two-term", lambda: f"{rng.choice(terms[:500])} {rng.choice(terms[:500])}")):
+            queries = [pick() for _ in range(50)]
+            it = iter(queries)
+            ms = _per_call(lambda: indexer.index.search(next(it)), len(queries)) / 1000
+            print(f"  {label:<9} query {ms:.2f} ms")
+
+@benchmark
+def bench_listing(*sizes):
+    """Time to first visible entry and to a complete listing, by folder size."""
+    import docindex
+    sizes = [int(s) for s in sizes] or [1_000, 10_000, 100_000, 200_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        docindex.INDEX_DIR = tmp / "index"
+        for n in sizes:
+            folder = tmp / f"f{n}"
+            folder.mkdir()
+            for i in range(n):
+                (folder / f"book_{i:06d}.txt").touch()
+            for label in ("cold", "indexed"):
+                listing = None
+                t0 = time.perf_counter()
+                listing = docindex.FolderListing(folder, folder)
+                while not listing.snapshot()[0] and not listing.done:
+                    time.sleep(0.0005)
+                first = time.perf_counter() - t0
+                listing.thread.join()
+                total = time.perf_counter() - t0
+                labels, _ = listing.snapshot()
+                print(f"{n:>8} files {label:<8} first entry {first * 1000:7.1f} ms, "
+                      f"complete {total * 1000:8.1f} ms ({len(labels)} shown)")
+
+def _sample_book(path: Path, title: str, author: str):
+    """Small but well-formed epub/pdf/mobi/txt carrying title and author."""
+    import zipfile
+    suffix = path.suffix
+    if suffix == ".epub":
+        with zipfile.ZipFile(path, "w") as z:
+            z.writestr("META-INF/container.xml",
+                       '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                       '<rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+            z.writestr("OEBPS/content.opf",
+                       '<package xmlns="http://www.idpf.org/2007/opf" '
+                       'xmlns:dc="http://purl.org/dc/elements/1.1/"><metadata>'
+                       f'<dc:title>{title}</dc:title><dc:creator>{author}</dc:creator>'
+                       '</metadata></package>')
+            z.writestr("OEBPS/ch1.xhtml", "<html><body><p>" + "lorem ipsum " * 2000 + "</p></body></html>")
+    elif suffix == ".pdf":
+        body = b"%PDF-1.4\n" + b"%" + b"x" * 200_000 + b"\n"
+        path.write_bytes(body + f"1 0 obj << /Title ({title}) /Author ({author}) >> endobj\n"
+                                f"trailer << /Info 1 0 R >>\n%%EOF\n".encode())
+    elif suffix == ".mobi":
+        name = title.encode()
+        exth_rec = struct.pack(">II", 100, 8 + len(author)) + author.encode()
+        exth = b"EXTH" + struct.pack(">II", 12 + len(exth_rec), 1) + exth_rec
+        mobi_len = 232
+        rec0 = bytearray(16 + mobi_len) + exth + name
+        rec0[16:20] = b"MOBI"
+        struct.pack_into(">II", rec0, 20, mobi_len, 65001)
+        struct.pack_into(">II", rec0, 84, 16 + mobi_len + len(exth), len(name))
+        struct.pack_into(">I", rec0, 128, 0x40)
+        head = bytearray(78 + 8 + 2)
+        head[:len(name[:31])] = name[:31]
+        struct.pack_into(">I", head, 78, len(head))
+        path.write_bytes(bytes(head) + bytes(rec0))
+    else:
+        path.write_text(f"Title: {title}\nAuthor: {author}\n\n" + "lorem ipsum " * 5000)
+
+@benchmark
+def bench_docmeta(files="2000"):
+    """Title/author extraction: serial vs thread pool, then warm cache."""
+    import docmeta
+    from concurrent.futures import wait
+    n = int(files)
+    kinds = [".epub", ".pdf", ".mobi", ".txt"]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = []
+        for i in range(n):
+            p = tmp / f"book_{i:05d}{kinds[i % len(kinds)]}"
+            _sample_book(p, f"Title {i}", f"Author {i % 97}")
+            paths.append(p)
+        t0 = time.perf_counter()
+        serial = [docmeta.extract(p) for p in paths]
+        serial_s = time.perf_counter() - t0
+        bad = sum(1 for i, m in enumerate(serial) if m.title != f"Title {i}")
+        print(f"serial     {n / serial_s:9.0f} files/s, {bad} wrong titles, "
+              f"{docmeta.WORKERS} workers")
+        for label in ("pool cold", "pool warm"):
+            store = docmeta.MetaStore(tmp / "meta.bin")
+            got = []
+            t0 = time.perf_counter()
+            wait(store.request(paths, got.extend))
+            elapsed = time.perf_counter() - t0
+            store.save()
+            print(f"{label:<10} {n / elapsed:9.0f} files/s ({len(got)} results)")
+
+@benchmark
+def bench_reader(chapters="300", txt_mb="50"):
+    """Built-in reader: open + first page, page turns and re-wrap on resize."""
+    import zipfile
+    import reader
+    rng = random.Random(0)
+    words = ["".join(rng.choice("etaoinshrdlu") for _ in range(rng.randint(2, 9)))
+             for _ in range(5000)]
+    para = lambda: " ".join(rng.choices(words, k=rng.randint(40, 200)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp  = Path(tmp)
+        epub = tmp / "big.epub"
+        with zipfile.ZipFile(epub, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("META-INF/container.xml",
+                       '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                       '<rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+            items = "".join(f'<item id="c{i}" href="c{i}.xhtml"/>' for i in range(int(chapters)))
+            spine = "".join(f'<itemref idref="c{i}"/>' for i in range(int(chapters)))
+            z.writestr("OEBPS/content.opf",
+                       '<package xmlns="http://www.idpf.org/2007/opf" '
+                       'xmlns:dc="http://purl.org/dc/elements/1.1/"><metadata>'
+                       '<dc:title>Bench</dc:title></metadata>'
+                       f'<manifest>{items}</manifest><spine>{spine}</spine></package>')
+            for i in range(int(chapters)):
+                body = "".join(f"<p>{para()}</p>" for _ in range(60))
+                z.writestr(f"OEBPS/c{i}.xhtml", f"<html><body><h1>Chapter {i}</h1>{body}</body></html>")
+        txt = tmp / "big.txt"
+        with open(txt, "w") as f:
+            while f.tell() < int(txt_mb) * 1048576:
+                f.write(para() + "\n\n")
+        for path in (epub, txt):
+            size = path.stat().st_size / 1048576
+            t0 = time.perf_counter()
+            book  = reader.open_book(path)
+            pages = reader.Pages(book)
+            pages.lines(0, 74)
+            first = time.perf_counter() - t0
+            turn  = _per_call(lambda: pages.lines(0, 74)[30:62], 1000)
+            t0 = time.perf_counter()
+            for ch in range(min(book.count, 20)):
+                pages.lines(ch, 74)
+            chapter_ms = (time.perf_counter() - t0) * 1000 / min(book.count, 20)
+            t0 = time.perf_counter()
+            pages.lines(0, 100)
+            rewrap_ms = (time.perf_counter() - t0) * 1000
+            book.close()
+            print(f"{path.suffix:<6} {size:6.1f} MB, {book.count} chapters: open + first page "
+                  f"{first * 1000:.1f} ms, cached page {turn:.1f} us, new chapter "
+                  f"{chapter_ms:.1f} ms, re-wrap {rewrap_ms:.1f} ms")
+
+@benchmark
+def bench_dupes(files="400", mb="2"):
+    """Duplicate scan: cold (hashing) and warm (cached) runs over a synthetic library."""
+    import dupes
+    rng  = random.Random(0)
+    size = int(float(mb) * 1048576)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        blobs = [rng.randbytes(size) for _ in range(8)]
+        for i in range(int(files)):
+            folder = tmp / "lib" / f"shelf{i % 10}"
+            folder.mkdir(parents=True, exist_ok=True)
+            if i % 4 == 0:
+                data = blobs[i % len(blobs)]                 # true duplicate
+            else:
+                data = bytearray(blobs[i % len(blobs)])      # same size, same head
+                data[size // 2:size // 2 + 8] = i.to_bytes(8, "little")
+            (folder / f"book{i:05d}.pdf").write_bytes(data)
+        total = int(files) * size / 1048576
+        for label in ("cold", "warm"):
+            scan = dupes.DupeScan([tmp / "lib"], cache_file=tmp / "dupes.bin")
+            t0 = time.perf_counter()
+            scan.start().thread.join()
+            elapsed = time.perf_counter() - t0
+            print(f"{label:<5} {elapsed:6.2f} s for {total:.0f} MB: {len(scan.groups)} groups, "
+                  f"{scan.bytes_read / 1048576:.0f} MB read at {scan.mb_per_s:.0f} MB/s "
+                  f"({scan.workers} workers)")
+
+@benchmark
+def bench_editor(*sizes):
+    """Journal editor: per-keystroke edit + redraw cost at the top, middle and end."""
+    import curses
+    import editor
+    import replay
+    rng = random.Random(0)
+    for lines in map(int, sizes or ("1000", "100000")):
+        text = "\n".join(" ".join("".join(rng.choice("etaoinshrdlu") for _ in range(6))
+                                   for _ in range(rng.randint(0, 14)))
+                          for _ in range(lines))
+        screen = replay.HeadlessScreen(40, 120, ())
+        with replay._headless(screen, []):
+            curses.doupdate = lambda: None
+            ed = editor.Editor(screen, text, "Bench")
+            ed.render()
+            out = []
+            for where in (0, lines // 2, lines - 1):
+                ed.buf.move_to(where, 3)
+                ed.render()
+                type_us  = _per_call(lambda: (ed.handle(ord("x")), ed.render()), 2000)
+                enter_us = _per_call(lambda: (ed.handle(10), ed.render()), 200)
+                back_us  = _per_call(lambda: (ed.handle(127), ed.render()), 200)
+                out.append(f"line {where + 1:>6}: type {type_us:5.1f} us, "
+                           f"enter {enter_us:5.1f} us, backspace {back_us:5.1f} us")
+        print(f"{lines:>7} lines  " + "\n                ".join(out))
+
+@benchmark
+def bench_wal(edits="200000"):
+    """Write-ahead log: edit cost with and without logging, and recovery time."""
+    import editor
+    import wal
+    base = "\n".join(f"line {i}" for i in range(10000))
+
+    def session(buf, log=None):
+        rng = random.Random(0)
+        t0  = time.perf_counter()
+        for i in range(int(edits)):
+            if i % 500 == 0:
+                buf.move_to(rng.randrange(buf.line_count), 0)
+            if i % 7 == 6:
+                buf.delete_back()
+            else:
+                buf.insert("\n" if i % 60 == 59 else "x")
+            if log and log.wants_checkpoint:
+                log.checkpoint(buf.text())
+        return (time.perf_counter() - t0) * 1e6 / int(edits)
+
+    saved = wal.CHECKPOINT_BYTES
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            bare_us = session(editor.GapBuffer(base))
+            for label, ckpt in (("no checkpoints", 1 << 40), ("checkpointing", saved)):
+                wal.CHECKPOINT_BYTES = ckpt
+                path = Path(tmp) / f"{ckpt}.wal"
+                buf  = editor.GapBuffer(base)
+                log  = wal.WriteAheadLog(path, base)
+                buf.listener = log.record
+                logged_us = session(buf, log)
+                log.close(keep=True)
+                t0 = time.perf_counter()
+                text, _ = wal.recover(path, base)
+                rec_ms = (time.perf_counter() - t0) * 1000
+                assert text == buf.text()
+                print(f"{label:<15} edit {bare_us:.2f} us bare, {logged_us:.2f} us logged | "
+                      f"log {path.stat().st_size / 1024:.0f} KiB, recovery {rec_ms:.0f} ms")
+        finally:
+            wal.CHECKPOINT_BYTES = saved
+
+@benchmark
+def bench_journal(days="3650", per_day="3"):
+    """Journal index: build, warm open, append, date-range and keyword queries."""
+    import journalstore
+    rng = random.Random(0)
+    words = ["".join(rng.choice("etaoinshrdlu") for _ in range(rng.randint(3, 8)))
+             for _ in range(3000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "journal"
+        folder.mkdir()
+        start = datetime.date(2015, 1, 1)
+        for d in range(int(days)):
+            day = (start + datetime.timedelta(days=d)).isoformat()
+            with open(folder / f"{day}.txt", "w") as f:
+                for k in range(int(per_day)):
+                    f.write(f"--- entry {8 + k:02d}:00:00 ---\n"
+                            + " ".join(rng.choices(words, k=rng.randint(50, 300))) + "\n")
+        index = Path(tmp) / "journal.idx"
+        t0 = time.perf_counter()
+        store = journalstore.JournalStore(folder, index)
+        store.refresh()
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store = journalstore.JournalStore(folder, index)
+        store.refresh()
+        warm = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store.append("a new entry " + " ".join(rng.choices(words, k=200)))
+        append = time.perf_counter() - t0
+        mid  = (start + datetime.timedelta(days=int(days) // 2)).isoformat()
+        end  = (start + datetime.timedelta(days=int(days) // 2 + 30)).isoformat()
+        span = _per_call(lambda: store.date_range(mid, end), 2000)
+        word = _per_call(lambda: store.query(words=f"{words[5]} {words[9]}"), 50)
+        print(f"{len(store):,} entries, index {index.stat().st_size / 1048576:.1f} MB: "
+              f"build {build:.2f} s, warm open {warm * 1000:.0f} ms, "
+              f"append {append * 1000:.0f} ms")
+        print(f"month range {span:.1f} us, two-word filter {word / 1000:.2f} ms")
+
+@benchmark
+def bench_undo(paste_kb="20"):
+    """Undo log: bytes per typed step, and undo/redo of a paste as documents grow."""
+    import editor
+    rng   = random.Random(0)
+    paste = "".join(rng.choice("etaoin shrdlu\n") for _ in range(int(paste_kb) * 1024))
+    for lines in (1000, 100000):
+        buf  = editor.GapBuffer("\n".join(f"line {i}" for i in range(lines)))
+        undo = editor.UndoLog()
+        buf.listener = undo.record
+        buf.move_to(lines // 2, 0)
+        for _ in range(2000):
+            buf.insert(rng.choice("abcdefgh  "))
+        steps = len(undo)
+        per_step = undo.size / steps
+        buf.insert(paste)
+        t0 = time.perf_counter()
+        undo.undo(buf)
+        undo_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        undo.redo(buf)
+        redo_ms = (time.perf_counter() - t0) * 1000
+        print(f"{lines:>7} lines: 2000 keys -> {steps} steps, {per_step:.0f} B/step | "
+              f"{paste_kb} KB paste undo {undo_ms:.2f} ms, redo {redo_ms:.2f} ms")
+
+@benchmark
+def bench_paste(kb="20"):
+    """Paste throughput into the journal editor: keystroke by keystroke vs bracketed."""
+    import curses
+    import editor
+    import replay
+    rng  = random.Random(0)
+    text = "".join(rng.choice("etaoin shrdlu\n") for _ in range(int(kb) * 1024))
+    raw  = text.encode()
+    for label, keys in (("keystrokes", list(raw)),
+                        ("bracketed", [27, *b"[200~", *raw, *b"\x1b[201~"])):
+        screen = replay.HeadlessScreen(40, 120, keys)
+        with replay._headless(screen, []):
+            curses.doupdate = lambda: None
+            ed = editor.Editor(screen, "", "Bench")
+            ed.render()
+            t0 = time.perf_counter()
+            try:
+                while True:
+                    ed.handle(screen.getch())
+                    ed.render()
+            except replay.ReplayFinished:
+                pass
+            elapsed = time.perf_counter() - t0
+        assert ed.buf.text() == text
+        print(f"{label:<11} {len(text):,} chars in {elapsed * 1000:7.1f} ms  "
+              f"({len(text) / elapsed:,.0f} chars/s, {len(ed.undo)} undo steps)")
+
+@benchmark
+def bench_backup(users="20", days="365"):
+    """Backup: first snapshot, unchanged rerun, one appended entry, single-user restore."""
+    import backup
+    rng   = random.Random(0)
+    words = ["".join(rng.choice("etaoinshrdlu") for _ in range(rng.randint(3, 8)))
+             for _ in range(2000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "root"
+        for u in range(int(users)):
+            (root / "users" / f"user{u}").mkdir(parents=True)
+            (root / "users" / f"user{u}" / "settings.json").write_text('{"sound": true}')
+            journal = root / "journal_entries" / f"user{u}"
+            journal.mkdir(parents=True)
+            for d in range(int(days)):
+                (journal / f"2024-{d // 28 % 12 + 1:02d}-{d % 28 + 1:02d}.txt").write_text(
+                    "--- entry 09:00:00 ---\n" + " ".join(rng.choices(words, k=200)) + "\n")
+        total = sum(f.stat().st_size for f in root.rglob("*") if f.is_file()) / 1048576
+        for codec in ("zlib", "lzma"):
+            repo = backup.Repository(Path(tmp) / f"repo-{codec}", codec=codec)
+            runs = []
+            for label in ("first", "unchanged", "one entry"):
+                if label == "one entry":
+                    with open(root / "journal_entries" / "user0" / "2024-01-01.txt", "a") as f:
+                        f.write("--- entry 10:00:00 ---\nmore\n")
+                stats = repo.create(root)
+                runs.append(f"{label} {stats['seconds'] * 1000:.0f} ms "
+                            f"({stats['changed']} read, {stats['written'] / 1048576:.1f} MB)")
+            t0 = time.perf_counter()
+            backup.restore_user(repo, "user7", root=Path(tmp) / f"restore-{codec}")
+            restore_ms = (time.perf_counter() - t0) * 1000
+            print(f"{codec:<5} {total:.0f} MB: " + ", ".join(runs) +
+                  f", restore one user {restore_ms:.0f} ms")
+
+# ─── Network ──────────────────────────────────────────────────────────────────
+@benchmark
+def bench_connectivity(calls="10000"):
+    """has_internet cost against a local stub server: first probe, cached, server gone."""
+    import socket
+    import connectivity
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    port = server.getsockname()[1]
+    mon  = connectivity.Connectivity(f"127.0.0.1:{port}")
+    t0 = time.perf_counter()
+    up = mon.online()
+    first_ms = (time.perf_counter() - t0) * 1000
+    cached_us = _per_call(mon.online, int(calls))
+    probes = mon.probes
+    server.close()
+    mon.invalidate()
+    t0 = time.perf_counter()
+    while mon.result and time.perf_counter() - t0 < 5:
+        time.sleep(0.001)
+    notice_ms = (time.perf_counter() - t0) * 1000
+    mon.stop()
+    print(f"first probe {first_ms:.1f} ms (online={up}), cached {cached_us:.2f} us/call "
+          f"over {probes} probe(s), offline noticed in {notice_ms:.1f} ms "
+          f"(online={mon.result})")
+
+@benchmark
+def bench_pkgdb(packages="3000"):
+    """Installed-package listing: parse a synthetic dpkg status, cached revisit, apt list."""
+    import shutil
+    import subprocess
+    import pkgdb
+    with tempfile.TemporaryDirectory() as tmp:
+        status = Path(tmp) / "status"
+        status.write_text("".join(
+            f"Package: pkg{i}\nStatus: install ok installed\nInstalled-Size: {i % 5000}\n"
+            f"Version: 1.{i}-1\nDescription: package {i}\n long description\n\n"
+            for i in range(int(packages))))
+        pkgdb.CACHE_FILE = Path(tmp) / "pkgdb.bin"
+        pkgdb._disk, pkgdb._memory = None, {}
+        parse_ms = _per_call(lambda: pkgdb.read_dpkg(status), 5) / 1000
+        pkgdb.read_cached(pkgdb.read_dpkg, status)
+        cached_ms = _per_call(lambda: pkgdb.read_cached(pkgdb.read_dpkg, status), 50) / 1000
+        pkgdb._disk, pkgdb._memory = None, {}
+        cold_ms = _per_call(lambda: pkgdb.read_cached(pkgdb.read_dpkg, status), 1) / 1000
+    line = (f"{packages} packages: parse {parse_ms:.1f} ms, cached revisit {cached_ms:.2f} ms, "
+            f"cache from disk {cold_ms:.2f} ms")
+    if shutil.which("apt"):
+        t0 = time.perf_counter()
+        subprocess.run(["apt", "list", "--installed"], capture_output=True)
+        line += f"  |  apt list --installed {(time.perf_counter() - t0) * 1000:.0f} ms"
+    print(line)
+
+@benchmark
+def bench_pkgindex(packages="60000"):
+    """Offline package index: build from a synthetic apt list, reload, query latency."""
+    import gzip
+    import pkgindex
+    rng   = random.Random(0)
+    words = ["".join(rng.choice("etaoinshrdlucmfw") for _ in range(rng.randint(3, 9)))
+             for _ in range(5000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        lists = Path(tmp) / "lists"
+        lists.mkdir()
+        with gzip.open(lists / "deb_main_binary-amd64_Packages.gz", "wt") as f:
+            for i in range(int(packages)):
+                name = "-".join(rng.choices(words, k=rng.randint(1, 3))) + str(i % 10)
+                f.write(f"Package: {name}\nVersion: 1.{i}-1\nInstalled-Size: {i % 9000}\n"
+                        f"Description: {' '.join(rng.choices(words, k=8))}\n"
+                        f" {' '.join(rng.choices(words, k=30))}\n\n")
+        sources = {"apt": [str(lists / "*_Packages*")]}
+        index = pkgindex.PackageIndex(Path(tmp) / "pkgindex.bin", sources)
+        t0 = time.perf_counter()
+        index.refresh()
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index = pkgindex.PackageIndex(Path(tmp) / "pkgindex.bin", sources)
+        index.load()
+        load_ms = (time.perf_counter() - t0) * 1000
+        check_ms = _per_call(index.refresh, 20) / 1000
+        queries = [words[0], words[1][:3], f"{words[2]} {words[3]}", rng.choice(words)[:2]]
+        print(f"{len(index):,} packages: build {build_s:.2f} s, "
+              f"load {load_ms:.0f} ms, unchanged check {check_ms:.2f} ms")
+        for q in queries:
+            hits = []
+            ms = _per_call(lambda: hits.append(index.search(q, "apt")), 20) / 1000
+            print(f"  {q!r:<24} {len(hits[-1]):>4} hits  {ms:7.2f} ms")
+
+@benchmark
+def bench_pkgsearch(slow_s="2", results="300"):
+    """Streaming search: first result and total time with one fast and one slow backend."""
+    import os
+    import pkgsearch
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, delay in (("fastpm", 0), ("slowpm", float(slow_s))):
+            script = Path(tmp) / name
+            script.write_text(f"#!/bin/sh\nsleep {delay}\n"
+                              f"i=0; while [ $i -lt {results} ]; do "
+                              f"echo \"$1-$i - package $i\"; i=$((i+1)); done\n")
+            script.chmod(0o755)
+            pkgsearch.COMMANDS[name] = ([str(script)], pkgsearch._parse_apt)
+        saved = pkgsearch.EXTRA_SOURCES, os.environ["PATH"]
+        pkgsearch.EXTRA_SOURCES = ()
+        os.environ["PATH"] = f"{tmp}{os.pathsep}{os.environ['PATH']}"
+        try:
+            for managers in (["fastpm"], ["slowpm"], ["slowpm", "fastpm"]):
+                search = pkgsearch.PackageSearch("demo", managers).start()
+                search.wait()
+                total_ms = (time.perf_counter() - search.started) * 1000
+                print(f"{'+'.join(managers):<14} first result {search.first_ms:7.0f} ms, "
+                      f"all {len(search.snapshot()[0])} in {total_ms:6.0f} ms")
+            search = pkgsearch.PackageSearch("demo", ["slowpm"]).start()
+            time.sleep(0.1)
+            t0 = time.perf_counter()
+            search.cancel()
+            search.wait()
+            print(f"cancel of a running backend took {(time.perf_counter() - t0) * 1000:.1f} ms")
+        finally:
+            pkgsearch.EXTRA_SOURCES, os.environ["PATH"] = saved
+            del pkgsearch.COMMANDS["fastpm"], pkgsearch.COMMANDS["slowpm"]
+
+# ─── Recorded sessions ────────────────────────────────────────────────────────
+@benchmark
+def bench_replay(*paths):
+    """Replay recorded sessions (ROBCOS_RECORD output) and time each frame."""
+    from replay import replay
+    if not paths:
+        print("usage: bench.py replay FILE [FILE ...]")
+        return
+    for path in paths:
+        runs = [replay(path) for _ in range(5)]
+        per_key = sorted(t for r in runs for t in r["per_key"]) or [0.0]
+        digests = {r["digest"] for r in runs}
+        print(f"{Path(path).name}: {runs[0]['keys']} keys, best "
+              f"{min(r['elapsed'] for r in runs) * 1000:.2f} ms, per key "
+              f"p50 {per_key[len(per_key) // 2] * 1e6:.0f} us, "
+              f"max {per_key[-1] * 1e6:.0f} us"
+              + ("" if len(digests) == 1 else "  OUTPUT NOT DETERMINISTIC"))
+
+# ─── Entry point ──────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        for name, fn in BENCHMARKS.items():
+            print(f"  {name:<16} {fn.__doc__}")
+        sys.exit(0)
+    if sys.argv[1] == "all":
+        for name, fn in BENCHMARKS.items():
+            print(f"\n=== {name} ===")
+            fn()
+        sys.exit(0)
+    if sys.argv[1] not in BENCHMARKS:
+        print(f"Unknown benchmark '{sys.argv[1]}'.")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
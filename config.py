@@ -14,6 +14,9 @@ GAMES_FILE    = base_dir / "games.json"
 DOCS_FILE     = base_dir / "documents.json"
 NETWORKS_FILE = base_dir / "networks.json"
 ABOUT_FILE    = base_dir / "about.json"
+WORDS_DIR     = base_dir / "words"          # extra hacking word lists (*.txt)
+CACHE_DIR     = base_dir / ".cache"         # rebuildable indexes, safe to delete
+BACKUP_DIR    = base_dir / "backups"        # backup repository (backup.py)
 
 ALLOWED_EXTENSIONS = {".pdf", ".epub", ".txt", ".mobi", ".azw3"}
 
@@ -93,14 +96,18 @@ _settings     = load_json(SETTINGS_FILE)   # global defaults on startup
 SOUND_ON      = _settings.get("sound",  True)
 BOOTUP_ON     = _settings.get("bootup", True)
 CURRENT_THEME = _settings.get("theme",  "Green (Default)")
+AUTOSAVE_SYNC = _settings.get("autosave_sync", 5)   # fsync interval (s); 0 = always, None = never
+AUTOSAVE_SYNC_CHOICES = [0, 5, 30, None]
+CONNECT_PROBE = _settings.get("connectivity_probe", "www.google.com:443")   # connectivity.py target
 
 def _load_user_settings():
     """Reload globals from the logged-in user's settings file."""
-    global SOUND_ON, BOOTUP_ON, CURRENT_THEME
+    global SOUND_ON, BOOTUP_ON, CURRENT_THEME, AUTOSAVE_SYNC
     s = load_settings()
     SOUND_ON      = s.get("sound",  True)
     BOOTUP_ON     = s.get("bootup", True)
     CURRENT_THEME = s.get("theme",  "Green (Default)")
+    AUTOSAVE_SYNC = s.get("autosave_sync", 5)
     init_colors()   # re-apply theme immediately
 
 def set_sound(val):
@@ -115,8 +122,13 @@ def set_theme(val):
     global CURRENT_THEME
     CURRENT_THEME = val
 
+def set_autosave_sync(val):
+    global AUTOSAVE_SYNC
+    AUTOSAVE_SYNC = val
+
 def save_all_settings():
-    save_settings({"sound": SOUND_ON, "bootup": BOOTUP_ON, "theme": CURRENT_THEME})
+    save_settings({"sound": SOUND_ON, "bootup": BOOTUP_ON, "theme": CURRENT_THEME,
+                   "autosave_sync": AUTOSAVE_SYNC})
 
 # ─── Sound ────────────────────────────────────────────────────────────────────
 try:
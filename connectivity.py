@@ -0,0 +1,171 @@
+"""
+Cached internet connectivity.
+
+A background thread answers "are we online?" so callers never wait on the
+network. It opens a TCP connection to the probe target (config.CONNECT_PROBE,
+"host:port", settable as "connectivity_probe" in settings.json) and keeps
+the answer for ONLINE_TTL seconds, or OFFLINE_TTL while offline.
+
+Between probes it watches the local network state every POLL_S: the
+default route in /proc/net/route and which interfaces psutil reports up.
+A change there (cable pulled, Wi-Fi joined, VPN up) invalidates the cached
+answer at once. With no default route, or no interface up, the machine is
+offline without probing at all (unless the target is a loopback address,
+as with a local stub server in testing).
+"""
+import ipaddress
+import socket
+import threading
+import time
+from pathlib import Path
+import psutil
+import config
+
+ONLINE_TTL   = 60.0
+OFFLINE_TTL  = 10.0
+POLL_S       = 2.0
+PROBE_TIMEOUT = 3.0
+ROUTE_FILE   = Path("/proc/net/route")
+RTF_UP       = 0x1
+
+def parse_target(target: str) -> tuple[str, int]:
+    """("host", port) from "host:port", "host" (443) or "https://host/..."."""
+    target = target.split("://", 1)[-1].split("/", 1)[0]
+    host, sep, port = target.rpartition(":")
+    if sep and port.isdigit() and not host.endswith(":"):
+        return host.strip("[]"), int(port)
+    return target.strip("[]"), 443
+
+# ─── Local state ──────────────────────────────────────────────────────────────
+def default_routes(route_file: Path = ROUTE_FILE) -> tuple | None:
+    """Interfaces holding an up default route; None when the table is unreadable."""
+    try:
+        lines = route_file.read_text().splitlines()[1:]
+    except OSError:
+        return None
+    out = []
+    for line in lines:
+        f = line.split()
+        if len(f) >= 4 and f[1] == "00000000":
+            try:
+                if int(f[3], 16) & RTF_UP:
+                    out.append(f[0])
+            except ValueError:
+                continue
+    return tuple(sorted(out))
+
+def interfaces_up() -> tuple | None:
+    """Non-loopback interfaces that are up; None when psutil cannot tell."""
+    try:
+        stats = psutil.net_if_stats()
+    except (OSError, AttributeError, NotImplementedError):
+        return None
+    return tuple(sorted(n for n, s in stats.items() if s.isup and not n.startswith("lo")))
+
+def local_state(route_file: Path = ROUTE_FILE):
+    return default_routes(route_file), interfaces_up()
+
+def _disconnected(state) -> bool:
+    """True only when the local state proves there is no way out."""
+    routes, ifaces = state
+    return routes == () or ifaces == ()
+
+def _loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+# ─── Monitor ──────────────────────────────────────────────────────────────────
+class Connectivity:
+    """
+    online() returns the cached answer; the first call waits for the first
+    probe, for at most the probe timeout.
+    """
+    def __init__(self, target: str | None = None, route_file: Path = ROUTE_FILE,
+                 timeout: float = PROBE_TIMEOUT):
+        self._target    = target
+        self.route_file = route_file
+        self.timeout    = timeout
+        self.state      = None
+        self.result     = None          # True/False once probed
+        self.checked    = None          # monotonic time of the last answer
+        self.latency    = None          # seconds for the last successful probe
+        self.probes     = 0
+        self.closed     = False
+        self.wake       = threading.Event()
+        self.ready      = threading.Event()
+        self.thread     = None
+        self.lock       = threading.Lock()
+
+    @property
+    def target(self) -> tuple[str, int]:
+        return parse_target(self._target or config.CONNECT_PROBE)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.closed = False
+                self.thread = threading.Thread(target=self._run, daemon=True, name="connectivity")
+                self.thread.start()
+        return self
+
+    def stop(self):
+        self.closed = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def online(self, wait: float | None = None) -> bool:
+        self.start()
+        if not self.ready.is_set():
+            self.ready.wait(self.timeout + 0.5 if wait is None else wait)
+        return bool(self.result)
+
+    def invalidate(self):
+        """Forget the cached answer and probe again now (e.g. after a failed download)."""
+        self.checked = None
+        self.wake.set()
+
+    # ─── Probing ─────────────────────────────────────────────────────────────
+    def probe(self) -> bool:
+        host, port = self.target
+        self.probes += 1
+        t0 = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=self.timeout):
+                pass
+        except OSError:
+            return False
+        self.latency = time.perf_counter() - t0
+        return True
+
+    def _expired(self, now) -> bool:
+        ttl = ONLINE_TTL if self.result else OFFLINE_TTL
+        return self.checked is None or now - self.checked >= ttl
+
+    def _run(self):
+        while not self.closed:
+            state = local_state(self.route_file)
+            if state != self.state:
+                self.state, self.checked = state, None
+            if _disconnected(state) and not _loopback(self.target[0]):
+                self.result, self.checked = False, time.monotonic()
+            elif self._expired(time.monotonic()):
+                self.result, self.checked = self.probe(), time.monotonic()
+            self.ready.set()
+            self.wake.wait(POLL_S)
+            self.wake.clear()
+
+_monitor = Connectivity()
+
+def start():
+    """Begin probing ahead of the first has_internet() call."""
+    _monitor.start()
+
+def has_internet() -> bool:
+    """Cached answer from the shared monitor; starts it on first use."""
+    return _monitor.online()
+
+def invalidate():
+    _monitor.invalidate()
@@ -0,0 +1,441 @@
+"""
+Persistent listing index for document category folders.
+
+Each category root gets one JSON file in .cache/docindex/ mapping every
+folder visited under it (by path relative to the root) to:
+
+    {"mtime": <dir st_mtime_ns>,
+     "dirs":  [name, ...],
+     "files": [[name, suffix, size, mtime_ns, sort_key], ...]}
+
+with both lists already sorted for display. A folder's entry is reused
+while the directory's own mtime is unchanged; creating, deleting or
+renaming an entry updates that mtime, so opening an unchanged folder costs
+one stat instead of a scan.
+
+Folders are read by a FolderListing, which streams os.scandir() entries
+on a background thread using only the type information the DirEntry
+already carries. The menu shows whatever has arrived so far; sizes and
+mtimes for the index are filled in after the last name has been listed.
+Nothing on the UI thread touches the folder, so a hung network mount or
+a spinning-up disk only delays the listing: the last cached listing is
+shown straight away and reconciled once the scan catches up, and a scan
+that makes no progress for SCAN_TIMEOUT is reported as not responding.
+
+apply_changes() takes watcher events: it drops the index entries of the
+folders that changed and patches any listing currently on screen.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from config import CACHE_DIR, ALLOWED_EXTENSIONS
+
+INDEX_DIR = CACHE_DIR / "docindex"
+
+def sort_key_for(stem: str) -> str:
+    name = stem.replace("_", " ").lower()
+    if name.startswith("the "):
+        name = name[4:]
+    return name
+
+def _index_file(root: Path) -> Path:
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return INDEX_DIR / f"{digest}.json"
+
+def _classify(entry):
+    """("d", name) / ("f", name, suffix) for a DirEntry, or None to skip it."""
+    try:
+        if entry.is_dir():
+            return ("d", entry.name)
+        if entry.is_file():
+            suffix = os.path.splitext(entry.name)[1].lower()
+            if suffix in ALLOWED_EXTENSIONS:
+                return ("f", entry.name, suffix)
+    except OSError:
+        pass
+    return None
+
+def scan_folder(folder: Path, mtime_ns: int) -> dict:
+    """Read one folder from disk into an index entry."""
+    dirs, files = [], []
+    with os.scandir(folder) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                elif entry.is_file():
+                    stem, suffix = os.path.splitext(entry.name)
+                    if suffix.lower() in ALLOWED_EXTENSIONS:
+                        st = entry.stat()
+                        files.append([entry.name, suffix.lower(), st.st_size,
+                                      st.st_mtime_ns, sort_key_for(stem)])
+            except OSError:
+                continue
+    dirs.sort(key=str.lower)
+    files.sort(key=lambda f: f[4])
+    return {"mtime": mtime_ns, "dirs": dirs, "files": files}
+
+class FolderIndex:
+    """Cached listings for every folder under one category root."""
+    def __init__(self, root: Path):
+        self.root    = Path(root)
+        self.path    = _index_file(self.root)
+        self.folders = {}
+        self.lock    = threading.Lock()      # folders is shared by listing and watcher threads
+        self._saving = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get("root") == str(self.root):
+                self.folders = data.get("folders", {})
+        except (OSError, ValueError):
+            pass
+
+    def _rel(self, folder: Path) -> str:
+        return os.path.relpath(folder, self.root)
+
+    def entry(self, folder: Path) -> dict:
+        """Current index entry for folder, rescanning only if it changed."""
+        rel     = self._rel(folder)
+        mtime   = os.stat(folder).st_mtime_ns
+        with self.lock:
+            cached = self.folders.get(rel)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached
+        fresh = scan_folder(folder, mtime)
+        self.store(folder, fresh)
+        return fresh
+
+    def cached(self, folder: Path) -> dict | None:
+        """The stored entry for folder without touching the disk."""
+        with self.lock:
+            return self.folders.get(self._rel(folder))
+
+    def store(self, folder: Path, entry: dict):
+        with self.lock:
+            self.folders[self._rel(folder)] = entry
+        self.save()
+
+    def invalidate(self, folder: Path):
+        self.forget(folder)
+
+    def forget(self, folder: Path, subtree: bool = False, save: bool = True) -> bool:
+        """Drop folder's entry (and, with subtree, everything below it); True if any was."""
+        rel = self._rel(folder)
+        with self.lock:
+            if subtree:
+                keys = [k for k in self.folders
+                        if rel == "." or k == rel or k.startswith(rel + os.sep)]
+            else:
+                keys = [rel] if rel in self.folders else []
+            for key in keys:
+                del self.folders[key]
+        if keys and save:
+            self.save()
+        return bool(keys)
+
+    def save(self):
+        with self.lock:
+            folders = dict(self.folders)
+        data = json.dumps({"root": str(self.root), "folders": folders}, separators=(",", ":"))
+        with self._saving:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_text(data)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+_indexes = {}
+
+def for_root(root: Path) -> FolderIndex:
+    root = Path(root)
+    if root not in _indexes:
+        _indexes[root] = FolderIndex(root)
+    return _indexes[root]
+
+# ─── Streaming listings ───────────────────────────────────────────────────────
+LIST_BATCH      = 256       # entries handed to the UI at a time
+SORT_LIVE_LIMIT = 20000     # above this, show arrival order until listing ends
+SCAN_TIMEOUT    = 10.0      # seconds without progress before a scan is reported hung
+PROBE_TIMEOUT   = 0.5
+
+_probes      = {}           # str(path) -> Future of the probe still in flight
+_probes_lock = threading.Lock()
+
+def _probe(path):
+    """The in-flight probe of path, or a new one; at most one thread per path."""
+    key = str(path)
+    with _probes_lock:
+        future = _probes.get(key)
+        if future is not None:
+            return future
+        future = _probes[key] = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(os.path.isdir(path))
+        finally:
+            with _probes_lock:
+                _probes.pop(key, None)
+    threading.Thread(target=run, daemon=True, name="probe-dir").start()
+    return future
+
+def probe_dir(path, timeout: float = PROBE_TIMEOUT) -> bool | None:
+    """
+    os.path.isdir on a worker thread; None when it did not answer in time.
+    A probe stuck on a hung mount is reused rather than joined by another.
+    """
+    try:
+        return _probe(path).result(timeout)
+    except concurrent.futures.TimeoutError:
+        return None
+
+class FolderListing:
+    """
+    One folder being listed in the background. snapshot() returns the labels
+    seen so far and a status line; the list is sorted when it is read, and
+    for very large folders only once the listing (and metadata) is complete.
+
+    With a docmeta store, files are relabelled "Title - Author" and sorted
+    by title as their metadata arrives from the store's worker pool.
+    """
+    def __init__(self, root: Path, folder: Path, meta=None):
+        self.index   = for_root(root)
+        self.folder  = Path(folder)
+        self.meta    = meta
+        self.entries = {}         # name -> (0 dir / 1 file, sort key, label, name)
+        self.paths   = {}         # label -> Path
+        self.done    = False
+        self.error   = None
+        self.lock    = threading.Lock()
+        self.meta_pending = 0     # metadata chunks still on the pool
+        self.stale     = False    # showing the cached listing until the scan ends
+        self.cancelled = False
+        self.progress  = time.monotonic()
+        self._futures  = []
+        self._dirty  = False
+        self._sorted = False      # entries arrive in display order (from the index)
+        self._labels = []
+        self.thread  = threading.Thread(target=self._run, daemon=True,
+                                        name="folder-listing")
+        self.thread.start()
+        _live.add(self)
+
+    @staticmethod
+    def _row(kind, name):
+        if kind == "d":
+            return (0, name.lower(), name + "/", name)
+        stem = os.path.splitext(name)[0]
+        return (1, sort_key_for(stem), stem.replace("_", " "), name)
+
+    def _put(self, row) -> bool:
+        """Insert row under the lock, keeping labels unique."""
+        label = row[2]
+        if label in self.paths:
+            label = f"{label} [{os.path.splitext(row[3])[1][1:] or row[3]}]"
+            if label in self.paths:
+                return False
+            row = row[:2] + (label,) + row[3:]
+        self.paths[label] = self.folder / row[3]
+        self.entries[row[3]] = row
+        return True
+
+    def _add(self, batch):
+        rows  = [self._row(kind, name) for kind, name in batch]
+        files = []
+        with self.lock:
+            for row in rows:
+                if row[3] not in self.entries and self._put(row) and row[0] == 1:
+                    files.append(self.folder / row[3])
+            self._dirty = True
+            self.progress = time.monotonic()
+        if self.meta is not None and files:
+            futures = self.meta.request(files, self._retitle)
+            with self.lock:
+                self.meta_pending += len(futures)
+                self._futures = [f for f in self._futures if not f.done()] + futures
+            for fut in futures:
+                fut.add_done_callback(self._meta_done)
+
+    def cancel(self):
+        """Stop scanning and drop queued metadata work (the user left)."""
+        self.cancelled = True
+        with self.lock:
+            futures, self._futures = self._futures, []
+        for fut in futures:
+            fut.cancel()
+
+    @property
+    def hung(self) -> bool:
+        return not self.done and time.monotonic() - self.progress > SCAN_TIMEOUT
+
+    def _retitle(self, results):
+        with self.lock:
+            for path, meta in results:
+                old = self.entries.get(path.name)
+                if old is None or not meta.title:
+                    continue
+                label = f"{meta.title} - {meta.author}" if meta.author else meta.title
+                if label == old[2]:
+                    continue
+                del self.paths[old[2]]
+                if not self._put((1, f"{sort_key_for(meta.title)}\0{meta.author.lower()}",
+                                  label, old[3])):
+                    self._put(old)
+            self._dirty, self._sorted = True, False
+
+    def _meta_done(self, _):
+        with self.lock:
+            self.meta_pending -= 1
+            idle = self.meta_pending == 0
+            self._dirty = True
+        if idle:
+            self.meta.save()
+
+    def _run(self):
+        try:
+            # The cached listing goes up before the folder is touched at all.
+            cached = self.index.cached(self.folder)
+            if cached is not None:
+                self._sorted = self.meta is None
+                self.stale   = True
+                for kind, rows in (("d", cached["dirs"]), ("f", cached["files"])):
+                    for i in range(0, len(rows), LIST_BATCH):
+                        self._add([(kind, r if kind == "d" else r[0])
+                                   for r in rows[i:i + LIST_BATCH]])
+            mtime = os.stat(self.folder).st_mtime_ns
+            self.progress = time.monotonic()
+            if cached is not None and cached["mtime"] == mtime:
+                self.stale = False
+                return
+            dirs, files, batch, seen = [], [], [], set()
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if self.cancelled:
+                        return
+                    info = _classify(entry)
+                    if info is None:
+                        continue
+                    (dirs if info[0] == "d" else files).append(info)
+                    batch.append(info[:2])
+                    seen.add(info[1])
+                    if len(batch) >= LIST_BATCH:
+                        self._add(batch)
+                        batch = []
+            self._add(batch)
+            if cached is not None:
+                with self.lock:
+                    for name in [n for n in self.entries if n not in seen]:
+                        del self.paths[self.entries.pop(name)[2]]
+                    self._sorted = False
+            self.stale = False
+            self._store(mtime, dirs, files)
+        except OSError as e:
+            self.error = e.strerror or str(e)
+        finally:
+            with self.lock:
+                self.done, self._dirty = True, True
+
+    def apply(self, change):
+        """Add or remove one entry reported by the watcher."""
+        name = change.path.name
+        if change.is_dir:
+            kind = "d"
+        elif os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS:
+            kind = "f"
+        else:
+            return
+        if change.kind == "created":
+            with self.lock:
+                self._sorted = False
+            self._add([(kind, name)])
+        elif change.kind == "deleted":
+            with self.lock:
+                row = self.entries.pop(name, None)
+                if row is not None:
+                    del self.paths[row[2]]
+                    self._dirty = True
+
+    def _store(self, mtime, dirs, files):
+        rows = []
+        for _, name, suffix in files:
+            try:
+                st = os.stat(self.folder / name)
+            except OSError:
+                continue
+            rows.append([name, suffix, st.st_size, st.st_mtime_ns,
+                         sort_key_for(os.path.splitext(name)[0])])
+        rows.sort(key=lambda f: f[4])
+        self.index.store(self.folder, {"mtime": mtime,
+                                       "dirs": sorted((d[1] for d in dirs), key=str.lower),
+                                       "files": rows})
+
+    def snapshot(self):
+        with self.lock:
+            settled = (self.done or self.hung) and self.meta_pending <= 0
+            if self._dirty and not self._sorted and (
+                    settled or len(self.entries) <= SORT_LIVE_LIMIT):
+                self._labels = [e[2] for e in sorted(self.entries.values())]
+                self._sorted = settled
+                self._dirty  = False
+            elif self._dirty:
+                self._labels = [e[2] for e in self.entries.values()]
+                self._dirty  = False
+            labels, count, done = self._labels, len(self.entries), self.done
+            pending = self.meta_pending
+        if self.error:
+            status = f"Error: {self.error}"
+        elif self.hung:
+            status = (f"Not responding - showing {'cached' if self.stale else 'partial'} "
+                      f"listing ({count:,} entries)")
+        elif self.stale:
+            status = f"Cached listing ({count:,} entries)  |  refreshing..."
+        elif not done:
+            status = f"Scanning... {count:,} entries"
+        elif not count:
+            status = "No documents or subfolders found."
+        elif pending > 0:
+            status = f"{count:,} entries  |  reading titles..."
+        else:
+            status = f"{count:,} entries"
+        return labels, status
+
+_live = weakref.WeakSet()
+
+def listing_for(root: Path, folder: Path, meta=None) -> FolderListing:
+    """
+    A listing of folder, reusing one whose scan is still running (say, stuck
+    on a hung mount) rather than piling up more blocked threads.
+    """
+    folder = Path(folder)
+    for listing in list(_live):
+        if listing.folder == folder and listing.thread.is_alive():
+            listing.cancelled = False
+            return listing
+    return FolderListing(root, folder, meta)
+
+def apply_changes(changes):
+    """Forget index entries for changed folders and patch open listings."""
+    touched = {}                  # folder -> also drop everything below it
+    for ch in changes:
+        if ch.kind == "rescan" or ch.is_dir:
+            touched[ch.path] = True
+        if ch.kind != "rescan":
+            touched.setdefault(ch.path.parent, False)
+    for index in list(_indexes.values()):
+        dropped = False
+        for folder, subtree in touched.items():
+            if folder == index.root or index.root in folder.parents:
+                dropped |= index.forget(folder, subtree, save=False)
+        if dropped:
+            index.save()
+    for listing in list(_live):
+        for ch in changes:
+            if ch.path.parent == listing.folder and ch.kind in ("created", "deleted"):
+                listing.apply(ch)
@@ -0,0 +1,203 @@
+"""
+Title and author metadata for documents.
+
+    .epub        dc:title / dc:creator from the OPF package file
+    .pdf         /Title and /Author from the document info dictionary
+    .mobi .azw3  EXTH records 503 (title) and 100 (author), else the full name
+    .txt         "Title:" / "Author:" lines near the top (Project Gutenberg style)
+
+Extraction runs on a small thread pool; results are cached by path and
+invalidated when the file's mtime or size changes. The cache is kept in
+.cache/docmeta.bin.
+"""
+import marshal
+import os
+import re
+import struct
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from config import CACHE_DIR
+
+CACHE_FILE    = CACHE_DIR / "docmeta.bin"
+CACHE_VERSION = 1
+WORKERS       = min(8, (os.cpu_count() or 2) * 2)
+CHUNK         = 64          # files per pool task
+HEAD_BYTES    = 64 * 1024
+
+Meta = namedtuple("Meta", "title author")
+NO_META = Meta("", "")
+
+# ─── Extractors ───────────────────────────────────────────────────────────────
+_DC  = "{http://purl.org/dc/elements/1.1/}"
+_OCF = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+
+def _clean(text) -> str:
+    return " ".join(str(text or "").split())[:200]
+
+def epub_meta(path) -> Meta:
+    with zipfile.ZipFile(path) as z:
+        container = ET.fromstring(z.read("META-INF/container.xml"))
+        rootfile  = container.find(f".//{_OCF}rootfile")
+        opf = ET.fromstring(z.read(rootfile.get("full-path")))
+    title  = opf.find(f".//{_DC}title")
+    author = opf.find(f".//{_DC}creator")
+    return Meta(_clean(title.text if title is not None else ""),
+                _clean(author.text if author is not None else ""))
+
+_PDF_FIELD = re.compile(rb"/(Title|Author)\s*(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)")
+_PDF_ESC   = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3})")
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+def _pdf_string(token: bytes) -> str:
+    if token[:1] == b"<":
+        raw = bytes.fromhex(re.sub(rb"\s", b"", token[1:-1]).decode("ascii"))
+    else:
+        raw = _PDF_ESC.sub(lambda m: _PDF_ESCAPES.get(m.group(1))
+                           or (bytes([int(m.group(1), 8) & 0xFF]) if m.group(1).isdigit()
+                               else m.group(1)), token[1:-1])
+    if raw[:2] == b"\xfe\xff":
+        return raw[2:].decode("utf-16-be", "ignore")
+    return raw.decode("latin-1")
+
+def pdf_meta(path) -> Meta:
+    # The info dictionary is usually in the trailer at the end of the file,
+    # or near the start in linearised files; neither needs a full parse.
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+        f.seek(0, os.SEEK_END)
+        f.seek(max(len(head), f.tell() - HEAD_BYTES))
+        data = head + f.read()
+    found = {}
+    for key, token in _PDF_FIELD.findall(data):
+        found.setdefault(key, _pdf_string(token))
+    return Meta(_clean(found.get(b"Title")), _clean(found.get(b"Author")))
+
+def mobi_meta(path) -> Meta:
+    with open(path, "rb") as f:
+        data = f.read(HEAD_BYTES)
+    (rec0,) = struct.unpack_from(">I", data, 78)
+    if data[rec0 + 16:rec0 + 20] != b"MOBI":
+        return Meta(_clean(data[:32].split(b"\0")[0].decode("latin-1")), "")
+    header_len, encoding = struct.unpack_from(">II", data, rec0 + 20)
+    codec = "utf-8" if encoding == 65001 else "cp1252"
+    name_off, name_len = struct.unpack_from(">II", data, rec0 + 84)
+    title  = data[rec0 + name_off:rec0 + name_off + name_len].decode(codec, "ignore")
+    author = ""
+    (flags,) = struct.unpack_from(">I", data, rec0 + 128)
+    exth = rec0 + 16 + header_len
+    if flags & 0x40 and data[exth:exth + 4] == b"EXTH":
+        (count,) = struct.unpack_from(">I", data, exth + 8)
+        off = exth + 12
+        for _ in range(count):
+            kind, length = struct.unpack_from(">II", data, off)
+            value = data[off + 8:off + length].decode(codec, "ignore")
+            if kind == 100 and not author:
+                author = value
+            elif kind == 503:
+                title = value
+            off += length
+    return Meta(_clean(title), _clean(author))
+
+_TXT_FIELD = re.compile(r"^\s*(Title|Author)\s*:\s*(.+)$", re.M | re.I)
+
+def txt_meta(path) -> Meta:
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        head = f.read(4096)
+    found = {}
+    for key, value in _TXT_FIELD.findall(head):
+        found.setdefault(key.lower(), value)
+    return Meta(_clean(found.get("title")), _clean(found.get("author")))
+
+EXTRACTORS = {
+    ".epub": epub_meta,
+    ".pdf":  pdf_meta,
+    ".mobi": mobi_meta,
+    ".azw3": mobi_meta,
+    ".txt":  txt_meta,
+}
+
+def extract(path) -> Meta:
+    """Metadata straight from the file; NO_META when it has none or is unreadable."""
+    fn = EXTRACTORS.get(Path(path).suffix.lower())
+    if fn is None:
+        return NO_META
+    try:
+        return fn(path)
+    except (OSError, ValueError, KeyError, AttributeError, IndexError,
+            struct.error, zipfile.BadZipFile, ET.ParseError):
+        return NO_META
+
+# ─── Cache and worker pool ────────────────────────────────────────────────────
+class MetaStore:
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self.entries = {}         # path -> (mtime_ns, size, title, author)
+        self.lock    = threading.Lock()
+        self.dirty   = 0
+        self._pool   = None
+        try:
+            with open(self.cache_file, "rb") as f:
+                version, entries = marshal.load(f)
+            if version == CACHE_VERSION:
+                self.entries = entries
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+    def get(self, path) -> Meta:
+        """Cached or freshly extracted metadata for one file (blocking)."""
+        key = str(path)
+        st  = os.stat(key)
+        with self.lock:
+            hit = self.entries.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return Meta(hit[2], hit[3])
+        meta = extract(key)
+        with self.lock:
+            self.entries[key] = (st.st_mtime_ns, st.st_size, meta.title, meta.author)
+            self.dirty += 1
+        return meta
+
+    def _chunk(self, paths, callback):
+        out = []
+        for p in paths:
+            try:
+                out.append((p, self.get(p)))
+            except OSError:
+                continue
+        callback(out)
+
+    def request(self, paths, callback):
+        """
+        Look up paths on the pool; callback(list of (path, Meta)) is called
+        from worker threads, one chunk at a time, as results come in.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(WORKERS, thread_name_prefix="docmeta")
+        paths = list(paths)
+        return [self._pool.submit(self._chunk, paths[i:i + CHUNK], callback)
+                for i in range(0, len(paths), CHUNK)]
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data, self.dirty = marshal.dumps((CACHE_VERSION, self.entries)), 0
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+_store = None
+
+def get_store() -> MetaStore:
+    global _store
+    if _store is None:
+        _store = MetaStore()
+    return _store
@@ -1,235 +1,123 @@
-import curses
+import time
 from datetime import date
 from pathlib import Path
-from config import (COLOR_NORMAL, COLOR_DIM, ALLOWED_EXTENSIONS,
-                    load_categories, init_colors)
-from status import draw_header, draw_separator, draw_menu_title, draw_status
-from ui import run_menu, curses_input, curses_confirm, curses_message, curses_pager, _halfdelay
-from launcher import launch_epy
-
-# ─── Document scanning ────────────────────────────────────────────────────────
-def scan_documents(folder: Path):
-    return [f for f in folder.iterdir()
-            if f.is_file() and f.suffix.lower() in ALLOWED_EXTENSIONS]
-
-def scan_subfolders(folder: Path):
-    return sorted([f for f in folder.iterdir() if f.is_dir()], key=lambda d: d.name.lower())
-
-def sort_key(f):
-    name = f.stem.replace("_", " ").lower()
-    if name.startswith("the "):
-        name = name[4:]
-    return name
+from config import load_categories
+from ui import (run_menu, run_lazy_menu, curses_input, curses_confirm, curses_message,
+                curses_pager)
+from launcher import open_document
+from editor import Editor
+from docindex import listing_for, probe_dir
+import docindex
+import docmeta
+import dupes
+import fulltext
+import journalstore
+import wal
+import watcher
 
 # ─── Journal editor ───────────────────────────────────────────────────────────
 def journal_new(stdscr):
     from config import get_current_user
     current_date = date.today()
-    base_journal = Path("journal_entries")
-    user         = get_current_user()
-    journal_dir  = base_journal / user if user else base_journal
-    journal_dir.mkdir(parents=True, exist_ok=True)
-    lines      = [""]
-    cursor_row = 0
-    cursor_col = 0
-    curses.curs_set(1)
-    curses.cbreak()   # blocking getch for responsive typing (no halfdelay)
-
-    while True:
-        stdscr.erase()
-        h, w = stdscr.getmaxyx()
-        draw_header(stdscr)
-        draw_separator(stdscr, 4, w)
-        draw_menu_title(stdscr, f"New Entry - {current_date}", 5)
-        draw_separator(stdscr, 6, w)
-        for i, line in enumerate(lines):
-            try:
-                stdscr.addstr(8 + i, 2, line[:w - 4], curses.color_pair(COLOR_NORMAL))
-            except curses.error:
-                pass
-        try:
-            stdscr.addstr(h - 2, 2, "CTRL+W = save  |  CTRL+X = cancel",
-                          curses.color_pair(COLOR_DIM))
-        except curses.error:
-            pass
-        draw_status(stdscr)
-        try:
-            stdscr.move(8 + cursor_row, 2 + cursor_col)
-        except curses.error:
-            pass
-        stdscr.noutrefresh()
-        curses.doupdate()
+    store = journalstore.store_for(get_current_user())
+    store.folder.mkdir(parents=True, exist_ok=True)
 
-        key = stdscr.getch()
+    def save(text):
+        if text.strip():
+            store.append(text.strip(), current_date.isoformat())
 
-        if key == curses.KEY_RESIZE:
-            init_colors()
-            stdscr.clear()
-            continue
-        elif key == 23:  # Ctrl+W save
-            text = "\n".join(lines).strip()
-            if text:
-                file_name = journal_dir / f"{current_date}.txt"
-                with open(file_name, "a") as f:
-                    f.write(text + "\n")
-                curses.curs_set(0)
-                _halfdelay()
-                curses_message(stdscr, "Entry saved.")
-            else:
-                curses.curs_set(0)
-                _halfdelay()
-            return
-        elif key == 24:  # Ctrl+X cancel
-            curses.curs_set(0)
-            _halfdelay()
-            return
-        elif key in (curses.KEY_ENTER, 10, 13):
-            current = lines[cursor_row]
-            lines[cursor_row] = current[:cursor_col]
-            lines.insert(cursor_row + 1, current[cursor_col:])
-            cursor_row += 1
-            cursor_col = 0
-        elif key in (curses.KEY_BACKSPACE, 127):
-            if cursor_col > 0:
-                lines[cursor_row] = (lines[cursor_row][:cursor_col - 1]
-                                     + lines[cursor_row][cursor_col:])
-                cursor_col -= 1
-            elif cursor_row > 0:
-                prev_len = len(lines[cursor_row - 1])
-                lines[cursor_row - 1] += lines[cursor_row]
-                lines.pop(cursor_row)
-                cursor_row -= 1
-                cursor_col = prev_len
-        elif key == curses.KEY_UP and cursor_row > 0:
-            cursor_row -= 1
-            cursor_col = min(cursor_col, len(lines[cursor_row]))
-        elif key == curses.KEY_DOWN and cursor_row < len(lines) - 1:
-            cursor_row += 1
-            cursor_col = min(cursor_col, len(lines[cursor_row]))
-        elif key == curses.KEY_LEFT and cursor_col > 0:
-            cursor_col -= 1
-        elif key == curses.KEY_RIGHT and cursor_col < len(lines[cursor_row]):
-            cursor_col += 1
-        elif 32 <= key <= 126:
-            lines[cursor_row] = (lines[cursor_row][:cursor_col]
-                                 + chr(key)
-                                 + lines[cursor_row][cursor_col:])
-            cursor_col += 1
+    text = Editor(stdscr, "", f"New Entry - {current_date}",
+                  log_path=wal.session_path(store.folder, "new"),
+                  orphans=wal.orphans(store.folder, "new")).run(on_save=save)
+    if text and text.strip():
+        curses_message(stdscr, "Entry saved.")
 
 # ─── Journal view / delete ────────────────────────────────────────────────────
-def journal_edit(stdscr, path):
-    lines      = path.read_text().splitlines() or [""]
-    cursor_row = 0
-    cursor_col = 0
-    curses.curs_set(1)
-    curses.cbreak()
-
-    while True:
-        stdscr.erase()
-        h, w = stdscr.getmaxyx()
-        draw_header(stdscr)
-        draw_separator(stdscr, 4, w)
-        draw_menu_title(stdscr, f"Editing - {path.stem}", 5)
-        draw_separator(stdscr, 6, w)
-        for i, line in enumerate(lines):
-            try:
-                stdscr.addstr(8 + i, 2, line[:w - 4], curses.color_pair(COLOR_NORMAL))
-            except curses.error:
-                pass
-        try:
-            stdscr.addstr(h - 2, 2, "CTRL+W = save  |  CTRL+X = cancel",
-                          curses.color_pair(COLOR_DIM))
-        except curses.error:
-            pass
-        draw_status(stdscr)
-        try:
-            stdscr.move(8 + cursor_row, 2 + cursor_col)
-        except curses.error:
-            pass
-        stdscr.noutrefresh()
-        curses.doupdate()
+def journal_edit(stdscr, store, n):
+    day  = store.dates[n]
+    text = store.read(n)
+    # Keyed by the entry's original text, not its position in the day, which
+    # shifts when an earlier entry is deleted or restored.
+    editor = Editor(stdscr, text, f"Editing - {day}",
+                    log_path=wal.log_path(store.folder, f"{day}.{wal.digest(text)[:8].hex()}.edit"))
+    try:
+        saved = editor.run(on_save=lambda text: store.replace(n, text))
+    except journalstore.JournalChanged:
+        curses_message(stdscr, "Error: Log changed on disk. Your edit is kept for recovery.")
+        return
+    if saved is not None:
+        curses_message(stdscr, "Entry saved.")
 
-        key = stdscr.getch()
-
-        if key == curses.KEY_RESIZE:
-            init_colors()
-            stdscr.clear()
-        elif key == 23:  # Ctrl+W save
-            path.write_text("\n".join(lines) + "\n")
-            curses.curs_set(0)
-            _halfdelay()
-            curses_message(stdscr, "Entry saved.")
-            return
-        elif key == 24:  # Ctrl+X cancel
-            curses.curs_set(0)
-            _halfdelay()
-            return
-        elif key in (curses.KEY_ENTER, 10, 13):
-            current = lines[cursor_row]
-            lines[cursor_row] = current[:cursor_col]
-            lines.insert(cursor_row + 1, current[cursor_col:])
-            cursor_row += 1
-            cursor_col = 0
-        elif key in (curses.KEY_BACKSPACE, 127):
-            if cursor_col > 0:
-                lines[cursor_row] = (lines[cursor_row][:cursor_col - 1]
-                                     + lines[cursor_row][cursor_col:])
-                cursor_col -= 1
-            elif cursor_row > 0:
-                prev_len = len(lines[cursor_row - 1])
-                lines[cursor_row - 1] += lines[cursor_row]
-                lines.pop(cursor_row)
-                cursor_row -= 1
-                cursor_col = prev_len
-        elif key == curses.KEY_UP and cursor_row > 0:
-            cursor_row -= 1
-            cursor_col = min(cursor_col, len(lines[cursor_row]))
-        elif key == curses.KEY_DOWN and cursor_row < len(lines) - 1:
-            cursor_row += 1
-            cursor_col = min(cursor_col, len(lines[cursor_row]))
-        elif key == curses.KEY_LEFT and cursor_col > 0:
-            cursor_col -= 1
-        elif key == curses.KEY_RIGHT and cursor_col < len(lines[cursor_row]):
-            cursor_col += 1
-        elif 32 <= key <= 126:
-            lines[cursor_row] = (lines[cursor_row][:cursor_col]
-                                 + chr(key)
-                                 + lines[cursor_row][cursor_col:])
-            cursor_col += 1
+def _ask_date(stdscr, prompt):
+    raw = curses_input(stdscr, prompt)
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw.strip()).isoformat()
+    except ValueError:
+        curses_message(stdscr, "Error: Use YYYY-MM-DD.")
+        return None
 
 def journal_view(stdscr):
     from config import get_current_user
-    user = get_current_user()
-    base = Path("journal_entries")
-    directory_path = base / user if user else base
-    if not directory_path.exists():
+    store = journalstore.store_for(get_current_user())
+    if not store.folder.exists():
         curses_message(stdscr, "Error: journal_entries folder not found.")
         return
-    logs = [f for f in directory_path.iterdir() if f.is_file()]
-    if not logs:
+    store.refresh()
+    if not len(store):
         curses_message(stdscr, "Error: Log folder empty.")
         return
-    file_map = {f.stem: f for f in logs}
-    options  = sorted(file_map.keys(), reverse=True) + ["Back"]
-    while True:
-        result = run_menu(stdscr, "View Logs", options)
-        if result == "Back":
-            return
-        if result in file_map:
+    changes = watcher.ChangeFlag([store.folder])
+    watcher.get_watcher().watch(store.folder)
+    view = journalstore.JournalView(store, ["Filter by Keyword", "Filter by Date",
+                                            "Clear Filters"], changes)
+    try:
+        while True:
+            result = run_lazy_menu(stdscr, "View Logs", view)
+            if result in ("Back", "__SESSION_READY__", None):
+                return
+            if result == "Filter by Keyword":
+                view.words = curses_input(stdscr, "Entries containing:") or ""
+                view.stale = True
+                continue
+            if result == "Filter by Date":
+                view.start = _ask_date(stdscr, "From (YYYY-MM-DD, blank = any):")
+                view.end   = _ask_date(stdscr, "To (YYYY-MM-DD, blank = any):")
+                view.stale = True
+                continue
+            if result == "Clear Filters":
+                view.start = view.end = None
+                view.words = ""
+                view.stale = True
+                continue
+            n = view.entry(result)
+            if n is None:
+                continue
+            title = result.split("  ")[0]
             while True:
-                action = run_menu(stdscr, result,
-                                  ["View", "Edit", "Delete", "---", "Back"])
+                action = run_menu(stdscr, title, ["View", "Edit", "Delete", "---", "Back"])
                 if action == "Back":
                     break
-                elif action == "View":
-                    curses_pager(stdscr, file_map[result].read_text(), title=result)
-                elif action == "Edit":
-                    journal_edit(stdscr, file_map[result])
-                elif action == "Delete":
-                    if curses_confirm(stdscr, f"Delete '{result}'?"):
-                        file_map[result].unlink()
-                        curses_message(stdscr, f"Deleted {result}.")
+                try:
+                    if action == "View":
+                        curses_pager(stdscr, store.read(n), title=title)
+                    elif action == "Edit":
+                        journal_edit(stdscr, store, n)
                         break
+                    elif action == "Delete":
+                        if curses_confirm(stdscr, f"Delete entry '{title}'?"):
+                            store.delete(n)
+                            curses_message(stdscr, f"Deleted {title}.")
+                            break
+                except (OSError, journalstore.JournalChanged):
+                    store.refresh()
+                    curses_message(stdscr, "Error: Log changed on disk.")
+                    break
+            store.refresh()
+            view.stale = True
+    finally:
+        changes.close()
 
 # ─── Logs menu ────────────────────────────────────────────────────────────────────────────────
 def logs_menu(stdscr):
@@ -243,44 +131,180 @@ def logs_menu(stdscr):
         elif result == "View Logs":
             journal_view(stdscr)
 
-# ─── Documents menu ───────────────────────────────────────────────────────────
-def _browse_folder(stdscr, folder: Path, title: str):
-    """Recursively browse a folder, showing subfolders and documents."""
+# ─── Search ───────────────────────────────────────────────────────────────────
+def _search_roots():
+    from config import get_current_user
+    user    = get_current_user()
+    journal = Path("journal_entries") / user if user else Path("journal_entries")
+    return [Path(p).expanduser() for p in load_categories().values()] + [journal.resolve()]
+
+def search_menu(stdscr):
+    from config import get_current_user
+    indexer = fulltext.indexer_for(get_current_user())
+    indexer.start(_search_roots())
+    journal_root = str(Path("journal_entries").resolve())
     while True:
-        subfolders = scan_subfolders(folder)
-        files      = sorted(scan_documents(folder), key=sort_key)
+        query = curses_input(stdscr, "Search documents and logs:")
+        if not query:
+            return
+        t0    = time.perf_counter()
+        hits  = indexer.index.search(query)
+        ms    = (time.perf_counter() - t0) * 1000
+        stats = indexer.index.stats()
+        status = (f"{len(hits)} hits in {ms:.1f} ms  |  {stats['docs']} docs, "
+                  f"{stats['postings_bytes'] / 1048576:.1f} MB index")
+        if indexer.running:
+            status += f"  |  indexing... {indexer.done} files checked"
+        if not hits:
+            curses_message(stdscr, f"No matches.  {status}")
+            continue
+        hit_map = {}
+        for _, path in hits:
+            p = Path(path)
+            label = f"{p.stem.replace('_', ' ')}  [{p.parent.name}]"
+            while label in hit_map:
+                label += " "
+            hit_map[label] = p
+        while True:
+            sel = run_menu(stdscr, f"Search: {query}", list(hit_map) + ["---", "Back"],
+                           subtitle=status)
+            if sel in (None, "Back"):
+                break
+            path = hit_map.get(sel)
+            if path is None:
+                continue
+            if str(path).startswith(journal_root):
+                curses_pager(stdscr, path.read_text(errors="ignore"), title=path.stem)
+            else:
+                open_document(stdscr, path)
 
-        if not subfolders and not files:
-            curses_message(stdscr, "No documents or subfolders found.")
+# ─── Duplicates ───────────────────────────────────────────────────────────────
+def duplicates_menu(stdscr):
+    """Duplicate documents across the category folders; the scan keeps running after Back."""
+    from config import get_current_user
+    roots = [Path(p).expanduser() for p in load_categories().values()]
+    scan  = dupes.scan_for(get_current_user(), roots)
+    while True:
+        sel = run_lazy_menu(stdscr, "Duplicates", scan, subtitle="Identical documents",
+                            tail=("---", "Rescan", "Back"))
+        if sel in (None, "Back"):
             return
+        if sel == "Rescan":
+            if scan.running:
+                curses_message(stdscr, "A scan is already running.")
+            else:
+                scan = dupes.scan_for(get_current_user(), roots, fresh=True)
+            continue
+        paths = scan.group(sel)
+        if not paths:
+            continue
+        while paths:
+            pick = run_menu(stdscr, sel.strip(), paths + ["---", "Back"])
+            if pick in (None, "Back"):
+                break
+            action = run_menu(stdscr, Path(pick).name, ["Open", "Delete", "---", "Back"])
+            if action == "Open":
+                open_document(stdscr, Path(pick))
+            elif action == "Delete" and curses_confirm(stdscr, f"Delete '{Path(pick).name}'?"):
+                try:
+                    Path(pick).unlink()
+                    curses_message(stdscr, "Deleted.")
+                except OSError as e:
+                    curses_message(stdscr, f"Error: {e.strerror}")
+                    continue
+                sel   = scan.forget(pick)
+                paths = scan.group(sel) if sel else None
+
+# ─── Live updates ─────────────────────────────────────────────────────────────
+_watching = {"roots": [], "sid": None}
+
+def _watch_roots():
+    """
+    Watch the category roots and the journal, feeding changes to the listing
+    index and the search index. Called again whenever the categories may
+    have changed; roots that were dropped stop being watched.
+    """
+    from config import get_current_user
+    w       = watcher.get_watcher()
+    roots   = _search_roots()
+    indexer = fulltext.indexer_for(get_current_user())
+    for old in _watching["roots"]:
+        if old not in roots:
+            w.unwatch(old)
+    for root in roots:
+        w.watch(root, recursive=True)
+    if _watching["sid"] is not None:
+        w.unsubscribe(_watching["sid"])
 
-        # Build menu: subfolders first (with trailing /), then files
-        folder_entries = {f.name + "/": f for f in subfolders}
-        file_map       = {f.stem.replace("_", " "): f for f in files}
-        choices        = list(folder_entries.keys()) + list(file_map.keys()) + ["---", "Back"]
-        subtitle       = str(folder)
+    def on_change(changes):
+        docindex.apply_changes(changes)
+        indexer.apply(changes)
+    _watching.update(roots=roots, sid=w.subscribe(roots, on_change))
 
-        sel = run_menu(stdscr, title, choices, subtitle=subtitle)
+# ─── Documents menu ───────────────────────────────────────────────────────────
+def _browse_folder(stdscr, folder: Path, title: str, root: Path | None = None):
+    """Recursively browse a folder, showing subfolders and documents."""
+    root = root or folder
+    while True:
+        # Subfolders first (with trailing /), then files by title; entries
+        # stream in from a background scan (or the index, if current) and
+        # are relabelled as their metadata arrives.
+        listing = listing_for(root, folder, meta=docmeta.get_store())
+        try:
+            sel = run_lazy_menu(stdscr, title, listing, subtitle=str(folder))
+        except BaseException:
+            listing.cancel()
+            raise
         if sel in (None, "Back"):
+            listing.cancel()
             return
-        elif sel in folder_entries:
-            _browse_folder(stdscr, folder_entries[sel], sel.rstrip("/"))
-        elif sel in file_map:
-            launch_epy(stdscr, file_map[sel])
+        path = listing.paths.get(sel)
+        if path is None:
+            continue
+        elif sel.endswith("/"):
+            _browse_folder(stdscr, path, sel.rstrip("/"), root)
+        else:
+            open_document(stdscr, path)
 
 def documents_menu(stdscr):
+    from config import get_current_user, USERS_DIR
+    fulltext.indexer_for(get_current_user()).start(_search_roots())
+    _watch_roots()
+    user_dir = USERS_DIR / get_current_user() if get_current_user() else None
+    if user_dir:
+        watcher.get_watcher().watch(user_dir)
+    changes = watcher.ChangeFlag([user_dir] if user_dir else [])
+
+    def rebuild():
+        _watch_roots()
+        return ["Logs"] + list(load_categories().keys()) + ["---", "Search", "Duplicates", "Back"]
+    refresh = changes.refresher(rebuild, "documents.json")
+
+    try:
+        _documents_loop(stdscr, refresh)
+    finally:
+        changes.close()
+
+def _documents_loop(stdscr, refresh):
     while True:
         categories = load_categories()
-        choices    = ["Logs"] + list(categories.keys()) + ["---", "Back"]
+        choices    = ["Logs"] + list(categories.keys()) + ["---", "Search", "Duplicates", "Back"]
         result     = run_menu(stdscr, "Documents Menu", choices,
-                              subtitle="Select Document Type")
+                              subtitle="Select Document Type", refresh=refresh)
+        categories = load_categories()
         if result == "Back":
             break
         elif result == "Logs":
             logs_menu(stdscr)
+        elif result == "Search":
+            search_menu(stdscr)
+        elif result == "Duplicates":
+            duplicates_menu(stdscr)
         elif result in categories:
             root = Path(categories[result]).expanduser()
-            if not root.exists() or not root.is_dir():
+            # A slow mount answers None here; the browser then shows the
+            # cached listing while its scan waits on the disk.
+            if probe_dir(root) is False:
                 curses_message(stdscr, f"Error: '{categories[result]}' not found. Remove it in Edit Menus.")
                 continue
             _browse_folder(stdscr, root, result)
@@ -0,0 +1,320 @@
+"""
+Duplicate document detection across category folders.
+
+Candidates are narrowed in three passes, each cheaper than the next:
+
+    1. group by file size (a stat, already known from the walk)
+    2. hash the first and last 64 KiB of each same-size file
+    3. hash whole files that still collide, in a process pool
+
+Files no larger than the two partial blocks are fully covered by pass 2.
+Hashes are cached in .cache/dupes.bin by path, valid while the file's
+mtime and size are unchanged, so a rerun only reads files that changed.
+A scan runs on a background thread and keeps going while the user browses.
+"""
+import hashlib
+import marshal
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from config import CACHE_DIR, ALLOWED_EXTENSIONS
+
+CACHE_FILE    = CACHE_DIR / "dupes.bin"
+CACHE_VERSION = 1
+PARTIAL_BYTES = 64 * 1024
+BUFFER_BYTES  = 1 << 20
+WORKERS       = max(1, min(4, os.cpu_count() or 1))
+
+# ─── Hashing ──────────────────────────────────────────────────────────────────
+def partial_hash(path: str, size: int) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            f.seek(size - PARTIAL_BYTES)
+            h.update(f.read(PARTIAL_BYTES))
+        elif size > PARTIAL_BYTES:
+            h.update(f.read())
+    return h.digest()
+
+def full_hash(path: str) -> tuple[str, bytes, int]:
+    """(path, digest, bytes read); runs in a worker process."""
+    h    = hashlib.blake2b(digest_size=32)
+    buf  = bytearray(BUFFER_BYTES)
+    view = memoryview(buf)
+    total = 0
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            total += n
+    return path, h.digest(), total
+
+def _walk(roots):
+    """(path, size, mtime_ns) for every document under roots."""
+    stack = [str(r) for r in roots]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (entry.is_file(follow_symlinks=False) and
+                              os.path.splitext(entry.name)[1].lower() in ALLOWED_EXTENSIONS):
+                            st = entry.stat(follow_symlinks=False)
+                            yield entry.path, st.st_size, st.st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+def _process_pool(workers):
+    try:
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, ImportError, NotImplementedError):
+        return ThreadPoolExecutor(workers)
+
+# ─── Scan ─────────────────────────────────────────────────────────────────────
+class DupeScan:
+    """
+    One background duplicate scan. groups holds lists of identical paths as
+    they are confirmed; snapshot() feeds run_lazy_menu.
+    """
+    def __init__(self, roots, cache_file=CACHE_FILE, workers=WORKERS):
+        self.roots      = [str(r) for r in roots]
+        self.cache_file = cache_file
+        self.workers    = workers
+        self.cache      = {}      # path -> [mtime_ns, size, partial, full]
+        self.groups     = []      # [(size, [paths])]
+        self.labels     = {}      # label -> index into groups
+        self.stage      = "queued"
+        self.files = self.candidates = self.hashed = 0
+        self.bytes_read = 0
+        self.hash_seconds = 0.0
+        self.done      = False
+        self.cancelled = False
+        self.error     = None
+        self.lock      = threading.Lock()
+        self.thread    = None
+        try:
+            with open(cache_file, "rb") as f:
+                version, cache = marshal.load(f)
+            if version == CACHE_VERSION:
+                self.cache = cache
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_read / 1048576 / self.hash_seconds if self.hash_seconds else 0.0
+
+    def start(self):
+        if not self.running:
+            self.thread = threading.Thread(target=self._run, daemon=True, name="dupes")
+            self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    # ─── Passes ──────────────────────────────────────────────────────────────
+    def _cached(self, path, size, mtime, field):
+        hit = self.cache.get(path)
+        if hit is not None and hit[0] == mtime and hit[1] == size:
+            return hit[field]
+        self.cache[path] = [mtime, size, None, None]
+        return None
+
+    def _run(self):
+        try:
+            self.stage = "listing"
+            by_size, seen = {}, set()
+            for path, size, mtime in _walk(self.roots):
+                if self.cancelled:
+                    return
+                self.files += 1
+                seen.add(path)
+                if size:
+                    by_size.setdefault(size, []).append((path, mtime))
+            same_size = [(s, group) for s, group in by_size.items() if len(group) > 1]
+            self.candidates = sum(len(g) for _, g in same_size)
+
+            self.stage = "partial"
+            t0 = time.perf_counter()
+            buckets = {}
+            for size, group in same_size:
+                for path, mtime in group:
+                    if self.cancelled:
+                        return
+                    digest = self._cached(path, size, mtime, 2)
+                    if digest is None:
+                        try:
+                            digest = partial_hash(path, size)
+                        except OSError:
+                            continue
+                        self.cache[path][2] = digest
+                        self.bytes_read += min(size, 2 * PARTIAL_BYTES)
+                    self.hashed += 1
+                    buckets.setdefault((size, digest), []).append((path, mtime))
+                    self.hash_seconds = time.perf_counter() - t0
+            buckets = {k: v for k, v in buckets.items() if len(v) > 1}
+
+            self.stage = "full"
+            self._full_pass(buckets, t0)
+            if not self.cancelled:
+                self.cache = {p: v for p, v in self.cache.items() if p in seen}
+        except OSError as e:
+            self.error = e.strerror or str(e)
+        except BrokenProcessPool:
+            self.error = "hashing worker died"
+        finally:
+            self._save()
+            self.stage = "cancelled" if self.cancelled else "done"
+            self.done  = True
+
+    def _full_pass(self, buckets, t0):
+        pending, todo = {}, []
+        full = {}                 # bucket key -> {path: digest}
+        for key, members in buckets.items():
+            size = key[0]
+            if size <= 2 * PARTIAL_BYTES:        # partial hash already covers it
+                self._confirm(size, [p for p, _ in members])
+                continue
+            pending[key] = len(members)
+            full[key] = {}
+            for path, mtime in members:
+                digest = self._cached(path, size, mtime, 3)
+                if digest is None:
+                    todo.append((key, path))
+                else:
+                    full[key][path] = digest
+                    pending[key] -= 1
+            if not pending[key]:
+                self._settle(key, full.pop(key))
+        if not todo:
+            return
+        with _process_pool(self.workers) as pool:
+            futures = {pool.submit(full_hash, path): key for key, path in todo}
+            for fut in as_completed(futures):
+                if self.cancelled:
+                    for f in futures:
+                        f.cancel()
+                    return
+                key = futures[fut]
+                try:
+                    path, digest, n = fut.result()
+                except OSError:
+                    path, digest, n = None, None, 0
+                self.bytes_read  += n
+                self.hash_seconds = time.perf_counter() - t0
+                if path is not None:
+                    self.cache[path][3] = digest
+                    full[key][path] = digest
+                pending[key] -= 1
+                if not pending[key]:
+                    self._settle(key, full.pop(key))
+
+    def _settle(self, key, digests):
+        by_digest = {}
+        for path, digest in digests.items():
+            by_digest.setdefault(digest, []).append(path)
+        for paths in by_digest.values():
+            if len(paths) > 1:
+                self._confirm(key[0], paths)
+
+    def _label(self, size, paths) -> str:
+        label = f"[{len(paths)}x {size / 1048576:.1f} MB] {os.path.basename(paths[0])}"
+        while label in self.labels:
+            label += " "
+        return label
+
+    def _confirm(self, size, paths):
+        paths = sorted(paths)
+        with self.lock:
+            self.labels[self._label(size, paths)] = len(self.groups)
+            self.groups.append((size, paths))
+
+    def _save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp.write_bytes(marshal.dumps((CACHE_VERSION, self.cache)))
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+    # ─── Display ─────────────────────────────────────────────────────────────
+    def wasted_bytes(self) -> int:
+        with self.lock:
+            return sum(size * (len(paths) - 1) for size, paths in self.groups if paths)
+
+    def snapshot(self):
+        with self.lock:
+            order = sorted(self.labels, key=lambda l: -self.groups[self.labels[l]][0] *
+                           (len(self.groups[self.labels[l]][1]) - 1))
+        rate = f"{self.mb_per_s:.1f} MB/s"
+        if self.error:
+            status = f"Error: {self.error}"
+        elif self.stage == "listing":
+            status = f"Listing... {self.files:,} documents"
+        elif self.stage == "partial":
+            status = f"Sampling {self.hashed:,}/{self.candidates:,} same-size files  |  {rate}"
+        elif self.stage == "full":
+            status = f"Hashing candidates  |  {len(order)} groups so far  |  {rate}"
+        else:
+            status = (f"{len(order)} duplicate groups, {self.wasted_bytes() / 1048576:.1f} MB "
+                      f"wasted  |  {self.files:,} documents  |  {rate}")
+        return order, status
+
+    def group(self, label):
+        with self.lock:
+            i = self.labels.get(label)
+            return None if i is None else list(self.groups[i][1])
+
+    def forget(self, path) -> str | None:
+        """
+        Drop a deleted file from its group. Returns the group's new label, or
+        None once fewer than two copies are left and the group is gone.
+        """
+        path = str(path)
+        with self.lock:
+            for label, i in list(self.labels.items()):
+                size, paths = self.groups[i]
+                if path not in paths:
+                    continue
+                del self.labels[label]
+                paths = [p for p in paths if p != path]
+                self.groups[i] = (size, paths)
+                if len(paths) < 2:
+                    return None
+                label = self._label(size, paths)
+                self.labels[label] = i
+                return label
+        return None
+
+_scans = {}
+
+def scan_for(user, roots, fresh: bool = False) -> DupeScan:
+    """
+    The user's running or last finished scan of roots; a new one if none,
+    fresh, or the roots changed (a running scan of other roots is cancelled).
+    """
+    key  = user or "_"
+    scan = _scans.get(key)
+    moved = scan is not None and scan.roots != [str(r) for r in roots]
+    if moved and scan.running:
+        scan.cancel()
+    if scan is None or moved or (fresh and not scan.running):
+        scan = _scans[key] = DupeScan(roots)
+    return scan.start() if not scan.done else scan
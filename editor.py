@@ -0,0 +1,491 @@
+"""
+Text editor used for journal entries.
+
+GapBuffer keeps the document as a gap buffer of lines around the cursor
+row (lines above in one list, lines below in another, reversed) and a gap
+buffer of characters inside the cursor row. Typing, deleting and breaking
+lines at the cursor are O(1); moving the cursor costs the distance moved.
+
+Editor draws only the rows inside the viewport, and of those only rows the
+buffer reports as changed, unless the view scrolled. Long lines scroll
+horizontally with the cursor. A bracketed paste is inserted as one edit
+and drawn once.
+
+Every edit is reported to GapBuffer.listener as ("i" | "d", row, col, text),
+which is what the write-ahead log (wal.py) and the undo log record.
+"""
+import curses
+import time
+from array import array
+import wal
+from config import COLOR_NORMAL, COLOR_DIM, init_colors
+from status import draw_header, draw_separator, draw_menu_title, draw_status
+from ui import _halfdelay, _session_tick, curses_confirm, bracketed_paste, read_paste
+
+TEXT_TOP   = 8            # first screen row of the text area
+UNDO_BYTES = 8 << 20      # default memory cap of the undo log
+
+_MOVES = {curses.KEY_LEFT, curses.KEY_RIGHT, curses.KEY_UP, curses.KEY_DOWN,
+          curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_HOME, curses.KEY_END}
+
+# ─── Buffer ───────────────────────────────────────────────────────────────────
+class GapBuffer:
+    def __init__(self, text: str = ""):
+        lines = text.split("\n")
+        self._above = []                    # lines before the cursor row
+        self._below = lines[:0:-1]          # lines after it, last line first
+        self._left  = list(lines[0])        # cursor row, before the cursor
+        self._right = []                    # cursor row after the cursor, reversed
+        self.dirty  = set()                 # rows whose text changed
+        self.shifted_from = None            # rows from here on moved up/down
+        self.listener = None                # called with each edit record
+
+    # ─── Queries ─────────────────────────────────────────────────────────────
+    @property
+    def row(self) -> int:
+        return len(self._above)
+
+    @property
+    def col(self) -> int:
+        return len(self._left)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._above) + 1 + len(self._below)
+
+    def _current(self) -> str:
+        return "".join(self._left) + "".join(reversed(self._right))
+
+    def line(self, i: int) -> str:
+        row = len(self._above)
+        if i < row:
+            return self._above[i]
+        if i == row:
+            return self._current()
+        return self._below[-(i - row)]
+
+    def line_length(self, i: int) -> int:
+        if i == len(self._above):
+            return len(self._left) + len(self._right)
+        return len(self.line(i))
+
+    def text(self) -> str:
+        return "\n".join(self._above + [self._current()] + self._below[::-1])
+
+    # ─── Cursor ──────────────────────────────────────────────────────────────
+    def move_to(self, row: int, col: int):
+        row = max(0, min(row, self.line_count - 1))
+        if row != len(self._above):
+            cur = self._current()
+            while len(self._above) < row:
+                self._above.append(cur)
+                cur = self._below.pop()
+            while len(self._above) > row:
+                self._below.append(cur)
+                cur = self._above.pop()
+            self._left, self._right = list(cur), []
+        col = max(0, min(col, self.line_length(row)))
+        while len(self._left) > col:
+            self._right.append(self._left.pop())
+        while len(self._left) < col:
+            self._left.append(self._right.pop())
+
+    # ─── Edits ───────────────────────────────────────────────────────────────
+    def _shift(self, row: int):
+        if self.shifted_from is None or row < self.shifted_from:
+            self.shifted_from = row
+
+    def insert(self, text: str):
+        """Insert text at the cursor, leaving the cursor after it."""
+        if self.listener:
+            self.listener(("i", len(self._above), len(self._left), text))
+        parts = text.split("\n")
+        self.dirty.add(len(self._above))
+        self._left.extend(parts[0])
+        for part in parts[1:]:
+            self._shift(len(self._above))
+            self._above.append("".join(self._left))
+            self._left = list(part)
+        self.dirty.add(len(self._above))
+
+    def delete_back(self, n: int = 1) -> str:
+        """Delete up to n characters before the cursor; returns what was removed."""
+        out = []
+        for _ in range(n):
+            if self._left:
+                out.append(self._left.pop())
+            elif self._above:
+                self._shift(len(self._above) - 1)
+                self._left = list(self._above.pop())
+                out.append("\n")
+            else:
+                break
+        self.dirty.add(len(self._above))
+        removed = "".join(reversed(out))
+        if removed and self.listener:
+            self.listener(("d", len(self._above), len(self._left), removed))
+        return removed
+
+    def delete_forward(self, n: int = 1) -> str:
+        """Delete up to n characters after the cursor; returns what was removed."""
+        out = []
+        for _ in range(n):
+            if self._right:
+                out.append(self._right.pop())
+            elif self._below:
+                self._shift(len(self._above))
+                self._right = list(reversed(self._below.pop()))
+                out.append("\n")
+            else:
+                break
+        self.dirty.add(len(self._above))
+        removed = "".join(out)
+        if removed and self.listener:
+            self.listener(("d", len(self._above), len(self._left), removed))
+        return removed
+
+    def take_dirty(self):
+        """(changed rows, first shifted row or None), clearing both."""
+        dirty, shifted = self.dirty, self.shifted_from
+        self.dirty, self.shifted_from = set(), None
+        return dirty, shifted
+
+# ─── Undo ─────────────────────────────────────────────────────────────────────
+class UndoLog:
+    """
+    Undo/redo history of GapBuffer edit records, kept in flat arrays: kind,
+    row and column per step, and each step's text as UTF-8 in one shared
+    bytearray. Consecutive single-character edits coalesce into one step
+    per word; a cursor move (seal) ends the step. Undoing or redoing a step
+    costs the size of its text. When the log passes max_bytes the oldest
+    quarter of it is dropped.
+    """
+    INSERT, DELETE = 0, 1
+
+    def __init__(self, max_bytes: int = UNDO_BYTES):
+        self.max_bytes = max_bytes
+        self.kinds  = bytearray()
+        self.rows   = array("q")
+        self.cols   = array("q")
+        self.starts = array("q")            # offset of each step's text in self.text
+        self.text   = bytearray()
+        self.pos    = 0                     # steps before pos can be undone
+        self.sealed = True
+        self.applying = False
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def size(self) -> int:
+        return len(self.text) + 25 * len(self.kinds)
+
+    def seal(self):
+        self.sealed = True
+
+    def _text(self, i) -> bytes:
+        end = self.starts[i + 1] if i + 1 < len(self.kinds) else len(self.text)
+        return self.text[self.starts[i]:end]
+
+    def _truncate(self, n):
+        if n < len(self.kinds):
+            del self.text[self.starts[n]:]
+            del self.kinds[n:], self.rows[n:], self.cols[n:], self.starts[n:]
+
+    def _coalesce(self, kind, row, col, text) -> bool:
+        last = len(self.kinds) - 1
+        if (self.sealed or last < 0 or self.kinds[last] != kind or len(text) != 1
+                or text == "\n" or self.rows[last] != row):
+            return False
+        prev = self._text(last)
+        if kind == self.INSERT:
+            if col != self.cols[last] + len(prev.decode("utf-8", "ignore")):
+                return False
+            edge = prev[-1:]
+        elif col + 1 == self.cols[last]:            # backspace run
+            edge = prev[:1]
+        elif col == self.cols[last]:                # forward delete run
+            edge = prev[-1:]
+        else:
+            return False
+        if edge.isspace() and not text.isspace():   # a new word starts a new step
+            return False
+        data = text.encode("utf-8")
+        if kind == self.DELETE and col + 1 == self.cols[last]:
+            self.text[self.starts[last]:self.starts[last]] = data
+            self.cols[last] = col
+        else:
+            self.text += data
+        return True
+
+    def record(self, op):
+        """GapBuffer listener: add one edit, unless it is an undo/redo being applied."""
+        if self.applying:
+            return
+        kind, row, col, text = op
+        kind = self.INSERT if kind == "i" else self.DELETE
+        self._truncate(self.pos)
+        if not self._coalesce(kind, row, col, text):
+            self.kinds.append(kind)
+            self.rows.append(row)
+            self.cols.append(col)
+            self.starts.append(len(self.text))
+            self.text += text.encode("utf-8")
+        self.pos    = len(self.kinds)
+        self.sealed = "\n" in text or len(text) > 1
+        if self.size > self.max_bytes:
+            self._trim()
+
+    def _trim(self):
+        n = len(self.kinds)
+        drop = max(1, n // 4)
+        while drop < n and self.size - self.starts[drop] - 25 * drop > self.max_bytes:
+            drop = min(n, drop * 2)
+        if drop >= n:
+            self._truncate(0)
+            self.pos = 0
+            return
+        shift = self.starts[drop]
+        del self.text[:shift]
+        del self.kinds[:drop], self.rows[:drop], self.cols[:drop], self.starts[:drop]
+        for i in range(len(self.starts)):
+            self.starts[i] -= shift
+        self.pos = max(0, self.pos - drop)
+
+    def _apply(self, buf, i, inverse):
+        text = self._text(i).decode("utf-8")
+        buf.move_to(self.rows[i], self.cols[i])
+        self.applying = True
+        try:
+            if (self.kinds[i] == self.INSERT) != inverse:
+                buf.insert(text)
+            else:
+                buf.delete_forward(len(text))
+        finally:
+            self.applying = False
+        self.sealed = True
+
+    def undo(self, buf) -> bool:
+        if not self.pos:
+            return False
+        self.pos -= 1
+        self._apply(buf, self.pos, True)
+        return True
+
+    def redo(self, buf) -> bool:
+        if self.pos >= len(self.kinds):
+            return False
+        self._apply(buf, self.pos, False)
+        self.pos += 1
+        return True
+
+# ─── Screen ───────────────────────────────────────────────────────────────────
+class Editor:
+    """
+    Full-screen editor; run() returns the text on Ctrl+W, None on Ctrl+X.
+    With log_path set, edits go to a write-ahead log there until the text
+    has been saved or discarded. orphans are other logs of earlier sessions
+    to offer for recovery when log_path has nothing to recover.
+    """
+    FOOTER = "CTRL+W = save  |  CTRL+X = cancel  |  CTRL+U/R = undo/redo"
+
+    def __init__(self, stdscr, text: str = "", title: str = "", log_path=None,
+                 undo_bytes: int = UNDO_BYTES, orphans=()):
+        self.scr   = stdscr
+        self.base  = text
+        self.buf   = GapBuffer(text)
+        self.title = title
+        self.log_path = log_path
+        self.orphans  = list(orphans)
+        self.log      = None      # WriteAheadLog while run() is editing
+        self.undo  = UndoLog(undo_bytes)
+        self.buf.listener = self.undo.record
+        self.top   = 0            # first buffer row in the viewport
+        self.left  = 0            # first column shown
+        self.goal  = 0            # column kept while moving up/down
+        self._view = None         # (top, left, h, w) of the last full draw
+
+    # ─── Drawing ─────────────────────────────────────────────────────────────
+    def _geometry(self):
+        h, w = self.scr.getmaxyx()
+        return h, w, max(1, h - TEXT_TOP - 3), max(1, w - 4)
+
+    def _scroll(self, rows, width):
+        buf = self.buf
+        if buf.row < self.top:
+            self.top = buf.row
+        elif buf.row >= self.top + rows:
+            self.top = buf.row - rows + 1
+        if buf.col < self.left:
+            self.left = max(0, buf.col - width // 4)
+        elif buf.col >= self.left + width:
+            self.left = buf.col - width + width // 4 + 1
+
+    def _draw_row(self, screen_row, width):
+        i = self.top + screen_row
+        text = self.buf.line(i)[self.left:self.left + width] if i < self.buf.line_count else ""
+        try:
+            self.scr.addstr(TEXT_TOP + screen_row, 2, text.ljust(width),
+                            curses.color_pair(COLOR_NORMAL))
+        except curses.error:
+            pass
+
+    def render(self):
+        h, w, rows, width = self._geometry()
+        self._scroll(rows, width)
+        dirty, shifted = self.buf.take_dirty()
+        view = (self.top, self.left, h, w)
+        if view != self._view:
+            self.scr.erase()
+            draw_header(self.scr)
+            draw_separator(self.scr, 4, w)
+            draw_menu_title(self.scr, self.title, 5)
+            draw_separator(self.scr, 6, w)
+            redraw = range(rows)
+            self._view = view
+        else:
+            end = self.top + rows
+            redraw = {r - self.top for r in dirty if self.top <= r < end}
+            if shifted is not None and shifted < end:
+                redraw.update(range(max(0, shifted - self.top), rows))
+        for r in redraw:
+            self._draw_row(r, width)
+        buf = self.buf
+        footer = f"Ln {buf.row + 1}/{buf.line_count}  Col {buf.col + 1}  |  {self.FOOTER}"
+        if self.log is not None and self.log.error:
+            footer = f"Ln {buf.row + 1}/{buf.line_count}  |  AUTOSAVE FAILED: {self.log.error}"
+        try:
+            self.scr.addstr(h - 2, 2, footer[:w - 4].ljust(w - 4), curses.color_pair(COLOR_DIM))
+        except curses.error:
+            pass
+        draw_status(self.scr)
+        try:
+            self.scr.move(TEXT_TOP + buf.row - self.top, 2 + buf.col - self.left)
+        except curses.error:
+            pass
+        self.scr.noutrefresh()
+        curses.doupdate()
+
+    # ─── Keys ────────────────────────────────────────────────────────────────
+    def handle(self, key) -> str | None:
+        """Apply one key; returns "save" or "cancel" when the session ends."""
+        buf = self.buf
+        _, _, rows, _ = self._geometry()
+        vertical = False
+        if key == 23:                                   # Ctrl+W
+            return "save"
+        elif key == 24:                                 # Ctrl+X
+            return "cancel"
+        elif key == 21:                                 # Ctrl+U
+            self.undo.undo(buf)
+        elif key == 18:                                 # Ctrl+R
+            self.undo.redo(buf)
+        elif key == 27:                                 # bracketed paste
+            text = read_paste(self.scr)
+            if text:
+                buf.insert(text)
+        elif key == curses.KEY_RESIZE:
+            init_colors()
+            self.scr.clear()
+            self._view = None
+        elif key in (curses.KEY_ENTER, 10, 13):
+            buf.insert("\n")
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            buf.delete_back()
+        elif key == curses.KEY_DC:
+            buf.delete_forward()
+        elif key == curses.KEY_LEFT:
+            if buf.col:
+                buf.move_to(buf.row, buf.col - 1)
+            elif buf.row:
+                buf.move_to(buf.row - 1, buf.line_length(buf.row - 1))
+        elif key == curses.KEY_RIGHT:
+            if buf.col < buf.line_length(buf.row):
+                buf.move_to(buf.row, buf.col + 1)
+            elif buf.row < buf.line_count - 1:
+                buf.move_to(buf.row + 1, 0)
+        elif key in (curses.KEY_UP, curses.KEY_DOWN, curses.KEY_PPAGE, curses.KEY_NPAGE):
+            step = {curses.KEY_UP: -1, curses.KEY_DOWN: 1,
+                    curses.KEY_PPAGE: -rows, curses.KEY_NPAGE: rows}[key]
+            buf.move_to(buf.row + step, self.goal)
+            vertical = True
+        elif key == curses.KEY_HOME:
+            buf.move_to(buf.row, 0)
+        elif key == curses.KEY_END:
+            buf.move_to(buf.row, buf.line_length(buf.row))
+        elif 32 <= key <= 126:
+            buf.insert(chr(key))
+        if key in _MOVES:
+            self.undo.seal()
+        if not vertical:
+            self.goal = buf.col
+        return None
+
+    def _open_log(self):
+        snapshot, source = None, None
+        for path in [self.log_path] + self.orphans:
+            found = wal.recover(path, self.base)
+            if found:
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(found[1]))
+                if curses_confirm(self.scr, f"Recover unsaved changes from {when}?"):
+                    snapshot, source = found[0], path
+                    self.buf = GapBuffer(snapshot)
+                    self.undo = UndoLog(self.undo.max_bytes)
+                    break
+            elif path == self.log_path:
+                continue            # an empty log of our own is truncated on open
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        log = wal.WriteAheadLog(self.log_path, self.base, snapshot)
+        if source is not None and source != self.log_path:
+            log.flush(sync=True)    # the snapshot is safe in our log before the old one goes
+            try:
+                source.unlink()
+            except OSError:
+                pass
+        undo = self.undo.record
+
+        def listener(op):
+            log.record(op)
+            undo(op)
+        self.buf.listener = listener
+        return log
+
+    def run(self, on_save=None) -> str | None:
+        """
+        Edit until Ctrl+W or Ctrl+X. on_save(text) runs before the log is
+        dropped, so a failed save can still be recovered. An exception
+        (forced logout, crash) leaves the log on disk.
+        """
+        log = self.log = self._open_log() if self.log_path else None
+        finished = False
+        curses.curs_set(1)
+        _halfdelay()      # idle ticks keep the clock and session check alive
+        bracketed_paste(True)
+        try:
+            while True:
+                self.render()
+                key = self.scr.getch()
+                if key == -1:
+                    _session_tick()
+                    continue
+                action = self.handle(key)
+                if action == "save":
+                    text = self.buf.text()
+                    if on_save:
+                        on_save(text)
+                    finished = True
+                    return text
+                if action == "cancel":
+                    finished = True
+                    return None
+                if log and log.wants_checkpoint:
+                    log.checkpoint(self.buf.text())
+        finally:
+            bracketed_paste(False)
+            if log:
+                log.close(keep=not finished)
+            curses.curs_set(0)
+            _halfdelay()
@@ -0,0 +1,353 @@
+"""
+Full-text search over document categories and journals.
+
+Text is pulled from .txt files, from the XHTML inside .epub archives and
+from journal_entries/<user>/*.txt, then tokenised into lower-case words.
+The index keeps a positional inverted index:
+
+    docs      [[path, mtime_ns, size, n_tokens, alive], ...]
+    postings  term -> varint bytes of (doc_id, count, position deltas...)
+
+A changed or deleted file only tombstones its old doc id and appends a new
+one, so re-indexing is incremental (keyed on mtime and size). Once dead
+docs outnumber live ones the postings are compacted in memory without
+re-reading any file. The index is saved with marshal per user in
+.cache/fulltext/<user>.idx.
+
+Queries AND their terms, rank with BM25 and add a bonus when the terms
+appear next to each other as a phrase.
+"""
+import html
+import marshal
+import math
+import os
+import queue
+import re
+import threading
+import time
+import zipfile
+from pathlib import Path
+from config import CACHE_DIR
+
+INDEX_DIR     = CACHE_DIR / "fulltext"
+INDEX_VERSION = 1
+INDEXED_SUFFIXES = {".txt", ".epub"}
+SAVE_EVERY    = 200        # documents between checkpoints while indexing
+BM25_K1, BM25_B = 1.2, 0.75
+PHRASE_BONUS  = 2.0
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TAG   = re.compile(r"<[^>]+>")
+_SKIP  = re.compile(r"<(script|style)[^>]*>.*?</\1>", re.S | re.I)
+
+# ─── Varints ──────────────────────────────────────────────────────────────────
+def _put_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _get_varint(buf, i):
+    n = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+def _encode(doc_id: int, positions: list[int]) -> bytes:
+    out = bytearray()
+    _put_varint(out, doc_id)
+    _put_varint(out, len(positions))
+    prev = 0
+    for p in positions:
+        _put_varint(out, p - prev)
+        prev = p
+    return bytes(out)
+
+def _decode(buf: bytes):
+    """Yield (doc_id, positions) from one term's postings."""
+    i, end = 0, len(buf)
+    while i < end:
+        doc, i   = _get_varint(buf, i)
+        count, i = _get_varint(buf, i)
+        pos, prev = [], 0
+        for _ in range(count):
+            d, i = _get_varint(buf, i)
+            prev += d
+            pos.append(prev)
+        yield doc, pos
+
+# ─── Text extraction ──────────────────────────────────────────────────────────
+def _strip_markup(markup: str) -> str:
+    return html.unescape(_TAG.sub(" ", _SKIP.sub(" ", markup)))
+
+def extract_text(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".txt":
+        return path.read_text(encoding="utf-8", errors="ignore")
+    if suffix == ".epub":
+        parts = []
+        with zipfile.ZipFile(path) as z:
+            for name in sorted(z.namelist()):
+                if name.lower().endswith((".xhtml", ".html", ".htm")):
+                    parts.append(_strip_markup(z.read(name).decode("utf-8", "ignore")))
+        return "\n".join(parts)
+    return ""
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+class SearchIndex:
+    def __init__(self, path: Path):
+        self.path     = Path(path)
+        self.docs     = []          # [path, mtime_ns, size, n_tokens, alive]
+        self.postings = {}          # term -> bytes (bytearray once appended to)
+        self.by_path  = {}          # path -> doc id of the live doc
+        self.lock     = threading.Lock()
+        self._saving  = threading.Lock()   # one writer of the .tmp file at a time
+        try:
+            with open(self.path, "rb") as f:
+                version, docs, postings = marshal.load(f)
+            if version == INDEX_VERSION:
+                self.docs, self.postings = [list(d) for d in docs], postings
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+        self.by_path = {d[0]: i for i, d in enumerate(self.docs) if d[4]}
+
+    # ─── Maintenance ─────────────────────────────────────────────────────────
+    def is_current(self, path: str, mtime_ns: int, size: int) -> bool:
+        i = self.by_path.get(path)
+        return i is not None and self.docs[i][1] == mtime_ns and self.docs[i][2] == size
+
+    def add(self, path: str, mtime_ns: int, size: int, text: str):
+        tokens = tokenize(text)
+        where  = {}
+        for pos, tok in enumerate(tokens):
+            where.setdefault(tok, []).append(pos)
+        with self.lock:
+            self._remove(path)
+            doc_id = len(self.docs)
+            self.docs.append([path, mtime_ns, size, len(tokens), True])
+            self.by_path[path] = doc_id
+            for term, positions in where.items():
+                buf = self.postings.get(term)
+                if type(buf) is not bytearray:      # loaded as bytes; grow in place
+                    buf = self.postings[term] = bytearray(buf or b"")
+                buf += _encode(doc_id, positions)
+
+    def remove(self, path: str):
+        with self.lock:
+            self._remove(path)
+
+    def _remove(self, path: str):
+        i = self.by_path.pop(path, None)
+        if i is not None:
+            self.docs[i][4] = False
+
+    def compact(self):
+        """Drop tombstoned docs and renumber; no files are re-read."""
+        with self.lock:
+            live = [i for i, d in enumerate(self.docs) if d[4]]
+            remap = {old: new for new, old in enumerate(live)}
+            postings = {}
+            for term, buf in self.postings.items():
+                out = b"".join(_encode(remap[d], pos) for d, pos in _decode(buf) if d in remap)
+                if out:
+                    postings[term] = out
+            self.docs     = [self.docs[i] for i in live]
+            self.postings = postings
+            self.by_path  = {d[0]: i for i, d in enumerate(self.docs)}
+
+    def save(self):
+        with self._saving:
+            with self.lock:
+                dead = len(self.docs) - len(self.by_path)
+            if dead > len(self.by_path):
+                self.compact()
+            with self.lock:
+                data = marshal.dumps((INDEX_VERSION, self.docs, self.postings))
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+    def paths(self) -> list[str]:
+        """Live paths, copied under the lock for callers on other threads."""
+        with self.lock:
+            return list(self.by_path)
+
+    def stats(self) -> dict:
+        with self.lock:
+            size = sum(len(b) for b in self.postings.values())
+            return {"docs": len(self.by_path), "terms": len(self.postings),
+                    "postings_bytes": size}
+
+    # ─── Queries ─────────────────────────────────────────────────────────────
+    def search(self, query: str, limit: int = 50) -> list[tuple[float, str]]:
+        """Ranked (score, path) hits containing every query term."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            bufs = [self.postings.get(t) for t in terms]
+            docs = self.docs
+            n    = len(self.by_path) or 1
+        if not all(bufs):
+            return []
+        # Rarest term first keeps the candidate set small from the start.
+        order = sorted(range(len(terms)), key=lambda k: len(bufs[k]))
+        hits  = None
+        per_term, dfs = {}, {}
+        for k in order:
+            found, df = {}, 0
+            for d, pos in _decode(bufs[k]):
+                if docs[d][4]:
+                    df += 1
+                    if hits is None or d in hits:
+                        found[d] = pos
+            per_term[k], dfs[k] = found, df
+            hits = set(found)
+            if not hits:
+                return []
+        avg = sum(d[3] for d in docs if d[4]) / n
+        scored = []
+        for d in hits:
+            length = docs[d][3] or 1
+            score  = 0.0
+            for k in range(len(terms)):
+                tf  = len(per_term[k][d])
+                df  = dfs[k]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg))
+            if len(terms) > 1:
+                starts = set(per_term[0][d])
+                for k in range(1, len(terms)):
+                    starts &= {p - k for p in per_term[k][d]}
+                    if not starts:
+                        break
+                if starts:
+                    score += PHRASE_BONUS * len(starts)
+            scored.append((score, docs[d][0]))
+        scored.sort(reverse=True)
+        return scored[:limit]
+
+# ─── Background indexer ───────────────────────────────────────────────────────
+def _walk(roots):
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            yield root
+            continue
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                if os.path.splitext(name)[1].lower() in INDEXED_SUFFIXES:
+                    yield Path(dirpath) / name
+
+class Indexer:
+    """Keeps one SearchIndex in step with a set of folders, off the UI thread."""
+    def __init__(self, index: SearchIndex):
+        self.index   = index
+        self.thread  = None
+        self.roots   = []
+        self.done    = 0
+        self.changed = 0
+        self.last_run = None
+        self._changes = queue.Queue()
+        self._applier = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, roots):
+        self.roots = list(roots)
+        if self.running:
+            return
+        self.thread = threading.Thread(target=self._run, args=(list(roots),),
+                                       daemon=True, name="fulltext-indexer")
+        self.thread.start()
+
+    def _run(self, roots):
+        self.done = self.changed = 0
+        seen = set()
+        for path in _walk(roots):
+            key = str(path)
+            seen.add(key)
+            self.done += 1
+            try:
+                st = path.stat()
+                if self.index.is_current(key, st.st_mtime_ns, st.st_size):
+                    continue
+                self.index.add(key, st.st_mtime_ns, st.st_size, extract_text(path))
+            except (OSError, zipfile.BadZipFile, KeyError):
+                continue
+            self.changed += 1
+            if self.changed % SAVE_EVERY == 0:
+                self.index.save()
+        for key in [p for p in self.index.paths() if p not in seen]:
+            self.index.remove(key)
+            self.changed += 1
+        if self.changed:
+            self.index.save()
+        self.last_run = time.time()
+
+    def apply(self, changes):
+        """Re-index just the files named in watcher events, in the background."""
+        if any(ch.kind == "rescan" for ch in changes):
+            self.start(self.roots)
+            return
+        self._changes.put(changes)
+        if self._applier is None:
+            with self._start_lock:
+                if self._applier is None:
+                    self._applier = threading.Thread(target=self._apply_loop, daemon=True,
+                                                     name="fulltext-apply")
+                    self._applier.start()
+
+    def _apply_loop(self):
+        """One worker for every watcher batch, so batches apply and save in order."""
+        while True:
+            self._apply(self._changes.get())
+
+    def _apply(self, changes):
+        dirty = False
+        for ch in changes:
+            key = str(ch.path)
+            if ch.kind == "deleted":
+                doomed = [p for p in self.index.paths()
+                          if p == key or p.startswith(key + os.sep)] if ch.is_dir else [key]
+                for p in doomed:
+                    self.index.remove(p)
+                    dirty = True
+                continue
+            paths = _walk([ch.path]) if ch.is_dir else [ch.path]
+            for path in paths:
+                if path.suffix.lower() not in INDEXED_SUFFIXES:
+                    continue
+                try:
+                    st = path.stat()
+                    if not self.index.is_current(str(path), st.st_mtime_ns, st.st_size):
+                        self.index.add(str(path), st.st_mtime_ns, st.st_size,
+                                       extract_text(path))
+                        dirty = True
+                except (OSError, zipfile.BadZipFile, KeyError):
+                    continue
+        if dirty:
+            self.index.save()
+
+_indexers = {}
+
+def indexer_for(user: str | None) -> Indexer:
+    key = user or "_"
+    if key not in _indexers:
+        _indexers[key] = Indexer(SearchIndex(INDEX_DIR / f"{key}.idx"))
+    return _indexers[key]
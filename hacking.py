@@ -6,11 +6,15 @@ import curses
 import random
 import string
 import time
+from collections import namedtuple
 from config import (COLOR_NORMAL, COLOR_SELECTED, COLOR_DIM, COLOR_STATUS,
                     COLOR_TITLE, init_colors, playsound, set_show_status)
 from status import draw_status
+from audit import record as audit
+from hacksolver import likeness_matrix, best_guess, narrow, rate_board
+import wordlist
 
-# ─── Word bank (all 5-letter words for consistent layout) ────────────────────
+# ─── Word bank (fallback when words/ has no list of the tier's length) ───────
 WORD_BANK = [
     "CRANE", "FLAME", "BLADE", "SHORE", "GRIME", "BRUTE", "STALE", "PRIME",
     "GRIND", "PLANK", "FLASK", "CRAMP", "BLAZE", "SCORN", "TROVE", "PHASE",
@@ -28,118 +32,291 @@ WORD_LEN   = 5
 COLS       = 2      # display columns
 ROWS       = 16     # rows per column
 COL_WIDTH  = 12     # chars per column cell
+COL_GAP    = 14     # from one column's chars to the next's, address included
+MIN_COL_GAP = 8     # 6-char address plus two spaces
+PANEL_WIDTH = 16    # room kept for the log panel's longest lines
 NUM_WORDS  = 10     # words to hide
 MAX_TRIES  = 4
 
 JUNK = r"!@#$%^&*-+=[]{}|;:',.<>?/\~`"
-
-def _junk_char():
-    return random.choice(JUNK)
+OPENERS = '([<{'
+CLOSERS = ')]>}'
+BRACKET_RATE = 0.3  # chance a row gets a bracket pair
+QUALITY_ATTEMPTS = 40  # boards tried before accepting one the solver dislikes
+
+# ─── Difficulty tiers ─────────────────────────────────────────────────────────
+class Layout(namedtuple("Layout", "cols rows col_width num_words tries word_len",
+                        defaults=(MAX_TRIES, WORD_LEN))):
+    """Board size, guess budget and word length for one difficulty tier."""
+    __slots__ = ()
+    @property
+    def total(self):
+        return self.cols * self.rows * self.col_width
+
+DIFFICULTIES = {
+    "Novice":   Layout(2, 16, 12, 6, word_len=4),
+    "Advanced": Layout(COLS, ROWS, COL_WIDTH, NUM_WORDS),
+    "Expert":   Layout(2, 16, 12, 14, 5, word_len=6),
+    "Master":   Layout(3, 16, 12, 20, 5, word_len=7),
+}
+DEFAULT_DIFFICULTY = "Advanced"
+
+def user_difficulty(username) -> str:
+    """The tier stored as "hacking_difficulty" on the user's account record."""
+    from userstore import store
+    tier = (store.get(username) or {}).get("hacking_difficulty", DEFAULT_DIFFICULTY)
+    return tier if tier in DIFFICULTIES else DEFAULT_DIFFICULTY
 
 def _likeness(guess, answer):
     return sum(a == b for a, b in zip(guess, answer))
 
-def _build_grid(answer):
+# ─── Puzzle generation ────────────────────────────────────────────────────────
+def _place_words(rng, layout, word_len):
     """
-    Build a flat char array of COLS*ROWS*COL_WIDTH chars.
-    Embed NUM_WORDS words (including the answer) at non-overlapping positions.
-    Returns (chars, word_positions) where word_positions = [(start_idx, word), ...]
+    Pick start offsets for layout.num_words words without rejection sampling.
+    Each row holds up to (col_width + 1) // (word_len + 1) words separated by at
+    least one junk char; rows and in-row slots are drawn directly, and each
+    row's spare chars are split between its gaps with a sorted random draw.
+    Returns {row: [start_col, ...]}.
     """
-    total = COLS * ROWS * COL_WIDTH
-    chars = [_junk_char() for _ in range(total)]
-
-    # Pick words
-    pool = [w for w in WORD_BANK if w != answer]
-    random.shuffle(pool)
-    words = pool[:NUM_WORDS - 1] + [answer]
-    random.shuffle(words)
+    per_row = (layout.col_width + 1) // (word_len + 1)
+    n_rows  = layout.cols * layout.rows
+    if per_row < 1 or layout.num_words > per_row * n_rows:
+        raise ValueError(f"{layout.num_words} words of length {word_len} "
+                         f"do not fit in {layout}")
+    counts = {}
+    for slot in rng.sample(range(n_rows * per_row), layout.num_words):
+        counts[slot // per_row] = counts.get(slot // per_row, 0) + 1
+    rows = {}
+    for row, m in counts.items():
+        spare = layout.col_width - m * word_len - (m - 1)
+        cuts  = sorted(rng.randint(0, spare) for _ in range(m))
+        rows[row] = [j * (word_len + 1) + c for j, c in enumerate(cuts)]
+    return rows
+
+_BANK_INDEX = wordlist.WordIndex.build(WORD_BANK)
+
+def _word_source(layout):
+    """(index, length) to draw this layout's words from."""
+    index = wordlist.get_index()
+    if index is not None and index.count(layout.word_len) >= 4 * layout.num_words:
+        return index, layout.word_len
+    return _BANK_INDEX, WORD_LEN
+
+def _build_grid(words, layout=DIFFICULTIES[DEFAULT_DIFFICULTY], rng=random):
+    """
+    Build a flat char array of layout.total chars.
+    Embed layout.num_words words (all of the same length, answer included)
+    at non-overlapping positions that never straddle a row, plus matching
+    bracket pairs in the junk between them.
+    Returns (chars, word_positions, bracket_pairs) where
+    word_positions = [(start_idx, word), ...] and bracket_pairs = [(op, cl), ...]
+    """
+    word_len = len(words[0])
+    width    = layout.col_width
+    chars    = [rng.choice(JUNK) for _ in range(layout.total)]
+    words    = list(words)
+    rng.shuffle(words)
 
-    # Place words without overlap, not straddling row boundaries
-    used = set()
     word_positions = []
-    for word in words:
-        placed = False
-        for _ in range(200):
-            row   = random.randint(0, ROWS * COLS - 1)
-            col_s = random.randint(0, COL_WIDTH - WORD_LEN)
-            start = row * COL_WIDTH + col_s
-            idxs  = list(range(start, start + WORD_LEN))
-            if not used.intersection(idxs):
-                for i, ch in zip(idxs, word):
-                    chars[i] = ch
-                used.update(idxs)
-                word_positions.append((start, word))
-                placed = True
-                break
-        if not placed:
-            # Fallback: overwrite anywhere
-            start = random.randint(0, total - WORD_LEN)
-            for i, ch in enumerate(word):
-                chars[start + i] = ch
+    placed = _place_words(rng, layout, word_len)
+    words_iter = iter(words)
+    for row in sorted(placed):
+        for col in placed[row]:
+            start = row * width + col
+            word  = next(words_iter)
+            chars[start:start + word_len] = word
             word_positions.append((start, word))
 
-    # Scatter matching bracket pairs in rows (for dud/replenish mechanic)
+    # Bracket pairs only go in junk runs of 2+ chars, so their span never
+    # covers a word cell.
     bracket_pairs = []
-    openers = '([<{'
-    closers = ')]}>'
-    for row in range(ROWS * COLS):
-        row_start = row * COL_WIDTH
-        # Try to place 0-1 pairs per row
-        if random.random() < 0.3:
-            max_span = COL_WIDTH - 2
-            span = random.randint(1, max(1, max_span - 1))
-            op = random.randrange(row_start, row_start + COL_WIDTH - span - 1)
-            cl = op + span + 1
-            if op not in used and cl not in used:
-                pair_type = random.randint(0, 3)
-                chars[op] = openers[pair_type]
-                chars[cl] = closers[pair_type]
-                bracket_pairs.append((op, cl))
+    for row in range(layout.cols * layout.rows):
+        if rng.random() >= BRACKET_RATE:
+            continue
+        runs, prev = [], 0
+        for col in placed.get(row, []) + [width]:
+            if col - prev >= 2:
+                runs.append((prev, col))
+            prev = col + word_len
+        if not runs:
+            continue
+        lo, hi = rng.choice(runs)
+        op = rng.randint(lo, hi - 2)
+        cl = rng.randint(op + 1, hi - 1)
+        kind = rng.randrange(len(OPENERS))
+        row_start = row * width
+        chars[row_start + op] = OPENERS[kind]
+        chars[row_start + cl] = CLOSERS[kind]
+        bracket_pairs.append((row_start + op, row_start + cl))
 
     return chars, word_positions, bracket_pairs
 
-def _idx_to_screen(idx, base_row):
+def generate_puzzle(seed=None, difficulty=DEFAULT_DIFFICULTY, layout=None,
+                    quality=True):
+    """
+    Build a reproducible puzzle. The same seed and layout always give the
+    same board. Returns (answer, chars, word_positions, bracket_pairs, rng);
+    the returned rng continues the seeded stream for in-game effects.
+    With quality on, boards the solver rates trivial or unwinnable within
+    layout.tries are redrawn from the same stream.
+    """
+    layout = layout or DIFFICULTIES[difficulty]
+    rng    = random.Random(seed)
+    index, word_len = _word_source(layout)
+    for _ in range(QUALITY_ATTEMPTS if quality else 1):
+        words  = index.pick(word_len, layout.num_words, rng)
+        answer = words[0]
+        chars, word_positions, bracket_pairs = _build_grid(words, layout, rng)
+        if not quality or rate_board([w for _, w in word_positions], layout.tries) == "ok":
+            break
+    return answer, chars, word_positions, bracket_pairs, rng
+
+def check_puzzle(layout, chars, word_positions, bracket_pairs) -> list[str]:
+    """Return a list of invariant violations (empty when the board is valid)."""
+    problems = []
+    width    = layout.col_width
+    owner    = {}
+    for start, word in word_positions:
+        end = start + len(word) - 1
+        if start // width != end // width:
+            problems.append(f"{word} at {start} straddles a row")
+        if "".join(chars[start:end + 1]) != word:
+            problems.append(f"{word} at {start} not written to the grid")
+        for i in range(start, end + 1):
+            if i in owner:
+                problems.append(f"{word} overlaps {owner[i]} at {i}")
+            owner[i] = word
+    if len({w for _, w in word_positions}) != len(word_positions):
+        problems.append("duplicate words")
+    for op, cl in bracket_pairs:
+        if not (op < cl and op // width == cl // width):
+            problems.append(f"bracket {op}-{cl} not on one row")
+        elif OPENERS.find(chars[op]) < 0 or OPENERS.find(chars[op]) != CLOSERS.find(chars[cl]):
+            problems.append(f"bracket {op}-{cl} is {chars[op]}{chars[cl]}")
+        if any(i in owner for i in range(op, cl + 1)):
+            problems.append(f"bracket {op}-{cl} covers a word")
+    return problems
+
+def _col_step(layout, width) -> int:
+    """
+    Screen columns from one block to the next: COL_GAP past the chars when
+    the log panel still fits in width, closer (down to MIN_COL_GAP) when
+    not, so three Master columns and the panel fit in 80 columns.
+    """
+    for gap in range(COL_GAP, MIN_COL_GAP - 1, -1):
+        step = layout.col_width + gap
+        if 7 + (layout.cols - 1) * step + layout.col_width + 4 + PANEL_WIDTH <= width:
+            return step
+    return layout.col_width + MIN_COL_GAP
+
+def _idx_to_screen(idx, base_row, layout=DIFFICULTIES[DEFAULT_DIFFICULTY], step=None):
     """Convert flat index to (screen_row, screen_col)."""
-    col_block  = idx // (ROWS * COL_WIDTH)   # 0 or 1
-    within     = idx % (ROWS * COL_WIDTH)
-    row_in_col = within // COL_WIDTH
-    char_in_row = within % COL_WIDTH
-    # Layout: col0 starts at screen col 7, col1 at 7+COL_WIDTH+8 = 27
-    scr_col = 7 + col_block * (COL_WIDTH + 14) + char_in_row
+    step       = step or layout.col_width + COL_GAP
+    block      = layout.rows * layout.col_width
+    col_block  = idx // block
+    within     = idx % block
+    row_in_col = within // layout.col_width
+    char_in_row = within % layout.col_width
+    # Layout: col0 starts at screen col 7, each next block step further
+    scr_col = 7 + col_block * step + char_in_row
     scr_row = base_row + row_in_col
     return scr_row, scr_col
 
-def _find_word_at(idx, word_positions):
-    for start, word in word_positions:
-        if start <= idx < start + len(word):
-            return start, word
-    return None, None
-
-def _find_bracket_at(idx, bracket_pairs):
-    for op, cl in bracket_pairs:
-        if idx == op or idx == cl:
-            return op, cl
-    return None, None
-
-def run_hacking_minigame(stdscr, username):
+def _cell_maps(layout, word_positions, bracket_pairs, base_row, step=None):
+    """
+    Precompute per-cell lookups once per puzzle.
+    Returns (cell_word, cell_bracket, screen) where cell_word[i] is the index
+    into word_positions covering cell i (or -1), cell_bracket[i] is the index
+    into bracket_pairs whose opener or closer sits on cell i (or -1), and
+    screen[i] is the (row, col) the cell is drawn at, with blocks step
+    columns apart (see _col_step).
+    """
+    total        = layout.total
+    cell_word    = [-1] * total
+    cell_bracket = [-1] * total
+    for wi, (start, word) in enumerate(word_positions):
+        for i in range(start, start + len(word)):
+            cell_word[i] = wi
+    for bi, (op, cl) in enumerate(bracket_pairs):
+        cell_bracket[op] = bi
+        cell_bracket[cl] = bi
+    screen = [_idx_to_screen(i, base_row, layout, step) for i in range(total)]
+    return cell_word, cell_bracket, screen
+
+def run_hacking_minigame(stdscr, username, seed=None, difficulty=None):
     """
     Run the hacking minigame. Returns True if password cracked, False if locked out.
+    difficulty defaults to the user's configured tier; seed makes the board
+    (and bracket effects) reproducible.
     """
-    answer    = random.choice(WORD_BANK)
-    chars, word_positions, bracket_pairs = _build_grid(answer)
-    total     = COLS * ROWS * COL_WIDTH
+    difficulty = difficulty or user_difficulty(username)
+    layout     = DIFFICULTIES[difficulty]
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    answer, chars, word_positions, bracket_pairs, rng = generate_puzzle(seed, layout=layout)
+    COLS, ROWS, COL_WIDTH = layout.cols, layout.rows, layout.col_width
+    MAX_TRIES = layout.tries
+    total     = layout.total
     cursor    = 0
     attempts  = MAX_TRIES
     log       = []   # right-panel log messages
-    duds_left = [w for _, w in word_positions if w != answer]
     BASE_ROW  = 5    # first grid row on screen
+    duds_left = [wi for wi, (_, w) in enumerate(word_positions) if w != answer]
+
+    step = _col_step(layout, stdscr.getmaxyx()[1])
+    cell_word, cell_bracket, screen = _cell_maps(layout, word_positions,
+                                                 bracket_pairs, BASE_ROW, step)
+    removed = [False] * len(word_positions)   # per word id: dud removed
+
+    # Hint engine: word ids still consistent with every likeness shown so far
+    likeness   = likeness_matrix([w for _, w in word_positions])
+    candidates = list(range(len(word_positions)))
+
+    def _span(idx):
+        """Cells highlighted while the cursor sits on idx."""
+        wi = cell_word[idx]
+        if wi >= 0:
+            start, word = word_positions[wi]
+            return range(start, start + len(word))
+        bi = cell_bracket[idx]
+        if bi >= 0:
+            op, cl = bracket_pairs[bi]
+            return range(op, cl + 1)
+        return range(idx, idx + 1)
+
+    def _draw_cell(i, hover, h):
+        sr, sc = screen[i]
+        if sr >= h - 2:
+            return
+        wi = cell_word[i]
+        if wi >= 0 and removed[wi]:
+            attr, ch = curses.color_pair(COLOR_DIM), '.'
+        elif i in hover:
+            attr, ch = curses.color_pair(COLOR_SELECTED) | curses.A_BOLD, chars[i]
+        else:
+            attr, ch = curses.color_pair(COLOR_NORMAL), chars[i]
+        try:
+            stdscr.addch(sr, sc, ch, attr)
+        except curses.error:
+            pass
 
-    # Removed duds tracker
-    removed_duds = set()
+    def _draw_cells(cells):
+        """Repaint only the given cells; used for cursor moves."""
+        h, _ = stdscr.getmaxyx()
+        hover = _span(cursor)
+        for i in cells:
+            _draw_cell(i, hover, h)
+        stdscr.noutrefresh()
+        curses.doupdate()
 
     def _draw():
+        nonlocal step
         stdscr.erase()
         h, w = stdscr.getmaxyx()
+        if _col_step(layout, w) != step:          # resized: re-place the blocks
+            step = _col_step(layout, w)
+            screen[:] = [_idx_to_screen(i, BASE_ROW, layout, step) for i in range(total)]
 
         # ── Header ───────────────────────────────────────────────────────────
         header = "ROBCO INDUSTRIES (TM) TERMLINK PROTOCOL"
@@ -157,7 +334,7 @@ def run_hacking_minigame(stdscr, username):
             pass
 
         #Hint
-        stdscr.addstr(h - 2, 2, "TAB = Next Column  |  q = cancel",
+        stdscr.addstr(h - 2, 2, "TAB = Next Column  |  h = hint  |  q = cancel",
                           curses.color_pair(COLOR_DIM))
 
         # ── Hex addresses ────────────────────────────────────────────────────
@@ -165,7 +342,7 @@ def run_hacking_minigame(stdscr, username):
         for col_block in range(COLS):
             for row in range(ROWS):
                 addr = base_addr + (col_block * ROWS + row) * COL_WIDTH
-                scr_col = 1 + col_block * (COL_WIDTH + 14)
+                scr_col = 1 + col_block * step
                 scr_row = BASE_ROW + row
                 try:
                     stdscr.addstr(scr_row, scr_col, f"0x{addr:04X}",
@@ -174,47 +351,13 @@ def run_hacking_minigame(stdscr, username):
                     pass
 
         # ── Grid characters ───────────────────────────────────────────────
-        # Figure out what cursor is hovering over
-        hover_word_start, hover_word = _find_word_at(cursor, word_positions)
-        hover_bracket = _find_bracket_at(cursor, bracket_pairs)
-        if hover_bracket == (None, None):
-            hover_bracket = None
-
-        for i, ch in enumerate(chars):
-            sr, sc = _idx_to_screen(i, BASE_ROW)
-            if sr >= h - 2:
-                continue
-
-            on_removed_word = any(
-                start <= i < start + WORD_LEN
-                for start, word in word_positions
-                if word in removed_duds
-            )
-
-            if on_removed_word:
-                attr = curses.color_pair(COLOR_DIM)
-                ch_show = '.'
-            elif hover_word_start is not None and hover_word_start <= i < hover_word_start + WORD_LEN:
-                attr = curses.color_pair(COLOR_SELECTED) | curses.A_BOLD
-                ch_show = ch
-            elif hover_bracket and hover_bracket[0] <= i <= hover_bracket[1]:
-                attr = curses.color_pair(COLOR_SELECTED) | curses.A_BOLD
-                ch_show = ch
-            elif i == cursor:
-                attr = curses.color_pair(COLOR_SELECTED) | curses.A_BOLD
-                ch_show = ch
-            else:
-                attr = curses.color_pair(COLOR_NORMAL)
-                ch_show = ch
-
-            try:
-                stdscr.addch(sr, sc, ch_show, attr)
-            except curses.error:
-                pass
+        hover = _span(cursor)
+        for i in range(total):
+            _draw_cell(i, hover, h)
 
         # ── Right panel log ───────────────────────────────────────────────
-        # col1 chars end at: 7 + (COL_WIDTH+14) + COL_WIDTH = 45; add gap
-        panel_col = 7 + (COL_WIDTH + 14) + COL_WIDTH + 4
+        # last column's chars end at 7 + (COLS-1)*step + COL_WIDTH; add gap
+        panel_col = 7 + (COLS - 1) * step + COL_WIDTH + 4
         try:
             stdscr.addstr(BASE_ROW - 1, panel_col, ">",
                           curses.color_pair(COLOR_NORMAL))
@@ -239,8 +382,19 @@ def run_hacking_minigame(stdscr, username):
     stdscr.nodelay(False)
     curses.curs_set(0)
 
+    # A cursor move only repaints the cells whose highlight changed; anything
+    # that touches the log, attempts or removed duds repaints the full frame.
+    full_redraw = True
+    prev_span   = None
     while True:
-        _draw()
+        if full_redraw:
+            _draw()
+            full_redraw = False
+        elif prev_span is not None:
+            new_span = _span(cursor)
+            if new_span != prev_span:
+                _draw_cells(set(prev_span).union(new_span))
+        prev_span = _span(cursor)
         key = stdscr.getch()
 
         if key == -1:
@@ -249,6 +403,7 @@ def run_hacking_minigame(stdscr, username):
         elif key == curses.KEY_RESIZE:
             init_colors()
             stdscr.clear()
+            full_redraw = True
             continue
 
         elif key in (curses.KEY_RIGHT, ord('d')):
@@ -285,21 +440,15 @@ def run_hacking_minigame(stdscr, username):
 
         elif key in (curses.KEY_ENTER, 10, 13, ord(' ')):
             # ── Select ───────────────────────────────────────────────────
-            try:
-                word_start, sel_word = _find_word_at(cursor, word_positions)
-            except Exception:
-                word_start, sel_word = None, None
-            try:
-                bracket = _find_bracket_at(cursor, bracket_pairs)
-                if bracket == (None, None):
-                    bracket = None
-            except Exception:
-                bracket = None
+            full_redraw = True
+            wi = cell_word[cursor]
+            bi = cell_bracket[cursor]
+            sel_word = word_positions[wi][1] if wi >= 0 else None
 
-            if sel_word is None and bracket is None:
+            if wi < 0 and bi < 0:
                 pass   # junk character — do nothing
 
-            elif sel_word and sel_word not in removed_duds:
+            elif wi >= 0 and not removed[wi]:
                 log.append(f">{sel_word}")
                 if sel_word == answer:
                     _draw()
@@ -307,6 +456,8 @@ def run_hacking_minigame(stdscr, username):
                     log.append(">Please wait")
                     log.append(">...")
                     _draw()
+                    audit("hacking", username, result="cracked",
+                          guesses=MAX_TRIES - attempts + 1)
                     time.sleep(1.5)
                     from ui import _halfdelay
                     set_show_status(True)
@@ -314,25 +465,27 @@ def run_hacking_minigame(stdscr, username):
                     return True
                 else:
                     lk = _likeness(sel_word, answer)
+                    candidates = narrow(likeness, candidates, wi, lk)
                     log.append(f">Entry denied")
-                    log.append(f">{lk}/{WORD_LEN} correct.")
+                    log.append(f">{lk}/{len(answer)} correct.")
                     attempts -= 1
                     if attempts <= 0:
                         log.append(">LOCKED OUT")
                         _draw()
+                        audit("hacking", username, result="locked_out")
                         time.sleep(2)
                         from ui import _halfdelay
                         set_show_status(True)
                         _halfdelay()
                         return False
 
-            elif bracket:
-                op, cl = bracket
-                bracket_pairs.remove(bracket)
+            elif bi >= 0:
+                op, cl = bracket_pairs[bi]
+                cell_bracket[op] = cell_bracket[cl] = -1
                 # Flash the bracket span
                 for _ in range(1):
                     for fi in range(op, cl + 1):
-                        fsr, fsc = _idx_to_screen(fi, BASE_ROW)
+                        fsr, fsc = screen[fi]
                         try:
                             stdscr.addch(fsr, fsc, chars[fi],
                                          curses.color_pair(COLOR_STATUS) | curses.A_BOLD)
@@ -344,10 +497,12 @@ def run_hacking_minigame(stdscr, username):
                     _draw()
                     time.sleep(0.08)
                 # Apply effect
-                if duds_left and random.random() < 0.5:
-                    dud = random.choice(duds_left)
+                if duds_left and rng.random() < 0.5:
+                    dud = rng.choice(duds_left)
                     duds_left.remove(dud)
-                    removed_duds.add(dud)
+                    removed[dud] = True
+                    if dud in candidates:
+                        candidates.remove(dud)
                     log.append(">Dud removed.")
                 else:
                     if attempts < MAX_TRIES:
@@ -356,7 +511,15 @@ def run_hacking_minigame(stdscr, username):
                     else:
                         log.append(">No effect.")
 
+        elif key in (ord('h'), ord('H')):
+            hint = best_guess(likeness, candidates)
+            if hint is not None:
+                log.append(f">Hint: {word_positions[hint][1]}")
+                log.append(f">{len(candidates)} possible")
+                full_redraw = True
+
         elif key in (ord('q'), ord('Q'), 27):
+            audit("hacking", username, result="cancelled")
             from ui import _halfdelay
             set_show_status(True)
             _halfdelay()
@@ -0,0 +1,104 @@
+"""
+Likeness matrix, hint and board-quality engine for the hacking minigame.
+
+The matrix holds likeness(words[i], words[j]) for every pair and is built
+in one batched pass, vectorised with NumPy when it is installed. Everything
+else works on word indices into that matrix.
+"""
+from functools import lru_cache
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# ─── Likeness matrix ──────────────────────────────────────────────────────────
+def likeness_matrix(words) -> list[list[int]]:
+    """m[i][j] = number of positions where words[i] and words[j] agree."""
+    n = len(words)
+    if not n:
+        return []
+    length = len(words[0])
+    if _np is not None and all(len(w) == length for w in words):
+        a = _np.frombuffer("".join(words).encode("ascii"), dtype=_np.uint8)
+        a = a.reshape(n, length)
+        return (a[:, None, :] == a[None, :, :]).sum(axis=2).tolist()
+    m = [[0] * n for _ in range(n)]
+    for i in range(n):
+        wi, row = words[i], m[i]
+        row[i] = len(wi)
+        for j in range(i + 1, n):
+            wj = words[j]
+            row[j] = m[j][i] = sum(a == b for a, b in zip(wi, wj))
+    return m
+
+# ─── Candidate reasoning ──────────────────────────────────────────────────────
+def narrow(m, candidates, guess, likeness):
+    """Candidates still possible after `guess` scored `likeness`."""
+    row = m[guess]
+    return [c for c in candidates if c != guess and row[c] == likeness]
+
+def _partition(m, candidates, guess):
+    row, groups = m[guess], {}
+    for c in candidates:
+        if c != guess:
+            groups.setdefault(row[c], []).append(c)
+    return groups
+
+def expected_remaining(m, candidates, guess) -> float:
+    """Mean number of candidates left after guessing `guess`, answer uniform."""
+    groups = _partition(m, candidates, guess)
+    return sum(len(g) ** 2 for g in groups.values()) / len(candidates)
+
+def best_guess(m, candidates, guesses=None):
+    """
+    The guess (from `guesses`, default the candidates) that minimises the
+    expected remaining candidates. Ties go to a word that could itself be
+    the answer, then to the lowest index so results are deterministic.
+    """
+    cands = list(candidates)
+    if len(cands) <= 2:
+        return min(cands) if cands else None
+    pool  = cands if guesses is None else list(guesses)
+    alive = set(cands)
+    return min(pool, key=lambda g: (expected_remaining(m, cands, g), g not in alive, g))
+
+def worst_case_guesses(m, candidates) -> int:
+    """
+    Guesses the best_guess strategy needs to be sure of a win, counting the
+    final correct guess. Guesses are limited to still-possible words, as on
+    the in-game board.
+    """
+    @lru_cache(maxsize=None)
+    def solve(cands):
+        if len(cands) == 1:
+            return 1
+        g = best_guess(m, cands)
+        groups = _partition(m, cands, g)
+        return 1 + max((solve(tuple(grp)) for grp in groups.values()), default=0)
+    return solve(tuple(sorted(candidates)))
+
+# ─── Board quality ────────────────────────────────────────────────────────────
+def rate_board(words, max_tries) -> str:
+    """
+    "trivial" when one guess always pins down the answer, "unwinnable" when
+    the solver cannot guarantee a win within max_tries, "ok" otherwise.
+    """
+    m     = likeness_matrix(words)
+    worst = worst_case_guesses(m, range(len(words)))
+    if worst <= 2:
+        return "trivial"
+    if worst > max_tries:
+        return "unwinnable"
+    return "ok"
+
+def simulate(words, answer_idx, m=None) -> int:
+    """Play a board with best_guess; returns guesses taken (answer included)."""
+    m = m or likeness_matrix(words)
+    cands, taken = list(range(len(words))), 0
+    while True:
+        g = best_guess(m, cands)
+        taken += 1
+        if g == answer_idx:
+            return taken
+        cands = narrow(m, cands, g, m[g][answer_idx])
@@ -1,9 +1,13 @@
 import shutil
 import subprocess
+import pkgdb
+import pkgindex
+import pkgsearch
 from config import (load_apps, save_apps, load_games, save_games,
                     load_networks, save_networks)
-from ui import run_menu, curses_input, curses_confirm, curses_message, curses_pager, curses_box_message
+from ui import run_menu, run_lazy_menu, curses_input, curses_confirm, curses_message, curses_pager, curses_box_message
 from launcher import _suspend, _resume
+from connectivity import has_internet, invalidate, start as start_connectivity
 
 PACKAGE_MANAGERS = {
     'brew':    [],
@@ -14,33 +18,35 @@ PACKAGE_MANAGERS = {
     'zypper':  ['-n'],
 }
 
-def has_internet():
-    try:
-        import urllib.request
-        urllib.request.urlopen("https://www.google.com", timeout=3)
-        return True
-    except Exception:
-        return False
-
 def detect_package_manager():
     for pm in PACKAGE_MANAGERS:
         if shutil.which(pm):
             return pm
     return None
 
+def detect_package_managers():
+    """Every supported manager on PATH, in PACKAGE_MANAGERS order."""
+    return [pm for pm in PACKAGE_MANAGERS if shutil.which(pm)]
+
 def is_installed(cmd):
     return shutil.which(cmd) is not None
 
-def search_packages(pm, query):
-    try:
-        result = subprocess.run([pm, "search", query],
-                                capture_output=True, text=True, timeout=10)
-        lines = result.stdout.strip().split("\n")
-        return [l for l in lines if l.strip() and not l.startswith("=")]
-    except Exception:
-        return []
+def install_command(pm, pkg, remote=""):
+    flags = PACKAGE_MANAGERS.get(pm, [])
+    if pm == "brew":
+        return [pm, "install"] + flags + [pkg]
+    if pm == "flatpak":
+        return ["flatpak", "install", "-y"] + ([remote] if remote else []) + [pkg]
+    return ["sudo", pm, "install"] + flags + [pkg]
 
 def get_package_info(pm, pkg):
+    source = pkgindex.manager_for(pm)
+    hit = pkgindex.shared().lookup(pkg, source) if source else None
+    if hit is not None and hit.summary:
+        size = pkgdb.format_size(hit.size)
+        return f"{hit.summary}  ({hit.version}{', ' + size if size else ''})"
+    if not has_internet():
+        return "No internet - description unavailable."
     try:
         if pm == "brew":
             result = subprocess.run(["brew", "info", pkg],
@@ -76,6 +82,10 @@ def get_package_info(pm, pkg):
         return "Could not fetch description."
 
 def get_installed_packages(pm):
+    """Packages (name, version, size) from pkgdb, else parsed from the PM's list command."""
+    native = pkgdb.installed(pm)
+    if native is not None:
+        return native
     try:
         if pm == "brew":
             result = subprocess.run(["brew", "list"],
@@ -100,7 +110,7 @@ def get_installed_packages(pm):
                 continue
             name = l.split()[0].split("/")[0]   # strip /source,now for apt
             if name:
-                pkgs.append(name)
+                pkgs.append(pkgdb.Package(name, "", None))
         return pkgs
     except Exception:
         return []
@@ -112,11 +122,15 @@ def appstore_menu(stdscr):
         curses_message(stdscr, "Access denied. Admin only.")
         return
     pm = detect_package_manager()
+    managers = detect_package_managers()
+    sources  = pkgsearch.available_sources(managers)
+    start_connectivity()
+    pkgindex.shared().start()
 
     while True:
         result = run_menu(stdscr, "Program Installer",
                           ["Search", "Installed Apps", "---", "Back"],
-                          subtitle=f"Package Manager: {pm or 'Not Found'}")
+                          subtitle=f"Package Managers: {', '.join(sources) or 'Not Found'}")
         if result == "Back":
             break
 
@@ -124,63 +138,38 @@ def appstore_menu(stdscr):
             query = curses_input(stdscr, "Search packages:")
             if not query:
                 continue
-            if not has_internet():
-                curses_message(stdscr, "Error: No internet connection")
-                continue
-            curses_message(stdscr, "Searching...", 0.5)
-            results = search_packages(pm, query)
-            if not results:
-                curses_message(stdscr, "No results found.")
-                continue
-            page = 0
-            while True:
-                h, w = stdscr.getmaxyx()
-                max_per_page = max(5, h - 18)
-                start = page * max_per_page
-                end = start + max_per_page
-                page_results = results[start:end]
-                total_pages = max(1, (len(results) - 1) // max_per_page + 1)
-                choices = []
-                for r in page_results:
-                    cmd = r.split()[0]
-                    status = "[installed]" if is_installed(cmd) else "[get]      "
-                    choices.append(f"{status} {r}")
-                if page > 0:
-                    choices.append("< Prev Page")
-                if end < len(results):
-                    choices.append("> Next Page")
-                choices += ["---", "Back"]
-                pkg_result = run_menu(stdscr, "Program Installer", choices,
-                                      subtitle=f"Results: {query}  |  Page {page + 1}/{total_pages}")
-                if pkg_result == "Back":
-                    break
-                elif pkg_result == "> Next Page":
-                    page += 1
-                elif pkg_result == "< Prev Page":
-                    page -= 1
-                else:
-                    pkg = pkg_result.split()[1]
-                    if is_installed(pkg):
+            search = pkgsearch.PackageSearch(query, managers).start()
+            try:
+                while True:
+                    pkg_result = run_lazy_menu(stdscr, "Program Installer", search,
+                                               subtitle=f"Results: {query}")
+                    if pkg_result in (None, "Back"):
+                        break
+                    found = search.result(pkg_result)
+                    if found is None:
+                        continue
+                    hit, have = found
+                    pkg = hit.name
+                    if have:
                         curses_message(stdscr, f"{pkg} is already installed.")
-                    elif pm is None:
-                        curses_message(stdscr, "Error: No supported package manager found.")
-                    else:
-                        info = get_package_info(pm, pkg) if has_internet() else "No internet - description unavailable."
-                        curses_pager(stdscr, f"{pkg}\n\n{info}", title="Package Info")
-                        if curses_confirm(stdscr, f"Install {pkg}?"):
-                            flags = PACKAGE_MANAGERS.get(pm, [])
-                            launch_cmd = ([pm, "install"] + flags + [pkg] if pm == "brew"
-                                          else ["sudo", pm, "install"] + flags + [pkg])
-                            _suspend(stdscr)
-                            proc = subprocess.run(launch_cmd)
-                            _resume(stdscr)
-                            if proc.returncode == 0:
-                                curses_box_message(stdscr, f"{pkg} installed successfully!")
-                            else:
-                                curses_box_message(stdscr, f"Failed to install {pkg}.")
+                        continue
+                    info = hit.summary or get_package_info(hit.manager, pkg)
+                    if hit.version:
+                        info = f"{info}\n\nVersion: {hit.version}"
+                    curses_pager(stdscr, f"{pkg}  ({hit.manager})\n\n{info}", title="Package Info")
+                    if curses_confirm(stdscr, f"Install {pkg} with {hit.manager}?"):
+                        _suspend(stdscr)
+                        proc = subprocess.run(install_command(hit.manager, pkg, hit.remote))
+                        _resume(stdscr)
+                        if proc.returncode == 0:
+                            curses_box_message(stdscr, f"{pkg} installed successfully!")
+                        else:
+                            invalidate()              # a failed download may mean we went offline
+                            curses_box_message(stdscr, f"Failed to install {pkg}.")
+            finally:
+                search.cancel()
 
         elif result == "Installed Apps":
-            curses_message(stdscr, "Loading...", 0.5)
             installed = get_installed_packages(pm)
             if not installed:
                 curses_message(stdscr, "No installed packages found.")
@@ -190,21 +179,26 @@ def appstore_menu(stdscr):
             while True:
                 h, w = stdscr.getmaxyx()
                 max_items = max(3, h - 18)
-                filtered = ([p for p in installed if filter_query.lower() in p.lower()]
+                filtered = ([p for p in installed if filter_query.lower() in p.name.lower()]
                             if filter_query else installed)
                 start = page * max_items
                 end = start + max_items
                 page_results = filtered[start:end]
                 total_pages = max(1, (len(filtered) - 1) // max_items + 1)
                 search_label = f"Search: {filter_query}" if filter_query else "Search..."
-                choices = [search_label, "---"] + [f"  {p}" for p in page_results]
+                total = sum(p.size or 0 for p in filtered)
+                total_size = f", {pkgdb.format_size(total)}" if total else ""
+                width = max((len(p.name) for p in page_results), default=0)
+                choices = [search_label, "---"] + [
+                    f"  {p.name:<{width}}  {p.version:<20} {pkgdb.format_size(p.size):>9}".rstrip()
+                    for p in page_results]
                 if page > 0:
                     choices.append("< Prev Page")
                 if end < len(filtered):
                     choices.append("> Next Page")
                 choices += ["---", "Back"]
                 pkg_result = run_menu(stdscr, "Installed Apps", choices,
-                                      subtitle=f"{len(filtered)} packages  |  Page {page + 1}/{total_pages}")
+                                      subtitle=f"{len(filtered)} packages{total_size}  |  Page {page + 1}/{total_pages}")
                 if pkg_result == "Back":
                     break
                 elif pkg_result == "> Next Page":
@@ -215,9 +209,8 @@ def appstore_menu(stdscr):
                     filter_query = curses_input(stdscr, "Filter packages:")
                     page = 0
                 else:
-                    pkg = pkg_result.strip()
-                    info = (get_package_info(pm, pkg) if has_internet()
-                            else "No internet - description unavailable.")
+                    pkg = pkg_result.split()[0]
+                    info = get_package_info(pm, pkg)
                     action = run_menu(stdscr, pkg,
                                       ["Update", "Reinstall", "Uninstall", "Add to Menu", "---", "Back"],
                                       subtitle=info)
@@ -246,6 +239,7 @@ def appstore_menu(stdscr):
                             if proc.returncode == 0:
                                 curses_box_message(stdscr, f"{pkg} reinstalled.")
                             else:
+                                invalidate()
                                 curses_box_message(stdscr, f"Failed to reinstall {pkg}.")
                     elif action == "Uninstall":
                         if curses_confirm(stdscr, f"Uninstall {pkg}?"):
@@ -272,6 +266,7 @@ def appstore_menu(stdscr):
                             if proc.returncode == 0:
                                 curses_box_message(stdscr, f"{pkg} updated.")
                             else:
+                                invalidate()
                                 curses_box_message(stdscr, f"Failed to update {pkg}.")
                     elif action == "Add to Menu":
                         menu_choice = run_menu(stdscr, "Add to Menu",
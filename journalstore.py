@@ -0,0 +1,342 @@
+"""
+Journal storage: journal_entries/<user>/<date>.txt plus a compact per-user
+index in .cache/journal/<user>.idx.
+
+Every entry the journal writes starts with a marker line
+
+    --- entry 14:05:09 ---
+
+so a day file can hold several entries and still reads as plain text. Text
+before the first marker (files written before markers existed) counts as
+one entry. The files stay the source of truth: the index remembers each
+file's mtime and size and re-parses only files that no longer match.
+
+Index layout, one slot per entry, sorted by date then position in file:
+
+    dates     "YYYY-MM-DD" (file stem); bisect gives a date range
+    entries   (offset, length, marker length, words, time, preview)
+    files     date -> (mtime_ns, size)
+    postings  word -> varint-coded gaps between entry numbers
+    last      word -> last entry number in its postings, for cheap appends
+
+Saving a new entry for today appends to the postings in place; any other
+change renumbers the postings from the old ones without reading files.
+"""
+import bisect
+import marshal
+import os
+import re
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from config import CACHE_DIR
+from fulltext import tokenize, _put_varint, _get_varint
+
+JOURNAL_DIR   = Path("journal_entries")
+INDEX_DIR     = CACHE_DIR / "journal"
+INDEX_VERSION = 1
+PREVIEW_CHARS = 60
+
+_MARK = re.compile(rb"^--- entry (\d\d:\d\d(?::\d\d)?) ---\r?\n", re.M)
+
+class JournalChanged(Exception):
+    """The day file changed on disk since the entry was read."""
+
+def journal_dir(user: str | None) -> Path:
+    return JOURNAL_DIR / user if user else JOURNAL_DIR
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+def _ids(buf) -> list[int]:
+    out, i, n = [], 0, -1
+    while i < len(buf):
+        gap, i = _get_varint(buf, i)
+        n += gap + 1
+        out.append(n)
+    return out
+
+def _encode(ids) -> bytearray:
+    out, prev = bytearray(), -1
+    for n in ids:
+        _put_varint(out, n - prev - 1)
+        prev = n
+    return out
+
+def parse(data: bytes):
+    """((offset, length, marker length, words, time, preview), words set) per entry."""
+    marks  = list(_MARK.finditer(data))
+    chunks = []
+    first  = marks[0].start() if marks else len(data)
+    if data[:first].strip():
+        chunks.append((0, first, 0, ""))
+    for k, m in enumerate(marks):
+        end = marks[k + 1].start() if k + 1 < len(marks) else len(data)
+        chunks.append((m.start(), end - m.start(), m.end() - m.start(),
+                       m.group(1).decode("ascii")))
+    out = []
+    for offset, length, skip, when in chunks:
+        body = data[offset + skip:offset + length].decode("utf-8", "ignore")
+        preview = next((line.strip() for line in body.splitlines() if line.strip()), "")
+        out.append(((offset, length, skip, len(body.split()), when, preview[:PREVIEW_CHARS]),
+                    set(tokenize(body))))
+    return out
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+class JournalStore:
+    def __init__(self, folder: Path, index_path: Path):
+        self.folder     = Path(folder)
+        self.index_path = Path(index_path)
+        self.dates    = []
+        self.entries  = []
+        self.files    = {}
+        self.postings = {}
+        self.last     = {}
+        self.lock     = threading.Lock()
+        try:
+            with open(self.index_path, "rb") as f:
+                version, *data = marshal.load(f)
+            if version == INDEX_VERSION:
+                self.dates, self.entries, self.files, self.postings, self.last = data
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    def path(self, day: str) -> Path:
+        return self.folder / f"{day}.txt"
+
+    # ─── Maintenance ─────────────────────────────────────────────────────────
+    def refresh(self) -> bool:
+        """Re-read day files whose mtime or size changed; True if anything did."""
+        seen = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for e in it:
+                    if e.name.endswith(".txt") and e.is_file():
+                        st = e.stat()
+                        seen[e.name[:-4]] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        with self.lock:
+            changed = [d for d, sig in seen.items() if self.files.get(d) != sig]
+            removed = [d for d in self.files if d not in seen]
+            if not changed and not removed:
+                return False
+            self._update(changed, removed)
+        self.save()
+        return True
+
+    def _update(self, changed, removed):
+        """Replace the entries of changed days (read from disk) and drop removed ones."""
+        fresh = {}
+        for day in changed:
+            try:
+                path = self.path(day)
+                st   = path.stat()
+                fresh[day] = parse(path.read_bytes())
+                self.files[day] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                removed.append(day)
+        for day in removed:
+            self.files.pop(day, None)
+        gone = set(removed) | set(fresh)
+        last = self.dates[-1] if self.dates else ""
+        kept = len(self.dates) - bisect.bisect_left(self.dates, last) if last in fresh else 0
+        if (all(d > last for d in gone - {last}) and last not in removed and
+                [e for e, _ in fresh.get(last, ())[:kept]] == self.entries[len(self.entries) - kept:]):
+            # Only new entries after everything indexed (the usual save of
+            # today's entry): append them in place.
+            for day in sorted(fresh):
+                for entry, words in fresh[day][kept if day == last else 0:]:
+                    self._append(day, entry, words)
+            return
+        rows = [(d, i, None) for i, d in enumerate(self.dates) if d not in gone]
+        rows += [(d, k, fresh[d][k]) for d in fresh for k in range(len(fresh[d]))]
+        rows.sort(key=lambda r: r[:2])
+        dates, entries, remap, new_words = [], [], {}, []
+        for n, (day, ref, parsed) in enumerate(rows):
+            dates.append(day)
+            if parsed is None:
+                remap[ref] = n
+                entries.append(self.entries[ref])
+            else:
+                entries.append(parsed[0])
+                new_words.append((n, parsed[1]))
+        postings = {}
+        for word, buf in self.postings.items():
+            ids = [remap[i] for i in _ids(buf) if i in remap]
+            if ids:
+                postings[word] = ids
+        for n, words in new_words:
+            for word in words:
+                postings.setdefault(word, []).append(n)
+        self.postings, self.last = {}, {}
+        for word, ids in postings.items():
+            ids.sort()
+            self.postings[word] = _encode(ids)
+            self.last[word] = ids[-1]
+        self.dates, self.entries = dates, entries
+
+    def _append(self, day, entry, words):
+        n = len(self.entries)
+        self.dates.append(day)
+        self.entries.append(entry)
+        for word in words:
+            buf = self.postings.get(word)
+            if type(buf) is not bytearray:
+                buf = self.postings[word] = bytearray(buf or b"")
+            _put_varint(buf, n - self.last.get(word, -1) - 1)
+            self.last[word] = n
+
+    def save(self):
+        with self.lock:
+            data = marshal.dumps((INDEX_VERSION, self.dates, self.entries, self.files,
+                                  self.postings, self.last))
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass
+
+    # ─── Queries ─────────────────────────────────────────────────────────────
+    def date_range(self, start: str | None = None, end: str | None = None) -> range:
+        """Entry numbers dated start..end inclusive (either end open)."""
+        lo = bisect.bisect_left(self.dates, start) if start else 0
+        hi = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return range(lo, hi)
+
+    def matching(self, query: str) -> list[int] | None:
+        """Entry numbers containing every word of query; None for an empty query."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return None
+        bufs = [self.postings.get(w) for w in words]
+        if not all(bufs):
+            return []
+        bufs.sort(key=len)
+        hits = _ids(bufs[0])
+        for buf in bufs[1:]:
+            other = set(_ids(buf))
+            hits  = [n for n in hits if n in other]
+        return hits
+
+    def query(self, start=None, end=None, words="") -> list[int]:
+        """Entry numbers matching the filters, newest first."""
+        span = self.date_range(start, end)
+        hits = self.matching(words)
+        if hits is not None:
+            lo, hi = span.start, span.stop
+            return [n for n in reversed(hits) if lo <= n < hi]
+        return list(reversed(span))
+
+    def label(self, n: int) -> str:
+        _, _, _, words, when, preview = self.entries[n]
+        stamp = f"{self.dates[n]} {when[:5]}" if when else self.dates[n]
+        return f"{stamp:<16}  {preview}  ({words} words)"
+
+    def _read(self, n: int) -> bytes:
+        day = self.dates[n]
+        offset, length = self.entries[n][:2]
+        path = self.path(day)
+        st   = path.stat()
+        if (st.st_mtime_ns, st.st_size) != self.files.get(day):
+            raise JournalChanged(day)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def read(self, n: int) -> str:
+        """The entry's text, without its marker line."""
+        skip = self.entries[n][2]
+        return self._read(n)[skip:].decode("utf-8", "ignore").rstrip("\n")
+
+    # ─── Writes ──────────────────────────────────────────────────────────────
+    def append(self, text: str, day: str | None = None, when: str | None = None):
+        """Add an entry to a day file (today by default)."""
+        day  = day or date.today().isoformat()
+        when = when or time.strftime("%H:%M:%S")
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.path(day), "ab") as f:
+            f.write(f"--- entry {when} ---\n{text.rstrip()}\n".encode("utf-8"))
+        self.refresh()
+
+    def _splice(self, n: int, data: bytes):
+        """Replace entry n's bytes (marker included) with data."""
+        self._read(n)                                  # raises JournalChanged
+        day = self.dates[n]
+        offset, length = self.entries[n][:2]
+        path = self.path(day)
+        old  = path.read_bytes()
+        new  = old[:offset] + data + old[offset + length:]
+        if new.strip():
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(new)
+            os.replace(tmp, path)
+        else:
+            path.unlink()
+        self.refresh()
+
+    def replace(self, n: int, text: str):
+        offset, length, skip = self.entries[n][:3]
+        marker = self._read(n)[:skip]
+        self._splice(n, marker + (text.rstrip() + "\n").encode("utf-8"))
+
+    def delete(self, n: int):
+        self._splice(n, b"")
+
+# ─── Browsing ─────────────────────────────────────────────────────────────────
+class JournalView:
+    """
+    Filtered entry list for run_lazy_menu; labels map back to entry numbers.
+    changes, a watcher.ChangeFlag on the folder, triggers a refresh.
+    """
+    def __init__(self, store: JournalStore, actions=(), changes=None):
+        self.store   = store
+        self.actions = list(actions)
+        self.changes = changes
+        self.start = self.end = None
+        self.words = ""
+        self.stale = True
+        self._choices, self._status, self.by_label = [], "", {}
+
+    def filters(self) -> str:
+        parts = []
+        if self.words:
+            parts.append(f'"{self.words}"')
+        if self.start or self.end:
+            parts.append(f"{self.start or '...'} to {self.end or '...'}")
+        return ", ".join(parts)
+
+    def snapshot(self):
+        if self.changes is not None and self.changes.take() and self.store.refresh():
+            self.stale = True
+        if self.stale:
+            self.stale = False
+            t0   = time.perf_counter()
+            hits = self.store.query(self.start, self.end, self.words)
+            ms   = (time.perf_counter() - t0) * 1000
+            self.by_label = {}
+            for n in hits:
+                label = self.store.label(n)
+                while label in self.by_label:
+                    label += " "
+                self.by_label[label] = n
+            self._choices = self.actions + ["---"] + list(self.by_label)
+            shown = self.filters()
+            self._status = (f"{len(hits)} of {len(self.store)} entries in {ms:.1f} ms"
+                            + (f"  |  {shown}" if shown else ""))
+        return self._choices, self._status
+
+    def entry(self, label: str) -> int | None:
+        return self.by_label.get(label)
+
+_stores = {}
+
+def store_for(user: str | None) -> JournalStore:
+    key = user or "_"
+    if key not in _stores:
+        _stores[key] = JournalStore(journal_dir(user), INDEX_DIR / f"{key}.idx")
+    return _stores[key]
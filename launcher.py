@@ -38,3 +38,14 @@ def launch_epy(stdscr, path):
     _suspend(stdscr)
     subprocess.run(['epy', str(path)])
     _resume(stdscr)
+
+def open_document(stdscr, path):
+    """Read .txt/.epub in-process; other formats, or books we cannot parse, go to epy."""
+    import reader
+    if path.suffix.lower() in reader.SUPPORTED:
+        try:
+            reader.read_book(stdscr, path)
+            return
+        except reader.BookError:
+            pass
+    launch_epy(stdscr, path)
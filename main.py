@@ -106,13 +106,113 @@ def launch_in_tmux():
     os.execvp("tmux", ["tmux", "attach-session", "-t", SESSION_NAME])
     return True
 
+# ─── Maintenance commands ─────────────────────────────────────────────────────
+# Run as `python main.py <command> [args]`; they never start curses or tmux.
+
+def cmd_migrate_users(args):
+    from userstore import store
+    if store.is_sharded():
+        print("Accounts are already stored per user.")
+        return 0
+    count = store.migrate()
+    print(f"Migrated {count} account(s) to {store.root}/<name>/account.json.")
+    return 0
+
+def _parse_time(val):
+    from datetime import datetime
+    return datetime.fromisoformat(val).timestamp()
+
+def cmd_audit(args):
+    """audit [--user NAME] [--event TYPE] [--since ISO] [--until ISO]"""
+    import json
+    from audit import log
+    opts = {"--user": None, "--event": None, "--since": None, "--until": None}
+    it = iter(args)
+    for a in it:
+        if a not in opts:
+            print(cmd_audit.__doc__)
+            return 1
+        opts[a] = next(it, None)
+    since = _parse_time(opts["--since"]) if opts["--since"] else None
+    until = _parse_time(opts["--until"]) if opts["--until"] else None
+    for e in log.query(user=opts["--user"], since=since, until=until,
+                       event=opts["--event"]):
+        print(json.dumps(e))
+    return 0
+
+def cmd_replay(args):
+    """replay FILE [--runs N]   replay a recorded session headlessly"""
+    if not args:
+        print(cmd_replay.__doc__)
+        return 1
+    from replay import replay
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 3
+    digests = set()
+    for i in range(runs):
+        r = replay(args[0])
+        digests.add(r["digest"])
+        per_key = sorted(r["per_key"]) or [0.0]
+        p50 = per_key[len(per_key) // 2] * 1000
+        p95 = per_key[min(len(per_key) - 1, int(len(per_key) * 0.95))] * 1000
+        print(f"run {i + 1}: {r['target']} -> {r['result']!r}  {r['keys']} keys, "
+              f"{r['frames']} frames, {r['elapsed'] * 1000:.1f} ms  "
+              f"(per key p50 {p50:.2f} ms, p95 {p95:.2f} ms)  {r['digest'][:16]}")
+    if len(digests) > 1:
+        print("Screen output differed between runs.")
+        return 1
+    print("Screen output identical across runs.")
+    return 0
+
+def cmd_backup(args):
+    """backup [create [LABEL] | list | restore-user NAME [SNAPSHOT]
+           | restore-entry NAME DATE [N] [SNAPSHOT]] [--repo DIR]"""
+    import backup
+    from pathlib import Path
+    if "--repo" in args:
+        i = args.index("--repo")
+        repo = backup.Repository(Path(args[i + 1]).expanduser())
+        args = args[:i] + args[i + 2:]
+    else:
+        repo = backup.Repository()
+    action, rest = (args[0], args[1:]) if args else ("create", [])
+    try:
+        if action == "create":
+            print(backup._describe(repo.create(label=rest[0] if rest else "")))
+        elif action == "list":
+            for name in repo.snapshots():
+                m = repo.manifest(name)
+                size = sum(f["size"] for f in m["files"].values())
+                print(f"{name}  {len(m['files'])} files, {size / 1048576:.1f} MB")
+        elif action == "restore-user" and rest:
+            count = backup.restore_user(repo, rest[0], rest[1] if len(rest) > 1 else None)
+            print(f"Restored {count} files for {rest[0]}.")
+        elif action == "restore-entry" and len(rest) >= 2:
+            n    = int(rest[2]) - 1 if len(rest) > 2 else 0
+            snap = rest[3] if len(rest) > 3 else None
+            done = backup.restore_entry(repo, rest[0], rest[1], n, snap)
+            print("Entry restored." if done else "Entry is already in the journal.")
+        else:
+            print(cmd_backup.__doc__)
+            return 1
+    except (backup.BackupError, OSError, IndexError, ValueError) as e:
+        print(f"backup: {e}")
+        return 1
+    return 0
+
+COMMANDS = {
+    "migrate-users": cmd_migrate_users,
+    "audit":         cmd_audit,
+    "replay":        cmd_replay,
+    "backup":        cmd_backup,
+}
+
 # ─── Main curses loop ─────────────────────────────────────────────────────────
 def main(stdscr, show_bootup=True):
     # All local imports deferred so preflight runs first
     import config
     from config import init_colors, playsound, SESSION_NAME, NUM_WINDOWS, LogoutException
     from status import draw_status
-    from ui import run_menu, curses_message, _halfdelay
+    from ui import curses_message, _halfdelay
     from apps import apps_menu, games_menu, network_menu
     from documents import documents_menu
     from installer import appstore_menu
@@ -120,6 +220,8 @@ def main(stdscr, show_bootup=True):
     from settings import settings_menu
     from boot import bootup_curses
     from auth import login_screen, clear_session
+    from audit import record as audit
+    from replay import maybe_record
     from config import set_current_user
 
     curses.curs_set(0)
@@ -144,12 +246,13 @@ def main(stdscr, show_bootup=True):
 
         try:
             while True:
-                result = run_menu(stdscr, "Main Menu",
-                                  ["Applications", "Documents", "Network", "Games",
-                                   "Program Installer", "Terminal",
-                                   "---", "Settings", "Logout"],
-                                  subtitle="RobcOS v.85")
+                result = maybe_record(stdscr, "menu", title="Main Menu",
+                                      choices=["Applications", "Documents", "Network", "Games",
+                                               "Program Installer", "Terminal",
+                                               "---", "Settings", "Logout"],
+                                      subtitle="RobcOS v.85")
                 if result == "Logout":
+                    audit("logout", current_user)
                     playsound('Sounds/ui_hacking_passbad.wav', False)
                     set_current_user(None)   # stop session checks before clearing token
                     curses_message(stdscr, "Logging out...", 1)
@@ -192,6 +295,9 @@ def main(stdscr, show_bootup=True):
 
 # ─── Entry point ──────────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     no_tmux  = "--no-tmux" in sys.argv
     is_first = "--first"   in sys.argv
 
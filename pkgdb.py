@@ -0,0 +1,206 @@
+"""
+Installed packages read straight from the package manager's database.
+
+    dpkg     /var/lib/dpkg/status             (apt, apt-get)
+    pacman   /var/lib/pacman/local/*/desc
+    rpm      rpm -qa --queryformat ...        (dnf, zypper; the rpmdb itself
+                                               is sqlite/BDB, so rpm reads it)
+    brew     <Cellar>/<name>/<version>/
+
+Each source is keyed on a signature of its database file (mtime_ns, size).
+Results are kept in memory and in .cache/pkgdb.bin, so a revisit, or the
+first visit after a restart, costs one stat while the database is
+unchanged. Packages carry the version and installed size the database
+already records; size is None where it does not.
+"""
+import marshal
+import os
+import subprocess
+import threading
+from collections import namedtuple
+from pathlib import Path
+from config import CACHE_DIR
+
+CACHE_FILE    = CACHE_DIR / "pkgdb.bin"
+CACHE_VERSION = 1
+
+DPKG_STATUS = Path("/var/lib/dpkg/status")
+PACMAN_DB   = Path("/var/lib/pacman/local")
+RPM_DBS     = [Path("/var/lib/rpm/rpmdb.sqlite"), Path("/var/lib/rpm/Packages.db"),
+               Path("/var/lib/rpm/Packages"), Path("/usr/lib/sysimage/rpm/rpmdb.sqlite"),
+               Path("/usr/lib/sysimage/rpm/Packages.db")]
+BREW_CELLARS = [Path("/opt/homebrew/Cellar"), Path("/usr/local/Cellar"),
+                Path("/home/linuxbrew/.linuxbrew/Cellar")]
+
+Package = namedtuple("Package", "name version size")   # size in bytes or None
+
+def _signature(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def format_size(size) -> str:
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+# ─── Readers ──────────────────────────────────────────────────────────────────
+def read_dpkg(path: Path = DPKG_STATUS) -> list[Package]:
+    """Installed stanzas of a dpkg status file (Installed-Size is in KiB)."""
+    out = []
+    with open(path, "rb") as f:
+        data = f.read()
+    for stanza in data.split(b"\n\n"):
+        name = version = status = None
+        size = None
+        for line in stanza.split(b"\n"):
+            if line[:1] in (b" ", b"\t"):
+                continue                       # continuation of a long field
+            key, _, value = line.partition(b": ")
+            if key == b"Package":
+                name = value
+            elif key == b"Status":
+                status = value
+            elif key == b"Version":
+                version = value
+            elif key == b"Installed-Size" and value.isdigit():
+                size = int(value) * 1024
+        if name and status and status.endswith(b" installed"):
+            out.append(Package(name.decode("utf-8", "replace"),
+                               (version or b"").decode("utf-8", "replace"), size))
+    return out
+
+def read_pacman(path: Path = PACMAN_DB) -> list[Package]:
+    """One desc file per package directory: %NAME%, %VERSION%, %SIZE% sections."""
+    out = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            try:
+                with open(os.path.join(entry.path, "desc"), "rb") as f:
+                    lines = f.read().split(b"\n")
+            except OSError:
+                continue
+            fields = {}
+            for i, line in enumerate(lines[:-1]):
+                if line.startswith(b"%") and line.endswith(b"%"):
+                    fields[line] = lines[i + 1]
+            name = fields.get(b"%NAME%")
+            if name:
+                size = fields.get(b"%SIZE%", b"")
+                out.append(Package(name.decode("utf-8", "replace"),
+                                   fields.get(b"%VERSION%", b"").decode("utf-8", "replace"),
+                                   int(size) if size.isdigit() else None))
+    return out
+
+def read_rpm(path: Path | None = None) -> list[Package]:
+    """rpm -qa with a tab-separated queryformat; path is only the cache key."""
+    result = subprocess.run(
+        ["rpm", "-qa", "--queryformat", r"%{NAME}\t%{VERSION}-%{RELEASE}\t%{SIZE}\n"],
+        capture_output=True, text=True, timeout=30)
+    out = []
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 3 and parts[0]:
+            out.append(Package(parts[0], parts[1], int(parts[2]) if parts[2].isdigit() else None))
+    return out
+
+def read_brew(path: Path) -> list[Package]:
+    """Cellar/<name>/<version>; the newest version directory wins."""
+    out = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir() and not entry.name.startswith("."):
+                try:
+                    versions = sorted(os.listdir(entry.path))
+                except OSError:
+                    versions = []
+                out.append(Package(entry.name, versions[-1] if versions else "", None))
+    return out
+
+def _rpm_db() -> Path | None:
+    return next((p for p in RPM_DBS if p.exists()), None)
+
+def _brew_cellar() -> Path | None:
+    env = os.environ.get("HOMEBREW_CELLAR")
+    cellars = [Path(env)] if env else BREW_CELLARS
+    return next((p for p in cellars if p.is_dir()), None)
+
+def source_for(pm: str | None):
+    """(reader, database path) for a package manager, or None if there is no native reader."""
+    if pm in ("apt", "apt-get") and DPKG_STATUS.exists():
+        return read_dpkg, DPKG_STATUS
+    if pm == "pacman" and PACMAN_DB.is_dir():
+        return read_pacman, PACMAN_DB
+    if pm in ("dnf", "zypper"):
+        db = _rpm_db()
+        return (read_rpm, db) if db else None
+    if pm == "brew":
+        cellar = _brew_cellar()
+        return (read_brew, cellar) if cellar else None
+    return None
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+_disk   = None         # str(path) -> (signature, [(name, version, size)]), as saved
+_memory = {}           # str(path) -> (signature, [Package])
+_lock   = threading.Lock()   # both caches and pkgdb.bin; search threads read at once
+
+def _load_cache() -> dict:
+    global _disk
+    if _disk is None:
+        _disk = {}
+        try:
+            with open(CACHE_FILE, "rb") as f:
+                version, data = marshal.load(f)
+            if version == CACHE_VERSION:
+                _disk = data
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+    return _disk
+
+def _save_cache():
+    # Called with _lock held.
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_name(CACHE_FILE.name + ".tmp")
+        tmp.write_bytes(marshal.dumps((CACHE_VERSION, _disk)))
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass
+
+def read_cached(reader, path: Path) -> list[Package]:
+    """reader(path), reusing the last result while path's signature is unchanged."""
+    key = str(path)
+    sig = _signature(path)
+    with _lock:
+        hit = _memory.get(key)
+        if hit is not None and sig is not None and hit[0] == sig:
+            return list(hit[1])
+        hit = _load_cache().get(key)
+        if hit is not None and sig is not None and hit[0] == sig:
+            packages = [Package(*p) for p in hit[1]]
+            _memory[key] = (sig, packages)
+            return list(packages)
+    packages = sorted(reader(path), key=lambda p: p.name.lower())     # outside the lock
+    with _lock:
+        if sig is not None:
+            _disk[key] = (sig, [tuple(p) for p in packages])
+            _save_cache()
+        _memory[key] = (sig, packages)
+    return list(packages)
+
+def installed(pm: str | None) -> list[Package] | None:
+    """Installed packages sorted by name; None when pm has no native reader."""
+    source = source_for(pm)
+    if source is None:
+        return None
+    try:
+        return read_cached(*source)
+    except (OSError, subprocess.SubprocessError):
+        return None
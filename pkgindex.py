@@ -0,0 +1,358 @@
+"""
+Offline package search over the metadata package managers keep on disk.
+
+    apt      /var/lib/apt/lists/*_Packages (+ *_i18n_Translation-en summaries)
+    pacman   /var/lib/pacman/sync/*.db              (tar of <pkg>/desc)
+    dnf      /var/cache/dnf/*/repodata/*primary.xml*, /var/cache/libdnf5/...
+    zypper   /var/cache/zypp/raw/*/repodata/*primary.xml*
+
+Plain, .gz, .xz and .bz2 files are read; other compressions are skipped.
+The index is rebuilt, on a background thread, only when the set of source
+files or any file's (mtime_ns, size) changes, i.e. after an apt update,
+pacman -Sy or dnf makecache. It is saved with marshal in .cache/pkgindex.bin:
+
+    packages  [(name, version, summary, installed size, manager), ...]
+    postings  term -> varint of (id gap << 1 | term is in the name)
+    terms     sorted term list, for prefix matches on the last query word
+
+Queries AND their words, the last one also matching as a prefix, and rank
+name hits above summary hits with a bonus for exact and prefix names.
+"""
+import bisect
+import bz2
+import glob
+import gzip
+import lzma
+import marshal
+import os
+import tarfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from config import CACHE_DIR
+from fulltext import tokenize, _put_varint, _get_varint
+
+INDEX_FILE    = CACHE_DIR / "pkgindex.bin"
+INDEX_VERSION = 1
+NAME_WEIGHT, TEXT_WEIGHT = 3, 1
+MAX_PREFIX_TERMS = 64
+SUMMARY_CHARS = 120
+
+SOURCES = {
+    "apt":    ["/var/lib/apt/lists/*_Packages*", "/var/lib/apt/lists/*_i18n_Translation-en*"],
+    "pacman": ["/var/lib/pacman/sync/*.db"],
+    "dnf":    ["/var/cache/dnf/*/repodata/*primary.xml*",
+               "/var/cache/libdnf5/*/repodata/*primary.xml*"],
+    "zypper": ["/var/cache/zypp/raw/*/repodata/*primary.xml*"],
+}
+MANAGER_OF = {"apt": "apt", "apt-get": "apt", "pacman": "pacman", "dnf": "dnf", "zypper": "zypper"}
+
+Hit = namedtuple("Hit", "name version summary size manager score")
+
+# ─── Readers ──────────────────────────────────────────────────────────────────
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+def _readable(path: str) -> bool:
+    base = os.path.basename(path)
+    if base.endswith((".gz", ".xz", ".bz2")):
+        base = base.rsplit(".", 1)[0]
+    return base.endswith(("_Packages", "_Translation-en", ".db", "primary.xml"))
+
+def _text(b: bytes) -> str:
+    return b.decode("utf-8", "replace")
+
+def read_apt(path: str):
+    """(name, version, summary, size) per stanza; Translation files give summaries only."""
+    with _open(path) as f:
+        data = f.read()
+    for stanza in data.split(b"\n\n"):
+        name = version = summary = None
+        size = None
+        for line in stanza.split(b"\n"):
+            if line[:1] in (b" ", b"\t"):
+                continue
+            key, _, value = line.partition(b": ")
+            if key == b"Package":
+                name = value
+            elif key == b"Version":
+                version = value
+            elif key in (b"Description", b"Description-en"):
+                summary = value
+            elif key == b"Installed-Size" and value.isdigit():
+                size = int(value) * 1024
+        if name:
+            yield (_text(name), _text(version) if version else None,
+                   _text(summary or b""), size)
+
+def read_pacman_sync(path: str):
+    with tarfile.open(path, "r:*") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith("/desc"):
+                continue
+            lines = tar.extractfile(member).read().split(b"\n")
+            fields = {}
+            for i, line in enumerate(lines[:-1]):
+                if line.startswith(b"%") and line.endswith(b"%"):
+                    fields[line] = lines[i + 1]
+            if b"%NAME%" in fields:
+                size = fields.get(b"%ISIZE%", b"")
+                yield (_text(fields[b"%NAME%"]), _text(fields.get(b"%VERSION%", b"")),
+                       _text(fields.get(b"%DESC%", b"")), int(size) if size.isdigit() else None)
+
+def read_primary_xml(path: str):
+    """rpm-md primary.xml, as cached by dnf and zypper; source packages skipped."""
+    with _open(path) as f:
+        name = version = summary = arch = None
+        size = None
+        for event, el in ET.iterparse(f, events=("end",)):
+            tag = el.tag.rpartition("}")[2]
+            if tag == "name":
+                name = el.text
+            elif tag == "arch":
+                arch = el.text
+            elif tag == "version":
+                version = el.get("ver", "") + ("-" + el.get("rel") if el.get("rel") else "")
+            elif tag == "summary":
+                summary = el.text or ""
+            elif tag == "size":
+                size = int(el.get("installed", 0)) or None
+            elif tag == "package":
+                if name and arch != "src":
+                    yield name, version or "", summary or "", size
+                name = version = summary = arch = None
+                size = None
+                el.clear()
+
+READERS = {"apt": read_apt, "pacman": read_pacman_sync, "dnf": read_primary_xml,
+           "zypper": read_primary_xml}
+
+def discover(sources=SOURCES) -> dict:
+    """path -> (manager, mtime_ns, size) for every metadata file on disk."""
+    out = {}
+    for manager, patterns in sources.items():
+        for pattern in patterns:
+            for path in glob.glob(pattern):
+                if not _readable(path):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                out[path] = (manager, st.st_mtime_ns, st.st_size)
+    return out
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+class PackageIndex:
+    def __init__(self, path=INDEX_FILE, sources=SOURCES):
+        self.path     = path
+        self.sources  = sources
+        self.files    = {}          # path -> (manager, mtime_ns, size) indexed
+        self.packages = []
+        self.postings = {}
+        self.terms    = []
+        self.managers = set()
+        self.build_seconds = 0.0
+        self.error    = None
+        self.thread   = None
+        self.lock     = threading.Lock()
+        self.loaded   = threading.Event()
+
+    def load(self):
+        """Read the saved index (a few hundred ms for a full Debian archive)."""
+        try:
+            with open(self.path, "rb") as f:
+                version, *data = marshal.load(f)
+            if version == INDEX_VERSION:
+                with self.lock:
+                    self.files, self.packages, self.postings, self.terms = data
+                    self.managers = {p[4] for p in self.packages}
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+        self.loaded.set()
+
+    def __len__(self):
+        return len(self.packages)
+
+    @property
+    def building(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Load and refresh on a background thread; searches use the old index meanwhile."""
+        with self.lock:
+            if not self.building:
+                self.thread = threading.Thread(target=self.refresh, daemon=True, name="pkgindex")
+                self.thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def refresh(self) -> bool:
+        """Rebuild if any source file was added, removed or changed; True if it was."""
+        if not self.loaded.is_set():
+            self.load()
+        files = discover(self.sources)
+        if files == self.files:
+            return False
+        t0 = time.perf_counter()
+        try:
+            self._build(files)
+        except OSError as e:
+            self.error = e.strerror or str(e)
+            return False
+        self.build_seconds = time.perf_counter() - t0
+        self.save()
+        return True
+
+    def _build(self, files):
+        packages, seen, summaries = [], {}, {}
+        for path in sorted(files):
+            manager = files[path][0]
+            try:
+                rows = list(READERS[manager](path))
+            except (OSError, EOFError, ValueError, tarfile.TarError,
+                    ET.ParseError, lzma.LZMAError):
+                continue
+            for name, version, summary, size in rows:
+                if version is None:               # apt Translation-en: summary only
+                    summaries.setdefault((manager, name), summary)
+                    continue
+                key = (manager, name)
+                if key not in seen:
+                    seen[key] = len(packages)
+                    packages.append([name, version, summary[:SUMMARY_CHARS], size, manager])
+        for (manager, name), summary in summaries.items():
+            i = seen.get((manager, name))
+            if i is not None and not packages[i][2]:
+                packages[i][2] = summary[:SUMMARY_CHARS]
+        packages.sort(key=lambda p: (p[0], p[4]))
+        postings = {}
+        for n, (name, _, summary, _, _) in enumerate(packages):
+            in_name = set(tokenize(name))
+            for term in in_name | set(tokenize(summary)):
+                postings.setdefault(term, []).append(n << 1 | (term in in_name))
+        encoded = {}
+        for term, ids in postings.items():
+            out, prev = bytearray(), 0
+            for v in ids:
+                _put_varint(out, ((v >> 1) - prev) << 1 | (v & 1))
+                prev = v >> 1
+            encoded[term] = bytes(out)
+        with self.lock:
+            self.files    = files
+            self.packages = [tuple(p) for p in packages]
+            self.postings = encoded
+            self.terms    = sorted(encoded)
+            self.managers = {p[4] for p in self.packages}
+
+    def save(self):
+        with self.lock:
+            data = marshal.dumps((INDEX_VERSION, self.files, self.packages,
+                                  self.postings, self.terms))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    # ─── Queries ─────────────────────────────────────────────────────────────
+    def _decode(self, term, weight, out):
+        buf = self.postings.get(term)
+        if not buf:
+            return
+        i, n = 0, 0
+        while i < len(buf):
+            v, i = _get_varint(buf, i)
+            n += v >> 1
+            w = (NAME_WEIGHT if v & 1 else TEXT_WEIGHT) * weight
+            if w > out.get(n, 0):
+                out[n] = w
+
+    def _prefixed(self, prefix):
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + "\uffff", lo)
+        return self.terms[lo:min(hi, lo + MAX_PREFIX_TERMS)]
+
+    def search(self, query: str, manager: str | None = None, limit: int = 500) -> list[Hit]:
+        """Best matches first; manager ("apt", "pacman", ...) limits the source."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        with self.lock:
+            packages = self.packages
+            scores   = None
+            for k, word in enumerate(words):
+                found = {}
+                self._decode(word, 1.0, found)
+                if k == len(words) - 1 and len(word) >= 2:
+                    for term in self._prefixed(word):
+                        if term != word:
+                            self._decode(term, 0.5, found)
+                if scores is None:
+                    scores = found
+                else:
+                    scores = {n: s + found[n] for n, s in scores.items() if n in found}
+                if not scores:
+                    return []
+        q    = query.strip().lower()
+        hits = []
+        for n, score in scores.items():
+            name, version, summary, size, mgr = packages[n]
+            if manager and mgr != manager:
+                continue
+            low = name.lower()
+            if low == q:
+                score += 100
+            elif low.startswith(q):
+                score += 10
+            hits.append(Hit(name, version, summary, size, mgr, score))
+        hits.sort(key=lambda h: (-h.score, len(h.name), h.name))
+        return hits[:limit]
+
+    def lookup(self, name: str, manager: str | None = None) -> Hit | None:
+        with self.lock:
+            packages = self.packages
+        i = bisect.bisect_left(packages, (name,))
+        while i < len(packages) and packages[i][0] == name:
+            if manager is None or packages[i][4] == manager:
+                return Hit(*packages[i], 0)
+            i += 1
+        return None
+
+_index = None
+
+def shared() -> PackageIndex:
+    global _index
+    if _index is None:
+        _index = PackageIndex()
+    return _index
+
+def manager_for(pm: str | None, wait: float = 10.0) -> str | None:
+    """
+    Index source name for a package manager command, if it has one with
+    data. Waits up to wait seconds for the saved index to load, or for the
+    very first build when there is nothing saved yet.
+    """
+    name = MANAGER_OF.get(pm)
+    if name is None:
+        return None
+    index = shared()
+    if not index.loaded.is_set():
+        index.start()
+    deadline = time.monotonic() + wait
+    index.loaded.wait(wait)
+    if not len(index) and index.building:
+        index.wait(max(0.0, deadline - time.monotonic()))
+    return name if name in index.managers else None
@@ -0,0 +1,299 @@
+"""
+Package search across every detected package manager at once.
+
+Each source gets its own thread. Managers covered by the offline index
+(pkgindex.py) answer from it in milliseconds; the rest run their own
+search command in a subprocess whose output is parsed line by line, so
+results reach the menu while a slow backend is still working. Flatpak is
+searched alongside the system manager when it is installed.
+
+snapshot() feeds run_lazy_menu: results ranked by how well the name
+matches, and a status line with each source's progress. Which results are
+already installed is resolved on a thread of its own, so a slow rpm -qa or
+flatpak list never holds back a source's first result; results are marked
+"[?]" until it answers. cancel() (Back
+or Esc in the menu) kills whatever is still running.
+"""
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import namedtuple
+import pkgdb
+import pkgindex
+
+MAX_RESULTS = 500           # per source; the command is stopped beyond this
+SOURCE_TIMEOUT = 60.0
+EXTRA_SOURCES = ("flatpak",)
+
+Result = namedtuple("Result", "manager name version summary remote")
+
+# ─── Output parsers ───────────────────────────────────────────────────────────
+# Each takes an iterator of output lines and yields (name, version, summary, remote).
+
+def _parse_apt(lines):
+    for line in lines:                           # apt-cache search: "name - summary"
+        name, sep, summary = line.partition(" - ")
+        if sep and name.strip():
+            yield name.strip(), "", summary.strip(), ""
+
+def _parse_pacman(lines):
+    head = None
+    for line in lines:                           # "repo/name ver [installed]" + "    summary"
+        if line.startswith((" ", "\t")):
+            if head:
+                yield head[0], head[1], line.strip(), ""
+                head = None
+        elif "/" in line:
+            if head:
+                yield head[0], head[1], "", ""
+            parts = line.split()
+            head = (parts[0].split("/", 1)[1], parts[1] if len(parts) > 1 else "")
+    if head:
+        yield head[0], head[1], "", ""
+
+def _parse_dnf(lines):
+    for line in lines:                           # dnf: "name.arch : summary", dnf5: tab
+        text = line.strip()
+        if not text or text.startswith(("=", "Last metadata", "Matched fields", "Updating")):
+            continue
+        left, sep, summary = text.partition(" : ")
+        if not sep:
+            left, sep, summary = text.partition("\t")
+        if sep:
+            yield left.strip().rsplit(".", 1)[0], "", summary.strip(), ""
+
+def _parse_zypper(lines):
+    for line in lines:                           # "S | Name | Summary | Type" table
+        cols = [c.strip() for c in line.split("|")]
+        if len(cols) >= 3 and cols[1] and cols[1] != "Name" and not set(cols[1]) <= {"-", "+"}:
+            yield cols[1], "", cols[2], ""
+
+def _parse_brew(lines):
+    for line in lines:                           # names only, "==> Formulae" headers
+        name = line.strip()
+        if name and not name.startswith("==>") and " " not in name:
+            yield name, "", "", ""
+
+def _parse_flatpak(lines):
+    for line in lines:                           # --columns=application,version,remotes,description
+        cols = line.rstrip("\n").split("\t")
+        if len(cols) >= 4 and cols[0]:
+            yield cols[0], cols[1], cols[3], cols[2].split(",")[0]
+
+COMMANDS = {
+    "apt":     (["apt-cache", "search"], _parse_apt),
+    "apt-get": (["apt-cache", "search"], _parse_apt),
+    "pacman":  (["pacman", "-Ss"], _parse_pacman),
+    "dnf":     (["dnf", "-q", "search"], _parse_dnf),
+    "zypper":  (["zypper", "--no-refresh", "-q", "search"], _parse_zypper),
+    "brew":    (["brew", "search"], _parse_brew),
+    "flatpak": (["flatpak", "search", "--columns=application,version,remotes,description"],
+                _parse_flatpak),
+}
+
+def available_sources(managers) -> list[str]:
+    """managers plus installed extra sources, one entry per backend."""
+    out = []
+    for pm in list(managers) + [s for s in EXTRA_SOURCES if shutil.which(s)]:
+        if pm in COMMANDS and pm not in out and not (pm == "apt-get" and "apt" in out):
+            out.append(pm)
+    return out
+
+def _installed_names(pm) -> set | None:
+    if pm == "flatpak":
+        try:
+            out = subprocess.run(["flatpak", "list", "--columns=application"],
+                                 capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return {l.strip() for l in out.splitlines() if l.strip()}
+    packages = pkgdb.installed(pm)
+    return None if packages is None else {p.name for p in packages}
+
+def _have(src, result) -> bool:
+    if src.installed is not None:
+        return result.name in src.installed
+    return shutil.which(result.name) is not None
+
+def _kill(proc):
+    """Kill the command and anything it started, which may hold its stdout open."""
+    if proc.poll() is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+# ─── Search ───────────────────────────────────────────────────────────────────
+class _Source:
+    def __init__(self, pm):
+        self.pm      = pm
+        self.state   = "searching"
+        self.count   = 0
+        self.proc    = None
+        self.via     = ""
+        self.error   = None
+        self.resolved  = False         # installed names known (installed may still be None)
+        self.installed = None
+
+    def label(self) -> str:
+        if self.state == "searching":
+            return f"{self.pm} {self.count}..." if self.count else f"{self.pm} ..."
+        if self.state == "done":
+            return f"{self.pm} {self.count}{self.via}"
+        return f"{self.pm} {self.count} ({self.state})" if self.count else f"{self.pm} {self.state}"
+
+class PackageSearch:
+    def __init__(self, query: str, managers, timeout: float = SOURCE_TIMEOUT):
+        self.query     = query
+        self.timeout   = timeout
+        self.sources   = [_Source(pm) for pm in available_sources(managers)]
+        self.results   = []            # [tier, seq, Result, installed or None if unknown]
+        self.labels    = {}            # label -> index into results
+        self.order     = []
+        self.marked    = 0             # bumped when installed flags are filled in
+        self.sorted_at = None
+        self.started   = time.perf_counter()
+        self.first_ms  = None
+        self.cancelled = False
+        self.lock      = threading.Lock()
+        self.threads   = []
+
+    def start(self):
+        for src in self.sources:
+            t = threading.Thread(target=self._run, args=(src,), daemon=True,
+                                 name=f"search-{src.pm}")
+            t.start()
+            self.threads.append(t)
+            threading.Thread(target=self._resolve, args=(src,), daemon=True,
+                             name=f"installed-{src.pm}").start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self.threads)
+
+    def cancel(self):
+        self.cancelled = True
+        for src in self.sources:
+            if src.state == "searching":
+                src.state = "cancelled"
+            if src.proc is not None:
+                _kill(src.proc)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in self.threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    # ─── Workers ─────────────────────────────────────────────────────────────
+    def _run(self, src):
+        try:
+            index_name = pkgindex.manager_for(src.pm)
+            if index_name:
+                src.via = " (offline index)"
+                for hit in pkgindex.shared().search(self.query, index_name, MAX_RESULTS):
+                    if self.cancelled:
+                        return
+                    self._add(src, Result(src.pm, hit.name, hit.version, hit.summary, ""))
+            else:
+                self._stream(src)
+            if src.state == "searching":
+                src.state = "done"
+        except (OSError, subprocess.SubprocessError) as e:
+            src.state = "error" if not self.cancelled else "cancelled"
+            src.error = getattr(e, "strerror", None) or str(e)
+
+    def _stream(self, src):
+        argv, parse = COMMANDS[src.pm]
+        if not shutil.which(argv[0]):
+            src.state = "not found"
+            return
+        src.proc = subprocess.Popen(argv + [self.query], stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                                    text=True, errors="replace", bufsize=1,
+                                    env={**os.environ, "LC_ALL": "C"}, start_new_session=True)
+        if self.cancelled:
+            _kill(src.proc)
+        timer = threading.Timer(self.timeout, self._expire, args=(src,))
+        timer.daemon = True
+        timer.start()
+        try:
+            for name, version, summary, remote in parse(src.proc.stdout):
+                if self.cancelled:
+                    break
+                self._add(src, Result(src.pm, name, version, summary, remote))
+                if src.count >= MAX_RESULTS:
+                    src.state = "stopped"
+                    _kill(src.proc)
+                    break
+        finally:
+            timer.cancel()
+            src.proc.stdout.close()
+            if src.proc.wait() != 0 and src.state == "searching" and not src.count:
+                src.state = "no results"
+
+    def _expire(self, src):
+        if src.state == "searching":
+            src.state = "timed out"
+            _kill(src.proc)
+
+    def _resolve(self, src):
+        """Look up src's installed packages, then mark the results already in."""
+        installed = _installed_names(src.pm)
+        with self.lock:
+            src.installed, src.resolved = installed, True
+            todo = [e for e in self.results if e[2].manager == src.pm and e[3] is None]
+        marks = [_have(src, e[2]) for e in todo]
+        with self.lock:
+            for e, have in zip(todo, marks):
+                e[3] = have
+            self.marked += 1
+
+    def _add(self, src, result):
+        q    = self.query.strip().lower()
+        name = result.name.lower()
+        tier = 0 if name == q else 1 if name.startswith(q) else 2 if q in name else 3
+        have = _have(src, result) if src.resolved else None
+        with self.lock:
+            if have is None and src.resolved:      # resolved since the check above
+                have = _have(src, result)
+            self.results.append([tier, len(self.results), result, have])
+            src.count += 1
+            if self.first_ms is None:
+                self.first_ms = (time.perf_counter() - self.started) * 1000
+
+    # ─── Display ─────────────────────────────────────────────────────────────
+    def snapshot(self):
+        with self.lock:
+            if self.sorted_at != (len(self.results), self.marked):
+                self.sorted_at = (len(self.results), self.marked)
+                self.labels = {}
+                for i in sorted(range(len(self.results)), key=lambda i: self.results[i][:2]):
+                    _, _, r, have = self.results[i]
+                    mark  = ("[?]        " if have is None else
+                             "[installed]" if have else "[get]      ")
+                    parts = "  ".join(p for p in (r.name, r.version, r.summary) if p)
+                    label = f"{mark} {parts}  ({r.manager})"
+                    while label in self.labels:
+                        label += " "
+                    self.labels[label] = i
+                self.order = list(self.labels)
+            order = self.order
+        status = "  |  ".join(src.label() for src in self.sources) or "No package managers found"
+        if self.first_ms is not None:
+            status += f"  |  first result {self.first_ms:.0f} ms"
+        if self.running and not self.cancelled:
+            status += "  |  Esc = cancel"
+        return order, status
+
+    def result(self, label) -> tuple | None:
+        """(Result, installed) for a menu label; installed is None while unknown."""
+        with self.lock:
+            i = self.labels.get(label)
+            return None if i is None else tuple(self.results[i][2:])
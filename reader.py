@@ -0,0 +1,321 @@
+"""
+In-process reader for .txt and .epub documents.
+
+A book is a list of chapters whose text is only decoded when a chapter is
+first shown: EPUB chapters are read out of the zip one spine item at a
+time, and plain text is cut into fixed-size byte ranges at line breaks,
+so opening a book costs a zip directory read or a stat.
+
+Wrapped chapters are cached in an LRU keyed by (chapter, width); a resize
+re-wraps only what is shown. The reading position is kept per user in
+users/<name>/reading.json as (chapter, character offset), which survives
+changes of terminal width.
+"""
+import curses
+import html
+import posixpath
+import re
+import textwrap
+import time
+import urllib.parse
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from config import COLOR_NORMAL, COLOR_DIM, init_colors, load_json, save_json, _user_dir
+from status import draw_header, draw_menu_title, draw_status
+from ui import _halfdelay, _session_tick
+
+SUPPORTED     = {".txt", ".epub"}
+TXT_CHUNK     = 64 * 1024         # bytes per plain-text "chapter"
+LINE_WINDOW   = 4 * 1024          # how far past a cut point to look for a line break
+WRAP_CACHE    = 16                # wrapped chapters kept per book
+POSITION_FILE = "reading.json"
+
+class BookError(Exception):
+    """The file cannot be read as a book."""
+
+# A chapter that fails to read after the book opened gets an error page
+# instead of taking the session down.
+_READ_ERRORS = (OSError, EOFError, zipfile.BadZipFile, zlib.error,
+                RuntimeError, NotImplementedError)
+
+def _error_page(e) -> str:
+    return f"[This part of the book could not be read: {e}]"
+
+# ─── Books ────────────────────────────────────────────────────────────────────
+_BLOCK = re.compile(r"</(p|div|h[1-6]|li|tr|blockquote)>|<br\s*/?>", re.I)
+_TAG   = re.compile(r"<[^>]+>")
+_SKIP  = re.compile(r"<(head|script|style)[^>]*>.*?</\1>", re.S | re.I)
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.S | re.I)
+
+def _xhtml_to_text(markup: str) -> str:
+    body = _BLOCK.sub("\n", _SKIP.sub("", markup))
+    text = html.unescape(_TAG.sub("", body))
+    return "\n".join(" ".join(line.split()) for line in text.split("\n"))
+
+class TxtBook:
+    def __init__(self, path: Path):
+        self.path  = Path(path)
+        self.title = self.path.stem.replace("_", " ")
+        self.size  = self.path.stat().st_size
+        self.count = max(1, -(-self.size // TXT_CHUNK))
+        self._starts = {0: 0}
+
+    def _start(self, i: int) -> int:
+        """
+        Byte offset of chapter i: the first line break after i * TXT_CHUNK,
+        or, with none within LINE_WINDOW, the next character boundary there.
+        """
+        if i >= self.count:
+            return self.size
+        if i not in self._starts:
+            cut = i * TXT_CHUNK
+            with open(self.path, "rb") as f:
+                f.seek(cut)
+                data = f.read(LINE_WINDOW)
+            nl = data.find(b"\n")
+            if nl >= 0:
+                start = cut + nl + 1
+            else:
+                skip = 0
+                while skip < min(len(data), 3) and 0x80 <= data[skip] < 0xC0:
+                    skip += 1                  # not inside a UTF-8 sequence
+                start = cut + skip
+            self._starts[i] = min(start, self.size)
+        return self._starts[i]
+
+    def chapter_title(self, i: int) -> str:
+        return f"Part {i + 1}" if self.count > 1 else self.title
+
+    def text(self, i: int) -> str:
+        try:
+            start, end = self._start(i), self._start(i + 1)
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                return f.read(end - start).decode("utf-8", "ignore").rstrip("\n")
+        except OSError as e:
+            return _error_page(e.strerror or e)
+
+    def close(self):
+        pass
+
+class EpubBook:
+    _OCF = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+    _OPF = "{http://www.idpf.org/2007/opf}"
+    _DC  = "{http://purl.org/dc/elements/1.1/}"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            self.zip = zipfile.ZipFile(self.path)
+            container = ET.fromstring(self.zip.read("META-INF/container.xml"))
+            opf_name  = container.find(f".//{self._OCF}rootfile").get("full-path")
+            opf = ET.fromstring(self.zip.read(opf_name))
+        except (OSError, KeyError, AttributeError, zipfile.BadZipFile, ET.ParseError) as e:
+            raise BookError(str(e)) from None
+        base     = posixpath.dirname(opf_name)
+        manifest = {item.get("id"): urllib.parse.unquote(item.get("href", "").split("#", 1)[0])
+                    for item in opf.iter(f"{self._OPF}item")}
+        self.items = [posixpath.normpath(posixpath.join(base, manifest[ref.get("idref")]))
+                      for ref in opf.iter(f"{self._OPF}itemref")
+                      if ref.get("idref") in manifest]
+        if not self.items:
+            raise BookError("empty spine")
+        title = opf.find(f".//{self._DC}title")
+        self.title  = " ".join((title.text or "").split()) if title is not None else ""
+        self.title  = self.title or self.path.stem.replace("_", " ")
+        self.count  = len(self.items)
+        self._titles = {}
+
+    def close(self):
+        self.zip.close()
+
+    def _markup(self, i: int) -> str:
+        try:
+            return self.zip.read(self.items[i]).decode("utf-8", "ignore")
+        except KeyError:
+            return ""
+
+    def chapter_title(self, i: int) -> str:
+        return self._titles.get(i) or f"Chapter {i + 1}"
+
+    def text(self, i: int) -> str:
+        try:
+            markup = self._markup(i)
+        except _READ_ERRORS as e:
+            return _error_page(e)
+        m = _TITLE.search(markup)
+        if m and m.group(1).strip():
+            self._titles[i] = " ".join(html.unescape(m.group(1)).split())
+        return _xhtml_to_text(markup).strip("\n")
+
+def open_book(path):
+    path = Path(path)
+    if path.suffix.lower() == ".epub":
+        return EpubBook(path)
+    if path.suffix.lower() == ".txt":
+        try:
+            return TxtBook(path)
+        except OSError as e:
+            raise BookError(str(e)) from None
+    raise BookError(f"unsupported format: {path.suffix}")
+
+# ─── Layout ───────────────────────────────────────────────────────────────────
+def wrap(text: str, width: int) -> list[tuple[int, str]]:
+    """(character offset, line) pairs for text wrapped to width."""
+    out, offset = [], 0
+    for para in text.split("\n"):
+        if not para.strip():
+            out.append((offset, ""))
+        else:
+            # Whitespace is kept as-is inside lines, so each line can be
+            # found verbatim in the paragraph.
+            cursor = 0
+            for line in textwrap.wrap(para, width, expand_tabs=False,
+                                      replace_whitespace=False, break_on_hyphens=False):
+                found = para.find(line, cursor)
+                if found >= 0:
+                    cursor = found
+                out.append((offset + cursor, line))
+                cursor += len(line)
+        offset += len(para) + 1
+    return out or [(0, "")]
+
+class Pages:
+    """Lazily wrapped chapters of one book, with an LRU keyed by width."""
+    def __init__(self, book):
+        self.book  = book
+        self._wrap = OrderedDict()
+        self.hits = self.misses = 0
+
+    def lines(self, chapter: int, width: int) -> list[tuple[int, str]]:
+        key = (chapter, width)
+        if key in self._wrap:
+            self._wrap.move_to_end(key)
+            self.hits += 1
+            return self._wrap[key]
+        self.misses += 1
+        lines = wrap(self.book.text(chapter), width)
+        self._wrap[key] = lines
+        if len(self._wrap) > WRAP_CACHE:
+            self._wrap.popitem(last=False)
+        return lines
+
+    @staticmethod
+    def line_at(lines, offset: int) -> int:
+        """Index of the line containing character offset."""
+        lo, hi = 0, len(lines) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if lines[mid][0] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+# ─── Reading positions ────────────────────────────────────────────────────────
+def _positions_file() -> Path | None:
+    d = _user_dir()
+    return d / POSITION_FILE if d else None
+
+def load_position(path) -> tuple[int, int]:
+    f = _positions_file()
+    pos = load_json(f).get(str(path), {}) if f else {}
+    return pos.get("chapter", 0), pos.get("offset", 0)
+
+def save_position(path, chapter: int, offset: int):
+    f = _positions_file()
+    if not f:
+        return
+    data = load_json(f)
+    data[str(path)] = {"chapter": chapter, "offset": offset, "updated": int(time.time())}
+    save_json(f, data)
+
+# ─── Reader screen ────────────────────────────────────────────────────────────
+def read_book(stdscr, path):
+    """Show a book until the user leaves; raises BookError if it cannot be read."""
+    book   = open_book(path)
+    pages  = Pages(book)
+    chapter, offset = load_position(path)
+    chapter = min(max(0, chapter), book.count - 1)
+    top    = None             # first visible line; None = recompute from offset
+    _halfdelay()
+
+    try:
+        while True:
+            h, w  = stdscr.getmaxyx()
+            width = max(20, w - 6)
+            rows  = max(1, h - 8)
+            lines = pages.lines(chapter, width)
+            if top is None:
+                top = Pages.line_at(lines, offset)
+            top    = max(0, min(top, max(0, len(lines) - 1)))
+            offset = lines[top][0]
+
+            stdscr.erase()
+            draw_header(stdscr)
+            draw_menu_title(stdscr, book.title[:w - 8], 4)
+            for i, (_, line) in enumerate(lines[top:top + rows]):
+                try:
+                    stdscr.addstr(6 + i, 3, line, curses.color_pair(COLOR_NORMAL))
+                except curses.error:
+                    pass
+            done = (chapter + min(1.0, (top + rows) / len(lines))) / book.count
+            footer = (f"{book.chapter_title(chapter)}  |  {chapter + 1}/{book.count}  |  "
+                      f"{done:.0%}  |  space/b page  n/p chapter  q back")
+            try:
+                stdscr.addstr(h - 2, 2, footer[:w - 4], curses.color_pair(COLOR_DIM))
+            except curses.error:
+                pass
+            draw_status(stdscr)
+            stdscr.noutrefresh()
+            curses.doupdate()
+
+            key = stdscr.getch()
+            if key == -1:
+                _session_tick()
+                continue
+            elif key == curses.KEY_RESIZE:
+                init_colors()
+                stdscr.clear()
+                top = None
+            elif key in (curses.KEY_DOWN, ord('j')):
+                top += 1
+                if top >= len(lines) and chapter < book.count - 1:
+                    chapter, top = chapter + 1, 0
+            elif key in (curses.KEY_UP, ord('k')):
+                if top == 0 and chapter > 0:
+                    chapter, top = chapter - 1, len(pages.lines(chapter - 1, width)) - 1
+                else:
+                    top -= 1
+            elif key in (curses.KEY_NPAGE, curses.KEY_RIGHT, ord(' ')):
+                if top + rows >= len(lines) and chapter < book.count - 1:
+                    chapter, top = chapter + 1, 0
+                else:
+                    top = min(top + rows, max(0, len(lines) - rows))
+            elif key in (curses.KEY_PPAGE, curses.KEY_LEFT, ord('b')):
+                if top == 0 and chapter > 0:
+                    prev = pages.lines(chapter - 1, width)
+                    chapter, top = chapter - 1, max(0, len(prev) - rows)
+                else:
+                    top = max(0, top - rows)
+            elif key == ord('n') and chapter < book.count - 1:
+                chapter, top = chapter + 1, 0
+            elif key == ord('p') and chapter > 0:
+                chapter, top = chapter - 1, 0
+            elif key == ord('g'):
+                chapter, top = 0, 0
+            elif key == ord('G'):
+                chapter = book.count - 1
+                top = max(0, len(pages.lines(chapter, width)) - rows)
+            elif key in (ord('q'), ord('Q'), 27, 9):
+                break
+            if top is not None:
+                lines = pages.lines(chapter, width)
+                top   = max(0, min(top, len(lines) - 1))
+                offset = lines[top][0]
+    finally:
+        book.close()
+        save_position(path, chapter, offset)
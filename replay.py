@@ -0,0 +1,213 @@
+"""
+Deterministic record/replay of hacking and menu sessions.
+
+Recording wraps the real screen and logs every key the session reads,
+together with the RNG seed and terminal size, to a compact file:
+
+    b"RCRP" | u32 header length | header JSON | (i32 key, u32 ms since previous) ...
+
+Replaying drives the same entry point against an in-memory screen, with
+curses calls, sleeps, sound, the status bar and audit logging neutralised,
+so it runs headless at full speed. Every curses.doupdate() snapshots the
+screen; identical recordings give byte-identical snapshot streams.
+
+Set ROBCOS_RECORD=<dir> to record sessions while using RobcOS normally,
+then run `python main.py replay <file>`.
+"""
+import contextlib
+import curses
+import hashlib
+import json
+import os
+import random
+import struct
+import time
+from pathlib import Path
+
+MAGIC = b"RCRP"
+EVENT = struct.Struct("<iI")
+_seeds = random.Random()     # private, so recording leaves the global RNG alone
+
+# ─── Targets ──────────────────────────────────────────────────────────────────
+def _run_hacking(stdscr, args, seed):
+    from hacking import run_hacking_minigame
+    return run_hacking_minigame(stdscr, args["username"], seed=seed,
+                                difficulty=args.get("difficulty"))
+
+def _run_menu(stdscr, args, seed):
+    from ui import run_menu
+    return run_menu(stdscr, args["title"], args["choices"], args.get("subtitle", ""))
+
+TARGETS = {
+    "hacking": _run_hacking,
+    "menu":    _run_menu,
+}
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+class RecordingScreen:
+    """Proxy for stdscr that logs keys returned by getch()."""
+    def __init__(self, stdscr):
+        self._scr   = stdscr
+        self.events = []
+        self._last  = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._scr, name)
+
+    def getch(self, *args):
+        key = self._scr.getch(*args)
+        if key != -1:     # idle ticks only refresh the status bar
+            now = time.monotonic()
+            self.events.append((key, min(int((now - self._last) * 1000), 0xFFFFFFFF)))
+            self._last = now
+        return key
+
+def save(path, header: dict, events):
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(head)) + head)
+        f.write(b"".join(EVENT.pack(k, dt) for k, dt in events))
+
+def load(path):
+    data = Path(path).read_bytes()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a RobcOS recording")
+    (hlen,) = struct.unpack_from("<I", data, 4)
+    header  = json.loads(data[8:8 + hlen])
+    events  = [EVENT.unpack_from(data, off) for off in range(8 + hlen, len(data), EVENT.size)]
+    return header, events
+
+def record(stdscr, target, path, **args):
+    """Run `target` on stdscr while recording it to `path`. Returns its result."""
+    seed = _seeds.randrange(1 << 32)
+    h, w = stdscr.getmaxyx()
+    rec  = RecordingScreen(stdscr)
+    try:
+        return TARGETS[target](rec, args, seed)
+    finally:
+        save(path, {"target": target, "args": args, "seed": seed, "size": [h, w],
+                    "recorded": time.time()}, rec.events)
+
+def maybe_record(stdscr, target, **args):
+    """Record when ROBCOS_RECORD names a directory, otherwise just run."""
+    out = os.environ.get("ROBCOS_RECORD")
+    if not out:
+        return TARGETS[target](stdscr, args, None)
+    Path(out).mkdir(parents=True, exist_ok=True)
+    name = f"{target}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.rcrp"
+    return record(stdscr, target, Path(out) / name, **args)
+
+# ─── Headless replay ──────────────────────────────────────────────────────────
+class ReplayFinished(Exception):
+    """The session asked for more keys than were recorded."""
+
+class HeadlessScreen:
+    """Just enough of a curses window for RobcOS screens, backed by lists."""
+    def __init__(self, h, w, keys):
+        self.h, self.w = h, w
+        self._keys     = iter(keys)
+        self.erase()
+
+    def getmaxyx(self):
+        return self.h, self.w
+
+    def erase(self):
+        self.chars = [[" "] * self.w for _ in range(self.h)]
+        self.attrs = [[0] * self.w for _ in range(self.h)]
+
+    clear = erase
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.h and 0 <= x < self.w):
+            raise curses.error("addstr out of bounds")
+        text = str(text)
+        room = self.w - x
+        row, arow = self.chars[y], self.attrs[y]
+        for i, ch in enumerate(text[:room]):
+            row[x + i], arow[x + i] = ch, attr
+        if len(text) > room:
+            raise curses.error("addstr past right edge")
+
+    def addch(self, y, x, ch, attr=0):
+        self.addstr(y, x, ch if isinstance(ch, str) else chr(ch), attr)
+
+    def getch(self, *args):
+        try:
+            return next(self._keys)
+        except StopIteration:
+            raise ReplayFinished from None
+
+    def snapshot(self) -> bytes:
+        text  = "\n".join("".join(r) for r in self.chars).encode("utf-8")
+        attrs = b"".join(struct.pack(f"<{self.w}I", *r) for r in self.attrs)
+        return text + attrs
+
+    def _noop(self, *args, **kwargs):
+        return None
+
+    noutrefresh = refresh = keypad = nodelay = move = clearok = timeout = _noop
+
+_CURSES_NOOPS = ("doupdate", "curs_set", "cbreak", "nocbreak", "halfdelay",
+                 "flushinp", "noecho", "echo", "start_color", "use_default_colors",
+                 "init_pair", "reset_prog_mode", "endwin")
+
+class _NullAudit:
+    def record(self, *args, **kwargs):
+        pass
+    def flush(self, *args, **kwargs):
+        pass
+
+@contextlib.contextmanager
+def _headless(screen, frames):
+    import audit
+    import config
+    saved = {n: getattr(curses, n) for n in _CURSES_NOOPS + ("color_pair",)}
+    saved_sleep, saved_log = time.sleep, audit.log
+    saved_cfg = (config.SOUND_ON, config.SHOW_STATUS)
+    try:
+        for n in _CURSES_NOOPS:
+            setattr(curses, n, lambda *a, **k: None)
+        curses.color_pair = lambda n: n << 8
+        curses.doupdate  = lambda: frames.append(screen.snapshot())
+        time.sleep       = lambda s: None
+        audit.log        = _NullAudit()
+        config.SOUND_ON, config.SHOW_STATUS = False, False
+        yield
+    finally:
+        for n, fn in saved.items():
+            setattr(curses, n, fn)
+        time.sleep, audit.log = saved_sleep, saved_log
+        config.SOUND_ON, config.SHOW_STATUS = saved_cfg
+
+def replay(path):
+    """
+    Replay a recording headlessly. Returns a dict with the session result,
+    frame count, output digest and per-key processing times in seconds.
+    """
+    header, events = load(path)
+    h, w   = header["size"]
+    frames = []
+    key_times = []
+
+    def keys():
+        for key, _ in events:
+            key_times.append(time.perf_counter())
+            yield key
+
+    screen = HeadlessScreen(h, w, keys())
+    result = None
+    with _headless(screen, frames):
+        t0 = time.perf_counter()
+        try:
+            result = TARGETS[header["target"]](screen, header["args"], header["seed"])
+        except ReplayFinished:
+            result = "<ran out of keys>"
+        elapsed = time.perf_counter() - t0
+    # key_times holds the moment each key was handed over; the gap to the next
+    # handover is the time the session spent reacting to that key.
+    stamps = key_times + [t0 + elapsed]
+    per_key = [b - a for a, b in zip(stamps, stamps[1:])]
+    digest = hashlib.sha256(b"".join(frames)).hexdigest()
+    return {"target": header["target"], "result": result, "keys": len(events),
+            "frames": len(frames), "elapsed": elapsed, "per_key": per_key,
+            "digest": digest}
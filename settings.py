@@ -4,7 +4,8 @@ import time
 import platform
 import psutil
 from config import (COLOR_NORMAL, COLOR_DIM, THEMES,
-                    set_sound, set_bootup, set_theme,
+                    set_sound, set_bootup, set_theme, set_autosave_sync,
+                    AUTOSAVE_SYNC_CHOICES,
                     save_all_settings, init_colors,
                     load_about, save_about)
 from status import draw_header, draw_separator, draw_status
@@ -128,13 +129,16 @@ def settings_menu(stdscr, current_user=None):
         import config
         sound_label  = "Sound: ON  [toggle]" if config.SOUND_ON  else "Sound: OFF [toggle]"
         bootup_label = "Bootup: ON [toggle]" if config.BOOTUP_ON else "Bootup: OFF [toggle]"
+        sync = config.AUTOSAVE_SYNC
+        sync_label   = ("Autosave sync: " + ("OFF" if sync is None else
+                        "every flush" if sync == 0 else f"every {sync}s") + " [cycle]")
 
         # Edit Menus available to all users (they edit their own menus)
         # User Management only for admins
-        choices = ["About", "Theme", "Edit Menus", bootup_label, sound_label]
+        choices = ["About", "Theme", "Edit Menus", bootup_label, sound_label, sync_label]
         if admin:
-            choices = ["About", "Theme", "Edit Menus", "User Management",
-                       bootup_label, sound_label]
+            choices = ["About", "Theme", "Edit Menus", "User Management", "Backup",
+                       bootup_label, sound_label, sync_label]
         choices += ["---", "Back"]
 
         result = run_menu(stdscr, "Settings Menu", choices)
@@ -148,9 +152,16 @@ def settings_menu(stdscr, current_user=None):
             edit_menus_menu(stdscr)
         elif result == "User Management" and admin:
             user_management_menu(stdscr, current_user)
+        elif result == "Backup" and admin:
+            from backup import backup_menu
+            backup_menu(stdscr, current_user)
         elif result == sound_label:
             set_sound(not config.SOUND_ON)
             save_all_settings()
         elif result == bootup_label:
             set_bootup(not config.BOOTUP_ON)
+            save_all_settings()
+        elif result == sync_label:
+            i = AUTOSAVE_SYNC_CHOICES.index(sync) if sync in AUTOSAVE_SYNC_CHOICES else 0
+            set_autosave_sync(AUTOSAVE_SYNC_CHOICES[(i + 1) % len(AUTOSAVE_SYNC_CHOICES)])
             save_all_settings()
\ No newline at end of file
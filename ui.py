@@ -1,4 +1,5 @@
 import curses
+import sys
 import time
 from config import (COLOR_NORMAL, COLOR_SELECTED, COLOR_TITLE,
                     COLOR_DIM, INPUT_TIMEOUT, init_colors, playsound)
@@ -8,8 +9,36 @@ def _halfdelay():
     """Restore halfdelay mode after any input operation that changed it."""
     curses.halfdelay(INPUT_TIMEOUT)
 
+def _session_tick():
+    """
+    Idle-tick session check shared by the menus. Raises LogoutException when
+    another window logged out, returns "__SESSION_READY__" when another window
+    logged in, else None.
+    """
+    try:
+        import config as _cfg
+        from auth import read_session
+        current = _cfg.get_current_user()
+        token   = read_session()
+        if current and token != current:
+            # Logged in but token changed — another window logged out/switched
+            raise _cfg.LogoutException()
+        elif not current and token:
+            # Not logged in but a token appeared — another window logged in
+            return "__SESSION_READY__"
+    except _cfg.LogoutException:
+        raise
+    except Exception:
+        pass
+    return None
+
 # ─── Generic curses menu ──────────────────────────────────────────────────────
-def run_menu(stdscr, title, choices, subtitle=""):
+def run_menu(stdscr, title, choices, subtitle="", refresh=None):
+    """
+    refresh, if given, is called on every idle tick and may return a new
+    list of choices (or None to keep the current ones); the selection stays
+    on the same label when it is still present.
+    """
     selectable = [c for c in choices if c != "---"]
     idx = 0
     curses.flushinp()
@@ -53,21 +82,15 @@ def run_menu(stdscr, title, choices, subtitle=""):
         key = stdscr.getch()
 
         if key == -1:
-            try:
-                import config as _cfg
-                from auth import read_session
-                current = _cfg.get_current_user()
-                token   = read_session()
-                if current and token != current:
-                    # Logged in but token changed — another window logged out/switched
-                    raise _cfg.LogoutException()
-                elif not current and token:
-                    # Not logged in but a token appeared — another window logged in
-                    return "__SESSION_READY__"
-            except _cfg.LogoutException:
-                raise
-            except Exception:
-                pass
+            if _session_tick():
+                return "__SESSION_READY__"
+            new = refresh() if refresh else None
+            if new is not None:
+                current    = selectable[idx] if selectable else None
+                choices    = new
+                selectable = [c for c in choices if c != "---"]
+                idx = (selectable.index(current) if current in selectable
+                       else min(idx, max(0, len(selectable) - 1)))
             continue
         elif key == curses.KEY_RESIZE:
             init_colors()
@@ -86,6 +109,165 @@ def run_menu(stdscr, title, choices, subtitle=""):
             playsound('Sounds/ui_hacking_charenter_01.wav', False)
             return "Back"
 
+# ─── Streaming menu ───────────────────────────────────────────────────────────
+def run_lazy_menu(stdscr, title, source, subtitle="", tail=("---", "Back")):
+    """
+    Menu whose choices come from source.snapshot() -> (choices, status) and
+    are re-read on every idle tick, so entries can keep arriving while the
+    menu is open. snapshot() returns the same list object while nothing
+    changed and a new one when something did; the menu rebuilds only then.
+    Only the visible window of choices is drawn, and the selection follows
+    its label when the list reorders.
+    """
+    idx, offset, selected = 0, 0, None
+    shown = items = selectable = position = None
+    curses.flushinp()
+    _halfdelay()
+
+    while True:
+        choices, status = source.snapshot()
+        if choices is not shown:
+            shown      = choices
+            items      = list(choices) + list(tail)
+            selectable = [i for i, c in enumerate(items) if c != "---"]
+            position   = {}                 # label -> index into selectable
+            for k, i in enumerate(selectable):
+                position.setdefault(items[i], k)
+            if selected is not None:
+                idx = position.get(selected, idx)
+        idx = min(idx, len(selectable) - 1) if selectable else 0
+
+        h, w = stdscr.getmaxyx()
+        stdscr.erase()
+        draw_header(stdscr)
+        draw_separator(stdscr, 4, w)
+        draw_menu_title(stdscr, title, 5)
+        draw_separator(stdscr, 6, w)
+        if subtitle:
+            try:
+                stdscr.addstr(8, 6, subtitle[:w - 8],
+                              curses.color_pair(COLOR_DIM) | curses.A_UNDERLINE)
+            except curses.error:
+                pass
+
+        start_row = 10 if subtitle else 9
+        visible   = max(1, h - 3 - start_row)
+        cur       = selectable[idx] if selectable else -1
+        if cur < offset:
+            offset = cur
+        elif cur >= offset + visible:
+            offset = cur - visible + 1
+        for di, choice in enumerate(items[offset:offset + visible]):
+            i = offset + di
+            is_sep      = choice == "---"
+            is_selected = i == cur
+            prefix = "  > " if is_selected else "    "
+            attr   = (curses.color_pair(COLOR_DIM) if is_sep else
+                      curses.color_pair(COLOR_SELECTED) | curses.A_BOLD if is_selected else
+                      curses.color_pair(COLOR_NORMAL))
+            try:
+                stdscr.addstr(start_row + di, 2, (prefix + choice)[:w - 4], attr)
+            except curses.error:
+                pass
+        footer = status or ""
+        if len(items) > visible:
+            footer = f"{footer}  [{cur + 1}/{len(items)}]".strip()
+        if footer:
+            try:
+                stdscr.addstr(h - 2, 2, footer[:w - 4], curses.color_pair(COLOR_DIM))
+            except curses.error:
+                pass
+
+        draw_status(stdscr)
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+        key = stdscr.getch()
+        step = 0
+        if key == -1:
+            if _session_tick():
+                return "__SESSION_READY__"
+            continue
+        elif key == curses.KEY_RESIZE:
+            init_colors()
+            stdscr.clear()
+            continue
+        elif key in (curses.KEY_UP, ord('k')):
+            step = -1
+        elif key in (curses.KEY_DOWN, ord('j')):
+            step = 1
+        elif key == curses.KEY_PPAGE:
+            step = -visible
+        elif key == curses.KEY_NPAGE:
+            step = visible
+        elif key == curses.KEY_HOME:
+            step = -len(selectable)
+        elif key == curses.KEY_END:
+            step = len(selectable)
+        elif key in (curses.KEY_ENTER, 10, 13, 32):
+            playsound('Sounds/ui_hacking_charenter_01.wav', False)
+            return items[selectable[idx]] if selectable else None
+        elif key in (ord('q'), ord('Q'), 27, 9):
+            playsound('Sounds/ui_hacking_charenter_01.wav', False)
+            return "Back"
+        if step and selectable:
+            playsound('Sounds/ui_hacking_charenter_01.wav', False)
+            if abs(step) == 1:
+                idx = (idx + step) % len(selectable)
+            else:
+                idx = max(0, min(len(selectable) - 1, idx + step))
+            selected = items[selectable[idx]]
+
+# ─── Bracketed paste ──────────────────────────────────────────────────────────
+# With bracketed paste on, the terminal wraps pasted text in ESC[200~ ...
+# ESC[201~, so a paste can be read as one block instead of as keystrokes.
+PASTE_START = b"[200~"
+PASTE_END   = b"\x1b[201~"
+_PASTE_CHARS = {"\n": "\n", "\t": "    "}
+
+def bracketed_paste(on: bool):
+    if sys.stdout.isatty():
+        sys.stdout.write("\033[?2004h" if on else "\033[?2004l")
+        sys.stdout.flush()
+
+def read_paste(stdscr, timeout_ms: int = 200) -> str | None:
+    """
+    Call after getch() returned ESC. Returns the pasted text if the escape
+    opens a bracketed paste (newlines normalised to \n, tabs expanded, other
+    control characters dropped), else None.
+    """
+    try:
+        stdscr.nodelay(True)
+        head = bytearray()
+        while len(head) < len(PASTE_START):
+            key = stdscr.getch()
+            if not 0 <= key <= 255:
+                break
+            head.append(key)
+            if not PASTE_START.startswith(head):
+                break
+        if head != PASTE_START:
+            return None
+        stdscr.nodelay(False)
+        stdscr.timeout(timeout_ms)       # a lost terminator ends the paste here
+        body = bytearray()
+        while not body.endswith(PASTE_END):
+            key = stdscr.getch()
+            if key == -1:
+                break
+            if 0 <= key <= 255:
+                body.append(key)
+            elif key == curses.KEY_ENTER:
+                body.append(10)
+    finally:
+        stdscr.nodelay(False)
+        stdscr.timeout(-1)
+    if body.endswith(PASTE_END):
+        del body[-len(PASTE_END):]
+    text = body.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n")
+    return "".join(_PASTE_CHARS.get(ch, ch) for ch in text
+                   if ch >= " " or ch in _PASTE_CHARS)
+
 # ─── Input helpers ────────────────────────────────────────────────────────────
 def curses_input(stdscr, prompt):
     h, w = stdscr.getmaxyx()
@@ -105,14 +287,24 @@ def curses_input(stdscr, prompt):
     curses.curs_set(1)
     stdscr.noutrefresh()
     curses.doupdate()
+    bracketed_paste(True)
     buf = []
     while True:
         key = stdscr.getch()
         if key in (10, 13):
             break
         elif key == 27:
-            buf = []
-            break
+            text = read_paste(stdscr)
+            if text is None:             # plain Escape cancels
+                buf = []
+                break
+            room = max(0, w - 6 - len(buf))
+            text = " ".join(text.split("\n"))[:room]
+            try:
+                stdscr.addstr(7, col + len(buf), text, curses.color_pair(COLOR_NORMAL))
+            except curses.error:
+                pass
+            buf.extend(text)
         elif key in (curses.KEY_BACKSPACE, 127, 8):
             if buf:
                 buf.pop()
@@ -131,6 +323,7 @@ def curses_input(stdscr, prompt):
                 pass
         stdscr.noutrefresh()
         curses.doupdate()
+    bracketed_paste(False)
     curses.curs_set(0)
     _halfdelay()
     return "".join(buf).strip()
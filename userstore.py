@@ -0,0 +1,213 @@
+"""
+Account storage.
+
+Two on-disk layouts are supported:
+
+  legacy   users.json holds every account record in one file.
+  sharded  users/<name>/account.json holds one record per account, and
+           users/.index is an append-only log of "name<TAB>role<TAB>mode"
+           lines used for listings. A line with an empty role is a
+           tombstone. The log is compacted when it holds more than
+           twice as many lines as there are live accounts, plus
+           COMPACT_SLACK. Appends and compaction hold an flock on
+           users/.index.lock, so a line appended from another window is
+           never lost to a compaction replacing the file.
+
+The sharded layout is active whenever users/.index exists; `migrate()`
+converts a legacy installation.
+"""
+import contextlib
+import fcntl
+import json
+import os
+from pathlib import Path
+from config import base_dir, USERS_DIR
+
+USERS_FILE   = base_dir / "users.json"
+INDEX_NAME   = ".index"
+LOCK_NAME    = ".index.lock"
+COMPACT_SLACK = 64
+ACCOUNT_NAME = "account.json"
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+def _summary(record: dict) -> tuple[str, str]:
+    mode = "none" if record.get("no_password") else record.get("auth_mode", "password")
+    return record.get("role", "user"), mode
+
+class UserStore:
+    def __init__(self, root: Path = USERS_DIR, users_file: Path = USERS_FILE):
+        self.root       = Path(root)
+        self.users_file = Path(users_file)
+        self._index     = None    # name -> (role, mode)
+        self._index_key = None    # (size, mtime_ns) the cache was read at
+        self._index_lines = 0
+
+    # ─── Layout ──────────────────────────────────────────────────────────────
+    @property
+    def index_file(self) -> Path:
+        return self.root / INDEX_NAME
+
+    def is_sharded(self) -> bool:
+        return self.index_file.exists()
+
+    def _shard(self, name: str) -> Path:
+        return self.root / name / ACCOUNT_NAME
+
+    # ─── Legacy file ─────────────────────────────────────────────────────────
+    def _load_legacy(self) -> dict:
+        if self.users_file.exists():
+            return json.loads(self.users_file.read_text())
+        return {}
+
+    def _save_legacy(self, users: dict):
+        self.users_file.write_text(json.dumps(users, indent=4))
+
+    # ─── Index ───────────────────────────────────────────────────────────────
+    def _stat_key(self):
+        try:
+            st = self.index_file.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(self.root / LOCK_NAME, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _parse(self):
+        """(index, line count) as the file stands now."""
+        index, lines = {}, 0
+        try:
+            f = open(self.index_file, encoding="utf-8")
+        except FileNotFoundError:
+            return index, lines
+        with f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 3:
+                    continue
+                lines += 1
+                name, role, mode = parts
+                if role:
+                    index[name] = (role, mode)
+                else:
+                    index.pop(name, None)
+        return index, lines
+
+    def _read_index(self) -> dict:
+        key = self._stat_key()
+        if self._index is not None and key == self._index_key:
+            return self._index
+        index, lines = self._parse()
+        self._index, self._index_key, self._index_lines = index, key, lines
+        if lines > 2 * len(index) + COMPACT_SLACK:
+            self._compact()
+        return self._index
+
+    def _append_index(self, name: str, role: str = "", mode: str = ""):
+        index = self._read_index()
+        with self._locked():
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(f"{name}\t{role}\t{mode}\n")
+        if role:
+            index[name] = (role, mode)
+        else:
+            index.pop(name, None)
+        self._index_lines += 1
+        self._index_key = self._stat_key()
+
+    def _compact(self):
+        with self._locked():
+            index, _ = self._parse()          # lines other windows appended since
+            text = "".join(f"{n}\t{r}\t{m}\n" for n, (r, m) in index.items())
+            _atomic_write(self.index_file, text)
+            self._index, self._index_lines = index, len(index)
+            self._index_key = self._stat_key()
+
+    # ─── Public API ──────────────────────────────────────────────────────────
+    def names(self) -> list[str]:
+        if self.is_sharded():
+            return list(self._read_index())
+        return list(self._load_legacy())
+
+    def summary(self) -> dict:
+        """name -> (role, auth_mode) without reading any account record."""
+        if self.is_sharded():
+            return dict(self._read_index())
+        return {n: _summary(r) for n, r in self._load_legacy().items()}
+
+    def get(self, name: str) -> dict | None:
+        if not self.is_sharded():
+            return self._load_legacy().get(name)
+        try:
+            return json.loads(self._shard(name).read_text())
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+
+    def exists(self, name: str) -> bool:
+        if self.is_sharded():
+            return name in self._read_index()
+        return name in self._load_legacy()
+
+    def put(self, name: str, record: dict):
+        if not self.is_sharded():
+            users = self._load_legacy()
+            users[name] = record
+            self._save_legacy(users)
+            return
+        shard = self._shard(name)
+        shard.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(shard, json.dumps(record, indent=4))
+        if self._read_index().get(name) != _summary(record):
+            self._append_index(name, *_summary(record))
+
+    def update(self, name: str, **fields):
+        record = self.get(name)
+        if record is None:
+            raise KeyError(name)
+        record.update(fields)
+        self.put(name, record)
+
+    def delete(self, name: str):
+        if not self.is_sharded():
+            users = self._load_legacy()
+            users.pop(name, None)
+            self._save_legacy(users)
+            return
+        try:
+            self._shard(name).unlink()
+        except FileNotFoundError:
+            pass
+        self._append_index(name)
+
+    def load_all(self) -> dict:
+        if not self.is_sharded():
+            return self._load_legacy()
+        return {n: r for n in self._read_index() if (r := self.get(n)) is not None}
+
+    # ─── Migration ───────────────────────────────────────────────────────────
+    def migrate(self) -> int:
+        """Convert users.json into per-user shards. Returns accounts migrated."""
+        if self.is_sharded():
+            return 0
+        users = self._load_legacy()
+        self.root.mkdir(parents=True, exist_ok=True)
+        for name, record in users.items():
+            shard = self._shard(name)
+            shard.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(shard, json.dumps(record, indent=4))
+        _atomic_write(self.index_file,
+                      "".join(f"{n}\t{r}\t{m}\n" for n, (r, m) in
+                              ((n, _summary(rec)) for n, rec in users.items())))
+        if self.users_file.exists():
+            os.replace(self.users_file, self.users_file.with_suffix(".json.migrated"))
+        self._index = None
+        return len(users)
+
+store = UserStore()
@@ -0,0 +1,250 @@
+"""
+Write-ahead log for the journal editor.
+
+Each edit is queued as a record and a background thread appends queued
+records to <journal folder>/.wal/<name>.wal every FLUSH_S seconds, so typing
+never waits on the disk. How often the file is fsynced follows the
+"Autosave sync" setting (config.AUTOSAVE_SYNC): 0 = every flush, N = at
+most every N seconds, None = leave it to the OS.
+
+Records are framed as (length, crc32, marshal payload); a torn tail from a
+crash is ignored on replay. After CHECKPOINT_BYTES of logged edits the
+editor hands over a snapshot of the whole text and the log is rewritten
+as header + snapshot, so recovery replays a bounded amount of log no
+matter how long the session ran.
+
+The log is deleted when the entry is saved or editing is cancelled. One
+left behind by a crash, killed window or forced logout is offered for
+replay the next time the same entry is opened. New entries have no name
+to key on, so each session logs to its own file (session_path) and a new
+session offers those whose window is gone (orphans).
+"""
+import hashlib
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+import config
+
+VERSION          = 1
+FLUSH_S          = 0.5
+CHECKPOINT_BYTES = 1 << 20
+_FRAME           = struct.Struct("<II")     # payload length, crc32
+
+def log_path(folder: Path, name: str) -> Path:
+    return Path(folder) / ".wal" / f"{name}.wal"
+
+def session_path(folder: Path, name: str) -> Path:
+    """A log path of its own for this editor session: <name>.<pid>.<ns>.wal."""
+    return log_path(folder, f"{name}.{os.getpid()}.{time.time_ns()}")
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True             # exists but belongs to someone else
+    return True
+
+def orphans(folder: Path, name: str) -> list[Path]:
+    """
+    Session logs for name (see session_path) left behind by a process that
+    is gone, or by an earlier session of this one; newest first. Logs of
+    other windows that are still editing are skipped.
+    """
+    out = []
+    for path in (Path(folder) / ".wal").glob(f"{name}.*.wal"):
+        parts = path.name.split(".")
+        if len(parts) != 4 or not parts[1].isdigit():
+            continue
+        pid = int(parts[1])
+        if pid == os.getpid() or not _pid_alive(pid):
+            out.append(path)
+    legacy = log_path(folder, name)
+    if legacy.exists():
+        out.append(legacy)
+    return sorted(out, key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True)
+
+def digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def _frame(record) -> bytes:
+    payload = marshal.dumps(record)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(path: Path) -> list:
+    """Every intact record, stopping at the first torn or corrupt one."""
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        return []
+    out, pos = [], 0
+    while pos + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, pos)
+        payload = data[pos + _FRAME.size:pos + _FRAME.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        try:
+            out.append(marshal.loads(payload))
+        except (ValueError, EOFError, TypeError):
+            break
+        pos += _FRAME.size + length
+    return out
+
+# ─── Replay ───────────────────────────────────────────────────────────────────
+def apply(buf, record):
+    """Apply one edit record to a GapBuffer."""
+    kind, row, col, text = record
+    buf.move_to(row, col)
+    if kind == "i":
+        buf.insert(text)
+    else:
+        buf.delete_forward(len(text))
+
+def recover(path: Path, base: str):
+    """
+    (text, mtime) rebuilt from the log at path on top of base, or None when
+    there is nothing usable: no log, a log started from a different base
+    (checked even when a snapshot follows, so a log never lands on another
+    entry), or a log that changes nothing.
+    """
+    from editor import GapBuffer
+    records = read_records(path)
+    if not records or records[0][0] != "H" or records[0][1] != VERSION:
+        return None
+    if records[0][2] != digest(base):
+        return None
+    start, text = 1, base
+    for i in range(len(records) - 1, 0, -1):
+        if records[i][0] == "S":
+            start, text = i + 1, records[i][1]
+            break
+    buf = GapBuffer(text)
+    for record in records[start:]:
+        apply(buf, record)
+    text = buf.text()
+    if text == base:
+        return None
+    return text, os.path.getmtime(path)
+
+# ─── Log ──────────────────────────────────────────────────────────────────────
+class WriteAheadLog:
+    """
+    Append-only edit log for one editor session. record() only queues; the
+    file is created on the first flush, so an untouched session leaves
+    nothing behind.
+    """
+    def __init__(self, path: Path, base: str, snapshot: str | None = None):
+        self.path     = Path(path)
+        self.header   = ("H", VERSION, digest(base), time.time())
+        self.pending  = []
+        self.logged   = 0                 # payload bytes since the last snapshot
+        self.lock     = threading.Lock()     # pending/_rewrite; record() takes only this
+        self.io_lock  = threading.Lock()     # the file, held by flush and close
+        self.wake     = threading.Event()
+        self.closed   = False
+        self.error    = None              # last write failure, shown by the editor
+        self._fd      = None
+        self._synced  = time.monotonic()
+        self._unsynced = False
+        self._rewrite = None              # snapshot waiting to replace the file
+        if snapshot is not None:
+            self.checkpoint(snapshot)
+        self.thread = threading.Thread(target=self._run, daemon=True, name="wal")
+        self.thread.start()
+
+    def record(self, op):
+        with self.lock:
+            self.pending.append(op)
+        self.logged += len(op[3]) + 16
+
+    @property
+    def wants_checkpoint(self) -> bool:
+        return self.logged >= CHECKPOINT_BYTES
+
+    def checkpoint(self, text: str):
+        """Replace everything logged so far with a snapshot of text."""
+        with self.lock:
+            self.pending  = []
+            self._rewrite = text
+        self.logged = 0
+        self.wake.set()
+
+    # ─── Writer thread ───────────────────────────────────────────────────────
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(FLUSH_S)
+            self.wake.clear()
+            if not self.closed:
+                self.flush()
+
+    def flush(self, sync: bool = False):
+        # Take the queue under the short lock and write outside it, so a
+        # keystroke never waits for a write, checkpoint or fsync.
+        with self.io_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+                snapshot, self._rewrite = self._rewrite, None
+            try:
+                if snapshot is not None:
+                    self._replace(snapshot)
+                if batch:
+                    if self._fd is None:
+                        self._open()
+                    os.write(self._fd, b"".join(map(_frame, batch)))
+                    self._unsynced = True
+                if self._unsynced:
+                    self._maybe_sync(sync)
+                self.error = None
+            except OSError as e:
+                self.error = e.strerror or str(e)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        os.write(self._fd, _frame(self.header))
+
+    def _replace(self, snapshot: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_frame(self.header) + _frame(("S", snapshot)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    def _maybe_sync(self, force: bool):
+        every = config.AUTOSAVE_SYNC
+        now   = time.monotonic()
+        if force or (every is not None and now - self._synced >= every):
+            os.fsync(self._fd)
+            self._synced, self._unsynced = now, False
+
+    # ─── Shutdown ────────────────────────────────────────────────────────────
+    def close(self, keep: bool = False):
+        """
+        Stop the writer. keep=True (crash, logout) flushes and fsyncs what is
+        queued and leaves the log for recovery; otherwise it is deleted.
+        """
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        if keep:
+            self.flush(sync=True)
+        with self.io_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if not keep:
+                for p in (self.path, self.path.with_name(self.path.name + ".tmp")):
+                    try:
+                        p.unlink()
+                    except OSError:
+                        pass
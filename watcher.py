@@ -0,0 +1,433 @@
+"""
+Filesystem change notifications for open screens and caches.
+
+A single Watcher thread watches directories (optionally whole trees) and
+hands coalesced change events to subscribers. On Linux it uses inotify
+through ctypes; elsewhere, or if inotify cannot be set up, directories are
+polled by comparing scandir snapshots.
+
+inotify watches are a per-user kernel resource (fs.inotify.max_user_watches),
+so the watcher only uses a share of it. Directories beyond that budget, or
+refused by the kernel with ENOSPC, are polled round-robin instead, a few per
+tick, so a very deep tree costs bounded work.
+
+Bursts are coalesced per path: events are held until nothing new has
+arrived for COALESCE_S (or for at most MAX_DELAY_S), and a file created
+and deleted inside one burst is never reported.
+"""
+import ctypes
+import ctypes.util
+import errno
+import itertools
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+
+COALESCE_S   = 0.15     # quiet period before a burst is delivered
+MAX_DELAY_S  = 1.0      # a continuous burst is still delivered this often
+TICK_S       = 0.1
+POLL_S       = 2.0      # how often each polled directory is revisited
+POLL_BATCH   = 64       # polled directories scanned per tick at most
+WATCH_SHARE  = 0.5      # fraction of max_user_watches we allow ourselves
+MAX_WATCHES  = 8192
+
+Change = namedtuple("Change", "path kind is_dir")   # kind: created/deleted/modified/rescan
+
+# ─── inotify ──────────────────────────────────────────────────────────────────
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+IN_MOVED_FROM, IN_MOVED_TO           = 0x40, 0x80
+IN_CREATE, IN_DELETE                 = 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF         = 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED            = 0x4000, 0x8000
+IN_ONLYDIR, IN_ISDIR                 = 0x01000000, 0x40000000
+IN_NONBLOCK, IN_CLOEXEC              = os.O_NONBLOCK, 0o2000000
+
+_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+         | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct("iIII")
+
+def _watch_budget() -> int:
+    try:
+        limit = int(Path("/proc/sys/fs/inotify/max_user_watches").read_text())
+    except (OSError, ValueError):
+        limit = MAX_WATCHES
+    return max(1, min(MAX_WATCHES, int(limit * WATCH_SHARE)))
+
+class _Inotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm  = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.dirs = {}            # wd -> Path
+        self.wds  = {}            # Path -> wd
+        self.lock = threading.Lock()
+
+    def add(self, path: Path) -> bool:
+        """Watch path; False when the kernel's watch limit is reached."""
+        wd = self._add(self.fd, os.fsencode(path), _MASK)    # may be slow on a slow mount
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                return False
+            raise OSError(err, os.strerror(err), str(path))
+        with self.lock:
+            self.dirs[wd] = path
+            self.wds[path] = wd
+        return True
+
+    def remove(self, path: Path):
+        with self.lock:
+            wd = self.wds.pop(path, None)
+            if wd is not None:
+                self.dirs.pop(wd, None)
+        if wd is not None:
+            self._rm(self.fd, wd)
+
+    def read(self, timeout: float) -> list:
+        """Raw (dir, name, mask) events, or [(None, None, IN_Q_OVERFLOW)]."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        out, off = [], 0
+        while off < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, off)
+            off += _EVENT.size
+            name = data[off:off + length].rstrip(b"\0")
+            off += length
+            if mask & IN_Q_OVERFLOW:
+                return [(None, None, IN_Q_OVERFLOW)]
+            with self.lock:
+                folder = self.dirs.get(wd)
+                if mask & IN_IGNORED:
+                    if self.dirs.pop(wd, None) is not None and self.wds.get(folder) == wd:
+                        del self.wds[folder]
+                    continue
+            if folder is not None:
+                out.append((folder, os.fsdecode(name), mask))
+        return out
+
+# ─── Polling ──────────────────────────────────────────────────────────────────
+def _snapshot(folder: Path) -> dict | None:
+    """name -> (is_dir, mtime_ns, size), or None if folder is gone."""
+    snap = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    snap[entry.name] = (entry.is_dir(), st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return snap
+
+def _diff(folder: Path, old: dict, new: dict) -> list:
+    out = []
+    for name, info in new.items():
+        before = old.get(name)
+        if before is None:
+            out.append(Change(folder / name, "created", info[0]))
+        elif before != info and not info[0]:
+            out.append(Change(folder / name, "modified", False))
+    for name, info in old.items():
+        if name not in new:
+            out.append(Change(folder / name, "deleted", info[0]))
+    return out
+
+# ─── Watcher ──────────────────────────────────────────────────────────────────
+def _merge(prev: str | None, kind: str) -> str | None:
+    """Net effect of two events on one path within a burst (None = nothing)."""
+    if prev == "created":
+        return None if kind == "deleted" else "created"
+    if prev == "deleted" and kind == "created":
+        return "modified"
+    return kind
+
+def _under(path: str, prefixes) -> bool:
+    return any(path == p or path.startswith(p + os.sep) for p in prefixes)
+
+class Watcher:
+    def __init__(self, use_inotify: bool = True):
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = _Inotify()
+            except (OSError, AttributeError):
+                pass
+        self.budget  = _watch_budget()
+        self.roots   = {}         # Path -> recursive
+        self.polled  = {}         # Path -> snapshot
+        self.subs    = {}         # id -> (prefixes, callback)
+        self.pending = {}         # path -> Change
+        self.lock    = threading.RLock()      # watch tables; never held across a directory walk
+        self.sub_lock = threading.Lock()      # subs only
+        self._ids    = itertools.count()
+        self._poll_order = deque()
+        self._first = self._last = 0.0
+        self.thread = threading.Thread(target=self._run, daemon=True, name="fs-watcher")
+        self.thread.start()
+
+    @property
+    def backend(self) -> str:
+        if self.inotify is None:
+            return "polling"
+        return "inotify" if not self.polled else "inotify+polling"
+
+    # ─── Registration ────────────────────────────────────────────────────────
+    def watch(self, path, recursive: bool = False):
+        """Start watching path. Runs on its own thread: a slow mount never blocks the caller."""
+        threading.Thread(target=self._watch_now, args=(path, recursive),
+                         daemon=True, name="fs-watch-add").start()
+
+    def _watch_now(self, path, recursive):
+        path = Path(os.path.abspath(path))
+        if not path.is_dir():
+            return                  # tried again on the next call
+        with self.lock:
+            if self.roots.get(path) is True or (path in self.roots and not recursive):
+                return
+            self.roots[path] = recursive
+        self._add_tree(path, recursive)
+
+    def unwatch(self, path):
+        path = Path(os.path.abspath(path))
+        with self.lock:
+            if self.roots.pop(path, None) is None:
+                return
+            for d in [d for d in self._watched() if d == path or path in d.parents]:
+                if not any(d == r or (rec and r in d.parents)
+                           for r, rec in self.roots.items()):
+                    self._drop_dir(d)
+
+    def subscribe(self, paths, callback) -> int:
+        """Call callback(list[Change]) for changes under any of paths."""
+        with self.sub_lock:
+            sid = next(self._ids)
+            self.subs[sid] = (tuple(os.path.abspath(p) for p in paths), callback)
+            return sid
+
+    def unsubscribe(self, sid: int):
+        with self.sub_lock:
+            self.subs.pop(sid, None)
+
+    def _watched(self):
+        dirs = set(self.polled)
+        if self.inotify is not None:
+            with self.inotify.lock:
+                dirs.update(self.inotify.wds)
+        return dirs
+
+    def _covered(self, folder: Path) -> bool:
+        return folder in self.roots or self._recursive_root(folder)
+
+    def _add_dir(self, folder: Path):
+        """Watch one folder. The inotify add or first snapshot runs without self.lock."""
+        with self.lock:
+            if folder in self.polled or not self._covered(folder):
+                return
+            use_inotify = self.inotify is not None
+            if use_inotify:
+                with self.inotify.lock:
+                    if folder in self.inotify.wds:
+                        return
+                    use_inotify = len(self.inotify.wds) < self.budget
+        if use_inotify:
+            try:
+                added = self.inotify.add(folder)
+            except OSError:
+                return              # vanished or unreadable
+            if added:
+                with self.lock:
+                    if not self._covered(folder):      # unwatched meanwhile
+                        self.inotify.remove(folder)
+                return
+        snap = _snapshot(folder)
+        if snap is None:
+            return
+        with self.lock:
+            if folder not in self.polled and self._covered(folder):
+                self.polled[folder] = snap
+                self._poll_order.append(folder)
+
+    def _drop_dir(self, folder: Path):
+        """Stop watching folder and everything below it."""
+        for d in [d for d in self._watched() if d == folder or folder in d.parents]:
+            if self.inotify is not None:
+                self.inotify.remove(d)
+            if self.polled.pop(d, None) is not None:
+                try:
+                    self._poll_order.remove(d)
+                except ValueError:
+                    pass            # being rescanned by _poll_some
+
+    def _add_tree(self, root: Path, recursive: bool):
+        """Walk and watch root (and below); call without self.lock held."""
+        if not root.is_dir():
+            return
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            self._add_dir(folder)
+            if not recursive:
+                continue
+            try:
+                with os.scandir(folder) as it:
+                    stack.extend(Path(e.path) for e in it
+                                 if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _recursive_root(self, folder: Path) -> bool:
+        return any(rec and (folder == r or r in folder.parents)
+                   for r, rec in self.roots.items())
+
+    # ─── Event loop ──────────────────────────────────────────────────────────
+    def _run(self):
+        next_poll = 0.0
+        while True:
+            if self.inotify is not None:
+                raw = self.inotify.read(TICK_S)
+            else:
+                raw = []
+                time.sleep(TICK_S)
+            changes, new_trees = [], []
+            with self.lock:
+                for folder, name, mask in raw:
+                    if mask & IN_Q_OVERFLOW:
+                        changes.extend(Change(r, "rescan", True) for r in self.roots)
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        continue        # reported by the parent's watch
+                    is_dir = bool(mask & IN_ISDIR)
+                    path   = folder / name
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        changes.append(Change(path, "created", is_dir))
+                        if is_dir and self._recursive_root(folder):
+                            new_trees.append(path)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        changes.append(Change(path, "deleted", is_dir))
+                        if is_dir:
+                            self._drop_dir(path)
+                    elif not is_dir:
+                        changes.append(Change(path, "modified", False))
+            now = time.monotonic()
+            if self._poll_order and now >= next_poll:
+                changes.extend(self._poll_some(new_trees))
+                rounds = max(1, len(self._poll_order) // POLL_BATCH)
+                next_poll = now + POLL_S / rounds
+            for path in new_trees:
+                self._add_tree(path, True)
+            with self.lock:
+                self._queue(changes, now)
+                batch = self._due(now)
+            if batch:
+                self._deliver(batch)
+
+    def _poll_some(self, new_trees) -> list:
+        """Rescan a batch of polled folders; the scandirs run without self.lock."""
+        with self.lock:
+            batch = [self._poll_order.popleft()
+                     for _ in range(min(POLL_BATCH, len(self._poll_order)))]
+            olds  = [self.polled.get(f) for f in batch]
+        scans = [(f, old, _snapshot(f)) for f, old in zip(batch, olds)]
+        out = []
+        with self.lock:
+            for folder, old, new in scans:
+                if old is None or self.polled.get(folder) is not old:
+                    continue        # dropped meanwhile
+                if new is None:
+                    del self.polled[folder]
+                    continue
+                self.polled[folder] = new
+                self._poll_order.append(folder)
+                for ch in _diff(folder, old, new):
+                    out.append(ch)
+                    if ch.is_dir and ch.kind == "created" and self._recursive_root(folder):
+                        new_trees.append(ch.path)
+                    elif ch.is_dir and ch.kind == "deleted":
+                        self._drop_dir(ch.path)
+        return out
+
+    def _queue(self, changes, now):
+        for ch in changes:
+            if not self.pending:
+                self._first = now
+            self._last = now
+            prev = self.pending.get(ch.path)
+            kind = _merge(prev.kind if prev else None, ch.kind)
+            if kind is None:
+                del self.pending[ch.path]
+            else:
+                self.pending[ch.path] = ch._replace(kind=kind)
+
+    def _due(self, now) -> list:
+        if not self.pending:
+            return []
+        if now - self._last < COALESCE_S and now - self._first < MAX_DELAY_S:
+            return []
+        batch, self.pending = list(self.pending.values()), {}
+        return batch
+
+    def _deliver(self, batch):
+        with self.sub_lock:
+            subs = list(self.subs.values())
+        for prefixes, callback in subs:
+            mine = [ch for ch in batch if _under(str(ch.path), prefixes)
+                    or (ch.kind == "rescan" and any(_under(p, [str(ch.path)]) for p in prefixes))]
+            if mine:
+                try:
+                    callback(mine)
+                except Exception:
+                    pass
+
+# ─── Shared instance ──────────────────────────────────────────────────────────
+_watcher = None
+
+def get_watcher() -> Watcher:
+    """The process-wide watcher, started on first use."""
+    global _watcher
+    if _watcher is None:
+        _watcher = Watcher()
+    return _watcher
+
+class ChangeFlag:
+    """Subscription an open screen polls on its idle tick."""
+    def __init__(self, paths, watcher: Watcher | None = None):
+        self.watcher = watcher or get_watcher()
+        self.changes = []
+        self._lock   = threading.Lock()
+        self.sid     = self.watcher.subscribe(paths, self._push)
+
+    def _push(self, changes):
+        with self._lock:
+            self.changes.extend(changes)
+
+    def take(self) -> list:
+        with self._lock:
+            out, self.changes = self.changes, []
+        return out
+
+    def refresher(self, build, name: str | None = None):
+        """run_menu refresh callback: build() once something (named name) changed."""
+        def refresh():
+            if any(name is None or ch.path.name == name for ch in self.take()):
+                return build()
+            return None
+        return refresh
+
+    def close(self):
+        self.watcher.unsubscribe(self.sid)
@@ -0,0 +1,151 @@
+"""
+Word dictionaries for the hacking minigame.
+
+Every *.txt file in words/ is read as a list of words (one or more per
+line). Words are upper-cased, restricted to A-Z and bucketed by length.
+Each bucket stores its words back to back in one bytes blob, plus one
+posting list per (position, letter) naming the words with that letter at
+that position. These lists are the similarity graph used to pick duds: a
+dud drawn from the answer's posting for position p shares at least that
+letter with the answer.
+
+The built index is cached in .cache/words.bin and rebuilt only when a
+source file's size or mtime changes. If words/ is empty the built-in
+WORD_BANK is used instead.
+"""
+import marshal
+import os
+from array import array
+from config import WORDS_DIR, CACHE_DIR
+
+CACHE_FILE    = CACHE_DIR / "words.bin"
+CACHE_VERSION = 1
+MIN_LEN, MAX_LEN = 4, 12
+
+class WordIndex:
+    def __init__(self, buckets: dict):
+        # length -> (blob, {pos * 26 + letter: memoryview of uint32 ids})
+        self._buckets = buckets
+
+    # ─── Building ────────────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, words) -> "WordIndex":
+        by_len = {}
+        for w in words:
+            by_len.setdefault(len(w), set()).add(w)
+        raw = {}
+        for length, group in by_len.items():
+            group    = sorted(group)
+            postings = {}
+            for wid, w in enumerate(group):
+                for pos, ch in enumerate(w):
+                    postings.setdefault(pos * 26 + ord(ch) - 65, array("I")).append(wid)
+            raw[length] = ("".join(group).encode("ascii"),
+                           {k: v.tobytes() for k, v in postings.items()})
+        return cls._from_raw(raw)
+
+    @classmethod
+    def _from_raw(cls, raw: dict) -> "WordIndex":
+        return cls({length: (blob, {k: memoryview(v).cast("I") for k, v in post.items()})
+                    for length, (blob, post) in raw.items()})
+
+    def _to_raw(self) -> dict:
+        return {length: (blob, {k: bytes(v) for k, v in post.items()})
+                for length, (blob, post) in self._buckets.items()}
+
+    # ─── Lookups ─────────────────────────────────────────────────────────────
+    def lengths(self) -> list[int]:
+        return sorted(self._buckets)
+
+    def count(self, length: int) -> int:
+        bucket = self._buckets.get(length)
+        return len(bucket[0]) // length if bucket else 0
+
+    def word(self, length: int, wid: int) -> str:
+        blob = self._buckets[length][0]
+        return blob[wid * length:(wid + 1) * length].decode("ascii")
+
+    def pick(self, length: int, n: int, rng) -> list[str]:
+        """
+        Answer plus n-1 distinct duds, each sharing at least one positional
+        letter with the answer where the dictionary allows. Returns the answer
+        first. Cost depends on n, not on dictionary size.
+        """
+        total = self.count(length)
+        if total < n:
+            raise ValueError(f"only {total} words of length {length}")
+        blob, postings = self._buckets[length]
+        answer = rng.randrange(total)
+        ans    = blob[answer * length:(answer + 1) * length]
+        links  = [postings[p * 26 + ans[p] - 65] for p in range(length)]
+        chosen = {answer}
+        order  = [answer]
+        tries  = 0
+        while len(order) < n:
+            tries += 1
+            if tries <= 8 * n:
+                link = links[rng.randrange(length)]
+                wid  = link[rng.randrange(len(link))]
+            else:
+                wid = rng.randrange(total)    # too few neighbours: any word
+            if wid not in chosen:
+                chosen.add(wid)
+                order.append(wid)
+        return [self.word(length, wid) for wid in order]
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+def _sources():
+    if not WORDS_DIR.is_dir():
+        return []
+    return sorted(p for p in WORDS_DIR.glob("*.txt") if p.is_file())
+
+def _signature(sources) -> list:
+    sig = []
+    for p in sources:
+        st = p.stat()
+        sig.append((p.name, st.st_size, st.st_mtime_ns))
+    return sig
+
+def _read_words(sources):
+    for p in sources:
+        with open(p, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                for tok in line.split():
+                    w = tok.upper()
+                    if MIN_LEN <= len(w) <= MAX_LEN and w.isascii() and w.isalpha():
+                        yield w
+
+def load_index(sources=None, cache_file=CACHE_FILE) -> WordIndex | None:
+    """The dictionary index, from cache when current. None when no word lists."""
+    sources = _sources() if sources is None else sources
+    if not sources:
+        return None
+    sig = _signature(sources)
+    try:
+        with open(cache_file, "rb") as f:
+            version, cached_sig, raw = marshal.load(f)
+        if version == CACHE_VERSION and cached_sig == sig:
+            return WordIndex._from_raw(raw)
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+    index = WordIndex.build(_read_words(sources))
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(cache_file.name + ".tmp")
+        with open(tmp, "wb") as f:
+            marshal.dump((CACHE_VERSION, sig, index._to_raw()), f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass
+    return index
+
+_index   = None
+_loaded  = False
+
+def get_index() -> WordIndex | None:
+    """Process-wide dictionary, loaded on first use."""
+    global _index, _loaded
+    if not _loaded:
+        _index  = load_index()
+        _loaded = True
+    return _index